@@ -0,0 +1,174 @@
+"""Drive the API with OpenTofu HTTP backend traffic and report latency, throughput and RSS.
+
+Usage: python -m benchmarks.backend_load [--sizes 1 1024 10240] [--workspaces 8] [--cycles 5]
+       [--storage memory|configured] [--output results.json]
+
+Each workspace repeats LOCK, GET, POST and UNLOCK cycles against the app returned by
+src.main:init_fastapi_app, with its lifespan running. Sizes are KiB, so --sizes 204800 runs a
+200MiB scenario. The configured database must be migrated (make migrate); storage is the
+configured S3 endpoint or an in-memory stand-in.
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import statistics
+import time
+import uuid
+from contextlib import nullcontext
+from typing import (
+    Any,
+    Dict,
+    List,
+)
+from unittest.mock import patch
+
+from httpx import ASGITransport, AsyncClient
+
+from benchmarks.event_loop_lag import MemoryStorageRepository, make_state
+from src.core.settings import get_settings
+from src.main import init_fastapi_app
+
+OPERATIONS = ("lock", "get", "post", "unlock")
+RSS_SAMPLE_SECONDS = 0.01
+
+
+def current_rss() -> int:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        # Without procfs only the process-wide peak is available.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+async def sample_rss(stop: asyncio.Event) -> int:
+    peak = current_rss()
+    while not stop.is_set():
+        await asyncio.sleep(RSS_SAMPLE_SECONDS)
+        peak = max(peak, current_rss())
+    return peak
+
+
+async def run_workspace(
+    client: AsyncClient,
+    name: str,
+    state_data: bytes,
+    cycles: int,
+    latencies: Dict[str, List[float]],
+) -> None:
+    for cycle in range(cycles):
+        lock_id = str(uuid.uuid4())
+        requests = (
+            ("lock", "LOCK", f"/{name}/lock", {"json": {"ID": lock_id, "Who": "benchmark"}}),
+            ("get", "GET", f"/{name}", {}),
+            (
+                "post",
+                "POST",
+                f"/{name}",
+                {
+                    "params": {"ID": lock_id},
+                    # Vary the bytes per cycle so every save stores a new blob.
+                    "content": state_data[:-2] + str(cycle % 10).encode() + b"}",
+                    "headers": {"Content-Type": "application/json"},
+                },
+            ),
+            ("unlock", "UNLOCK", f"/{name}/unlock", {"json": {"ID": lock_id}}),
+        )
+        for operation, method, url, options in requests:
+            started = time.perf_counter()
+            response = await client.request(method, url, **options)
+            await response.aread()
+            latencies[operation].append(time.perf_counter() - started)
+            if response.status_code not in (200, 204):
+                raise RuntimeError(f"{method} {url} returned {response.status_code}")
+
+
+def milliseconds(values: List[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    return {
+        "p50": round(statistics.median(ordered) * 1000, 3),
+        "p99": round(ordered[int(len(ordered) * 0.99)] * 1000, 3),
+    }
+
+
+async def run_scenario(
+    client: AsyncClient, size: int, workspaces: int, cycles: int
+) -> Dict[str, Any]:
+    # End the state with a digit before the closing brace that each cycle rewrites.
+    state_data = make_state(size * 1024)[:-1] + b', "padding": 0}'
+    run_id = uuid.uuid4().hex[:8]
+    latencies: Dict[str, List[float]] = {operation: [] for operation in OPERATIONS}
+
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_rss(stop))
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(
+            run_workspace(client, f"bench_{run_id}_{index}", state_data, cycles, latencies)
+            for index in range(workspaces)
+        )
+    )
+    duration = time.perf_counter() - started
+    stop.set()
+
+    total_cycles = workspaces * cycles
+    return {
+        "state_size": len(state_data),
+        "workspaces": workspaces,
+        "cycles": total_cycles,
+        "duration_s": round(duration, 3),
+        "cycles_per_s": round(total_cycles / duration, 3),
+        "mib_per_s": round(total_cycles * len(state_data) * 2 / duration / 1024 / 1024, 3),
+        "latency_ms": {operation: milliseconds(latencies[operation]) for operation in OPERATIONS},
+        "peak_rss_mib": round(await sampler / 1024 / 1024, 1),
+    }
+
+
+async def run(
+    sizes: List[int], workspaces: int, cycles: int, storage: str
+) -> List[Dict[str, Any]]:
+    storage_patch = (
+        patch(
+            "src.repos.storage.factory.create_storage_repository",
+            return_value=MemoryStorageRepository(),
+        )
+        if storage == "memory"
+        else nullcontext()
+    )
+    app = init_fastapi_app()
+    headers = {"X-API-Token": get_settings().API_TOKEN}
+
+    results = []
+    with storage_patch:
+        async with (
+            app.router.lifespan_context(app),
+            AsyncClient(
+                transport=ASGITransport(app=app), base_url="http://benchmark", headers=headers
+            ) as client,
+        ):
+            for size in sizes:
+                results.append(await run_scenario(client, size, workspaces, cycles))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 1024, 10240], help="KiB")
+    parser.add_argument("--workspaces", type=int, default=8)
+    parser.add_argument("--cycles", type=int, default=5)
+    parser.add_argument("--storage", choices=["memory", "configured"], default="memory")
+    parser.add_argument("--output", help="write JSON here instead of stdout, away from app logs")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.sizes, args.workspaces, args.cycles, args.storage))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(results, output, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
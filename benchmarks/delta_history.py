@@ -0,0 +1,142 @@
+"""Compare full-copy and delta storage of state histories.
+
+Usage: python -m benchmarks.delta_history [--resources 2000] [--versions 50] [--interval 10]
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+import uuid
+from typing import (
+    Any,
+    Dict,
+    List,
+)
+
+from src.core.settings import CompressionType
+from src.repos.storage import get_codec
+from src.services.delta import (
+    apply_delta,
+    make_delta,
+)
+
+
+def make_resource(index: int) -> Dict[str, Any]:
+    return {
+        "mode": "managed",
+        "type": "aws_instance",
+        "name": f"instance_{index}",
+        "provider": 'provider["registry.opentofu.org/hashicorp/aws"]',
+        "instances": [
+            {
+                "schema_version": 1,
+                "attributes": {
+                    "id": f"i-{uuid.uuid4().hex[:17]}",
+                    "ami": "ami-0c55b159cbfafe1f0",
+                    "instance_type": "t3.micro",
+                    "private_ip": f"10.0.{index // 250}.{index % 250}",
+                    "tags": {"Name": f"instance-{index}", "Environment": "benchmark"},
+                },
+            }
+        ],
+    }
+
+
+def make_history(resources: int, versions: int, changes: int, seed: int) -> List[bytes]:
+    random.seed(seed)
+    state: Dict[str, Any] = {
+        "version": 4,
+        "terraform_version": "1.9.0",
+        "serial": 0,
+        "lineage": str(uuid.uuid4()),
+        "outputs": {},
+        "resources": [make_resource(index) for index in range(resources)],
+    }
+    history = []
+    for serial in range(versions):
+        state["serial"] = serial
+        for _ in range(changes):
+            resource = random.choice(state["resources"])
+            resource["instances"][0]["attributes"]["instance_type"] = random.choice(
+                ["t3.micro", "t3.small", "t3.medium"]
+            )
+        if serial % 5 == 4:
+            state["resources"].insert(
+                random.randrange(len(state["resources"])), make_resource(resources + serial)
+            )
+        history.append(json.dumps(state, indent=2).encode())
+    return history
+
+
+def measure(history: List[bytes], interval: int, codec_name: str) -> Dict[str, Any]:
+    codec = get_codec(codec_name)
+
+    full_blobs = [codec.compress(state_data) for state_data in history]
+    full_latency = []
+    for blob in full_blobs:
+        started = time.perf_counter()
+        codec.decompress(blob)
+        full_latency.append(time.perf_counter() - started)
+
+    stored = []
+    snapshot_index = 0
+    encode_latency = []
+    for index, state_data in enumerate(history):
+        if index - snapshot_index >= interval or index == 0:
+            snapshot_index = index
+            stored.append((None, codec.compress(state_data)))
+            continue
+        started = time.perf_counter()
+        delta = make_delta(history[snapshot_index], state_data)
+        encode_latency.append(time.perf_counter() - started)
+        stored.append((snapshot_index, codec.compress(delta)))
+
+    delta_latency = []
+    for index, (base_index, blob) in enumerate(stored):
+        started = time.perf_counter()
+        state_data = codec.decompress(blob)
+        if base_index is not None:
+            state_data = apply_delta(codec.decompress(stored[base_index][1]), state_data)
+        delta_latency.append(time.perf_counter() - started)
+        assert state_data == history[index]
+
+    def milliseconds(values: List[float]) -> Dict[str, float]:
+        if not values:
+            return {"p50": 0.0, "max": 0.0}
+        return {
+            "p50": round(statistics.median(values) * 1000, 3),
+            "max": round(max(values) * 1000, 3),
+        }
+
+    return {
+        "codec": codec_name,
+        "state_size": len(history[-1]),
+        "full_bytes": sum(len(blob) for blob in full_blobs),
+        "delta_bytes": sum(len(blob) for _, blob in stored),
+        "full_read_ms": milliseconds(full_latency),
+        "delta_read_ms": milliseconds(delta_latency),
+        "delta_write_ms": milliseconds(encode_latency),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--resources", type=int, default=2000)
+    parser.add_argument("--versions", type=int, default=50)
+    parser.add_argument("--changes", type=int, default=3, help="resources changed per version")
+    parser.add_argument("--interval", type=int, default=10, help="snapshot interval")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    history = make_history(args.resources, args.versions, args.changes, args.seed)
+    results = [
+        measure(history, args.interval, codec.value)
+        for codec in (CompressionType.IDENTITY, CompressionType.GZIP)
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
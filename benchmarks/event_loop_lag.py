@@ -0,0 +1,163 @@
+"""Measure event loop lag while large states are saved, with and without offloading.
+
+Usage: python -m benchmarks.event_loop_lag [--sizes 1 10 100] [--chunk-size 65536]
+
+Storage and repositories are in-memory stand-ins, so the numbers cover hashing, validation
+and compression only. Lag is how late a 1ms timer fires while a save is in progress.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+from src.repos.state.schema import StateVersionSchema
+from src.repos.storage import BaseStorageRepository
+from src.services.cache import StateCache
+from src.services.state import StateService
+
+TICK_SECONDS = 0.001
+
+
+class MemoryStorageRepository(BaseStorageRepository):
+
+    def __init__(self) -> None:
+        self.objects: Dict[str, bytes] = {}
+
+    async def get(self, path: str) -> Optional[bytes]:
+        return self.objects.get(path)
+
+    async def put(self, path: str, data: bytes) -> None:
+        self.objects[path] = data
+
+    async def delete(self, path: str) -> None:
+        self.objects.pop(path, None)
+
+    async def ensure_bucket_exists(self) -> None:
+        pass
+
+
+class MemoryStateVersionRepository:
+
+    def __init__(self) -> None:
+        self.versions: List[StateVersionSchema] = []
+
+    async def create_version(self, **fields: Any) -> StateVersionSchema:
+        version = StateVersionSchema(
+            id=len(self.versions) + 1,
+            created_at=datetime.now(),
+            state_id=1,
+            **{name: fields[name] for name in ("state_hash", "storage_path", "operation_id")},
+        )
+        self.versions.append(version)
+        return version
+
+
+class MemoryStateBlobRepository:
+
+    async def get_by_hash(self, state_hash: str) -> None:
+        return None
+
+
+def make_state(size: int) -> bytes:
+    resource = {
+        "mode": "managed",
+        "type": "aws_instance",
+        "name": "instance",
+        "instances": [{"attributes": {"id": "i-0123456789abcdef0", "tags": {"Env": "bench"}}}],
+    }
+    resource_size = len(json.dumps(resource)) + 2
+    state = {"version": 4, "serial": 1, "resources": [resource] * (size // resource_size)}
+    return json.dumps(state).encode()
+
+
+def make_service(offload_threshold: int) -> StateService:
+    service = StateService(None, MemoryStorageRepository())  # type: ignore[arg-type]
+    service.state_version_repo = MemoryStateVersionRepository()  # type: ignore[assignment]
+    service.state_blob_repo = MemoryStateBlobRepository()  # type: ignore[assignment]
+    service.cache = StateCache(0, 0)
+    service.offload_threshold = offload_threshold
+    return service
+
+
+async def body(state_data: bytes, chunk_size: int) -> AsyncIterator[bytes]:
+    for start in range(0, len(state_data), chunk_size):
+        yield state_data[start : start + chunk_size]
+        # Yield to the loop as a real request body would between receives.
+        await asyncio.sleep(0)
+
+
+async def measure_lag(stop: asyncio.Event) -> List[float]:
+    lags = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK_SECONDS)
+        lags.append(max(time.perf_counter() - started - TICK_SECONDS, 0.0))
+    return lags
+
+
+async def run_save(
+    state_data: bytes, chunk_size: int, offload_threshold: int
+) -> Tuple[float, List[float]]:
+    service = make_service(offload_threshold)
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(measure_lag(stop))
+    await asyncio.sleep(TICK_SECONDS * 2)
+
+    started = time.perf_counter()
+    await service.save_state_stream("benchmark", body(state_data, chunk_size), "benchmark-op")
+    duration = time.perf_counter() - started
+
+    stop.set()
+    return duration, await ticker
+
+
+def milliseconds(values: List[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    return {
+        "p50": round(statistics.median(ordered) * 1000, 3),
+        "p99": round(ordered[int(len(ordered) * 0.99)] * 1000, 3),
+        "max": round(ordered[-1] * 1000, 3),
+    }
+
+
+async def run(sizes: List[int], chunk_size: int, offload_threshold: int) -> List[Dict[str, Any]]:
+    results = []
+    for size in sizes:
+        state_data = make_state(size * 1024 * 1024)
+        for mode, threshold in (("inline", len(state_data) + 1), ("offload", offload_threshold)):
+            duration, lags = await run_save(state_data, chunk_size, threshold)
+            results.append(
+                {
+                    "mode": mode,
+                    "state_size": len(state_data),
+                    "save_ms": round(duration * 1000, 3),
+                    "loop_lag_ms": milliseconds(lags),
+                }
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100], help="MiB")
+    parser.add_argument("--chunk-size", type=int, default=64 * 1024)
+    parser.add_argument("--offload-threshold", type=int, default=1024 * 1024)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.sizes, args.chunk_size, args.offload_threshold))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""add state blobs
+
+Revision ID: 3f9a1c7d2b10
+Revises: 662fce845d24
+Create Date: 2026-10-17 21:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c7d2b10'
+down_revision = '662fce845d24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('state_blobs',
+    sa.Column('state_hash', sa.String(length=64), nullable=False),
+    sa.Column('storage_path', sa.String(length=255), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=True),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('state_hash')
+    )
+    op.execute(
+        """
+        INSERT INTO state_blobs (state_hash, storage_path, ref_count, created_at)
+        SELECT state_hash, MIN(storage_path), COUNT(*), MIN(created_at)
+        FROM state_versions
+        GROUP BY state_hash
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('state_blobs')
@@ -0,0 +1,26 @@
+"""add base version id to state versions
+
+Revision ID: 5d2e8a61c4f7
+Revises: b81e4d09c3a5
+Create Date: 2026-10-17 22:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2e8a61c4f7'
+down_revision = 'b81e4d09c3a5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('state_versions', sa.Column('base_version_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('state_versions_base_version_id_fkey', 'state_versions', 'state_versions', ['base_version_id'], ['id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('state_versions_base_version_id_fkey', 'state_versions', type_='foreignkey')
+    op.drop_column('state_versions', 'base_version_id')
@@ -0,0 +1,30 @@
+"""add state_versions state_id index
+
+Revision ID: 662fce845d24
+Revises: 72586952e904
+Create Date: 2026-10-17 21:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '662fce845d24'
+down_revision = '72586952e904'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_state_versions_state_id_created_at',
+        'state_versions',
+        ['state_id', 'created_at', 'id'],
+        unique=False,
+        postgresql_include=['state_hash', 'storage_path', 'operation_id'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_state_versions_state_id_created_at', table_name='state_versions')
@@ -0,0 +1,45 @@
+"""add latest_version_id to states
+
+Revision ID: 72586952e904
+Revises: 46508283c198
+Create Date: 2026-10-17 21:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '72586952e904'
+down_revision = '46508283c198'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('states', sa.Column('latest_version_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'fk_states_latest_version_id',
+        'states',
+        'state_versions',
+        ['latest_version_id'],
+        ['id'],
+        ondelete='SET NULL',
+    )
+    op.execute(
+        """
+        UPDATE states
+        SET latest_version_id = (
+            SELECT state_versions.id
+            FROM state_versions
+            WHERE state_versions.state_id = states.id
+            ORDER BY state_versions.created_at DESC, state_versions.id DESC
+            LIMIT 1
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('fk_states_latest_version_id', 'states', type_='foreignkey')
+    op.drop_column('states', 'latest_version_id')
@@ -0,0 +1,30 @@
+"""add states locked_at index
+
+Revision ID: 9c4b7e2f1a6d
+Revises: 5d2e8a61c4f7
+Create Date: 2026-10-17 23:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4b7e2f1a6d'
+down_revision = '5d2e8a61c4f7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_states_locked_at',
+        'states',
+        ['locked_at'],
+        unique=False,
+        postgresql_where=sa.text('lock_id IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_states_locked_at', table_name='states')
@@ -0,0 +1,26 @@
+"""add codec to state versions and blobs
+
+Revision ID: b81e4d09c3a5
+Revises: 3f9a1c7d2b10
+Create Date: 2026-10-17 21:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b81e4d09c3a5'
+down_revision = '3f9a1c7d2b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('state_versions', sa.Column('codec', sa.String(length=16), nullable=False, server_default='identity'))
+    op.add_column('state_blobs', sa.Column('codec', sa.String(length=16), nullable=False, server_default='identity'))
+
+
+def downgrade() -> None:
+    op.drop_column('state_blobs', 'codec')
+    op.drop_column('state_versions', 'codec')
@@ -0,0 +1,38 @@
+"""include codec and base_version_id in state_versions index
+
+Revision ID: c4d1f8e92a37
+Revises: e7a2c5d83b14
+Create Date: 2026-10-18 02:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d1f8e92a37'
+down_revision = 'e7a2c5d83b14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_index('ix_state_versions_state_id_created_at', table_name='state_versions')
+    op.create_index(
+        'ix_state_versions_state_id_created_at',
+        'state_versions',
+        ['state_id', 'created_at', 'id'],
+        unique=False,
+        postgresql_include=['state_hash', 'storage_path', 'operation_id', 'codec', 'base_version_id'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_state_versions_state_id_created_at', table_name='state_versions')
+    op.create_index(
+        'ix_state_versions_state_id_created_at',
+        'state_versions',
+        ['state_id', 'created_at', 'id'],
+        unique=False,
+        postgresql_include=['state_hash', 'storage_path', 'operation_id'],
+    )
@@ -0,0 +1,35 @@
+"""add state locks table
+
+Revision ID: e7a2c5d83b14
+Revises: 9c4b7e2f1a6d
+Create Date: 2026-10-18 00:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a2c5d83b14'
+down_revision = '9c4b7e2f1a6d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'state_locks',
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('lock_id', sa.String(length=255), nullable=False),
+        sa.Column('locked_by', sa.String(length=255), nullable=True),
+        sa.Column('operation', sa.String(length=255), nullable=True),
+        sa.Column('info', sa.Text(), nullable=True),
+        sa.Column('locked_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    op.create_index('ix_state_locks_locked_at', 'state_locks', ['locked_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_state_locks_locked_at', table_name='state_locks')
+    op.drop_table('state_locks')
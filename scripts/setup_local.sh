@@ -18,7 +18,7 @@ pip install poetry
 
 # Install dependencies using Poetry without installing the package
 echo "Installing dependencies..."
-poetry install --no-root
+poetry install --no-root --all-extras
 
 # Create .env file if it doesn't exist
 if [ ! -f ".env" ]; then
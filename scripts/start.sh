@@ -12,4 +12,4 @@ else
 fi
 
 echo "Starting application..."
-exec gunicorn src.main:app --worker-class uvicorn.workers.UvicornWorker --reload --workers 1 -b 0.0.0.0:8000 
+exec gunicorn src.main:app -c /app/scripts/gunicorn.conf.py --worker-class uvicorn.workers.UvicornWorker --reload --workers 1 -b 0.0.0.0:8000 
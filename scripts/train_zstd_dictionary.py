@@ -0,0 +1,43 @@
+"""Train a zstd dictionary for STORAGE_COMPRESSION=zstd from sample state files.
+
+Usage: python scripts/train_zstd_dictionary.py SAMPLE... [--size 112640] [--output-dir DIR]
+
+Samples should be recent states of the workspaces the server stores (for example fetched with
+GET /{state_identifier}); a few hundred give a useful dictionary. It is written to
+<output-dir>/<dictionary id>.zdict. Point STORAGE_ZSTD_DICTIONARY_PATH at it for new writes and
+keep every dictionary that was ever used in STORAGE_ZSTD_DICTIONARY_DIR, since blobs record the
+id of the dictionary they were written with and cannot be read without it.
+"""
+
+import argparse
+import os
+from typing import List
+
+import zstandard
+
+
+def train(paths: List[str], size: int) -> zstandard.ZstdCompressionDict:
+    samples = []
+    for path in paths:
+        with open(path, "rb") as sample_file:
+            samples.append(sample_file.read())
+    return zstandard.train_dictionary(size, samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("samples", nargs="+", help="State files to train on")
+    parser.add_argument("--size", type=int, default=112640, help="Dictionary size in bytes")
+    parser.add_argument("--output-dir", default="dictionaries")
+    args = parser.parse_args()
+
+    dictionary = train(args.samples, args.size)
+    os.makedirs(args.output_dir, exist_ok=True)
+    path = os.path.join(args.output_dir, f"{dictionary.dict_id()}.zdict")
+    with open(path, "wb") as dictionary_file:
+        dictionary_file.write(dictionary.as_bytes())
+    print(f"Wrote dictionary {dictionary.dict_id()} to {path}")
+
+
+if __name__ == "__main__":
+    main()
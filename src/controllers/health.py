@@ -4,10 +4,22 @@ import sys
 from datetime import datetime
 from typing import Any, Dict
 
-from fastapi import APIRouter, status
+from fastapi import (
+    APIRouter,
+    Response,
+    status,
+)
 
-from src.controllers.schema import HealthResponse, InfoResponse
+from src.controllers.schema import (
+    HealthResponse,
+    InfoResponse,
+    ReadinessResponse,
+)
+from src.core.metrics import CONTENT_TYPE, render_metrics
 from src.core.settings import get_settings
+from src.db.session import get_pool_status
+from src.services.cache import get_state_cache
+from src.services.readiness import get_readiness_checker
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -20,6 +32,27 @@ async def health() -> Dict[str, str]:
     return {"status": "healthy"}
 
 
+@router.get("/ready", response_model=ReadinessResponse, status_code=status.HTTP_200_OK)
+async def ready(response: Response) -> Dict[str, Any]:
+    checks = await get_readiness_checker().check()
+    is_ready = all(check.ok for check in checks.values())
+    if not is_ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+
+    return {
+        "status": "ready" if is_ready else "not_ready",
+        "checks": {
+            name: {
+                "status": "ok" if check.ok else "error",
+                "latency_ms": check.latency_ms,
+                "checked_at": check.checked_at,
+                "error": check.error,
+            }
+            for name, check in checks.items()
+        },
+    }
+
+
 @router.get("/info", response_model=InfoResponse, status_code=status.HTTP_200_OK)
 async def info() -> Dict[str, Any]:
     return {
@@ -32,4 +65,11 @@ async def info() -> Dict[str, Any]:
             "python_version": sys.version,
             "platform": platform.platform(),
         },
+        "database_pool": get_pool_status(),
+        "state_cache": get_state_cache().get_stats(),
     }
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE)
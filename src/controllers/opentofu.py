@@ -1,4 +1,11 @@
+import json
 import logging
+from typing import (
+    AsyncIterator,
+    Dict,
+    Optional,
+    Set,
+)
 
 from fastapi import (
     APIRouter,
@@ -7,29 +14,107 @@ from fastapi import (
     Path,
     Query,
     Request,
+    Response,
     status,
 )
-from fastapi.responses import Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.controllers.schema import (
+    BulkStateReadRequestSchema,
     LockRequestSchema,
     LockResponseSchema,
     StateVersionListResponseSchema,
     StateVersionResponseSchema,
 )
 from src.core.auth import get_api_token
+from src.core.logging import LogFields, log_duration
+from src.core.metrics import LOCK_CONFLICTS
+from src.core.settings import Settings, get_settings
 from src.db.session import get_session
-from src.repos.storage import BaseStorageRepository, create_storage_repository
-from src.services.state import StateService
+from src.repos.storage import (
+    BaseStorageRepository,
+    StorageStream,
+    get_shared_storage_repository,
+)
+from src.services.state import StateReadResult, StateService
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_VERSIONS_PAGE_SIZE = 100
+MAX_VERSIONS_PAGE_SIZE = 1000
+
 router = APIRouter(tags=["opentofu"], dependencies=[Depends(get_api_token)])
 
 
 def get_storage_repository() -> BaseStorageRepository:
-    return create_storage_repository()
+    return get_shared_storage_repository()
+
+
+def _accepted_encodings(request: Request) -> Set[str]:
+    encodings = set()
+    for value in request.headers.get("accept-encoding", "").split(","):
+        encoding, _, params = value.strip().partition(";")
+        if encoding and params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            encodings.add(encoding.lower())
+    return encodings
+
+
+def _etag(state_hash: str, content_encoding: Optional[str] = None) -> str:
+    # Encoded and identity bodies are different representations, so they need distinct tags.
+    if content_encoding:
+        return f'"{state_hash}-{content_encoding}"'
+    return f'"{state_hash}"'
+
+
+def _matching_etag(header: Optional[str], state_hash: str) -> Optional[str]:
+    # Weak comparison for If-None-Match (RFC 7232): any representation of the version matches.
+    if header is None:
+        return None
+    for value in header.split(","):
+        tag = value.strip()
+        if tag == "*":
+            return _etag(state_hash)
+        opaque_tag = tag.removeprefix("W/").strip('"')
+        if opaque_tag == state_hash or opaque_tag.startswith(f"{state_hash}-"):
+            return tag
+    return None
+
+
+def _strong_matching_etag(header: str, state_hash: str) -> bool:
+    # If-Match needs strong comparison: weak tags and encoded representations never match.
+    return any(tag.strip() in ("*", _etag(state_hash)) for tag in header.split(","))
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
+def _streaming_response(state_stream: StorageStream) -> StreamingResponse:
+    headers: Dict[str, str] = {}
+    if state_stream.content_length is not None:
+        headers["Content-Length"] = str(state_stream.content_length)
+    if state_stream.content_encoding is not None:
+        headers["Content-Encoding"] = state_stream.content_encoding
+    if state_stream.etag is not None:
+        headers["ETag"] = _etag(state_stream.etag, state_stream.content_encoding)
+        headers["Vary"] = "Accept-Encoding"
+    return StreamingResponse(state_stream.chunks, media_type="application/json", headers=headers)
+
+
+def _ndjson_line(result: StateReadResult) -> bytes:
+    fields: Dict[str, object] = {"name": result.name}
+    if result.version is not None:
+        fields["version_id"] = result.version.id
+        fields["state_hash"] = result.version.state_hash
+    if result.error is not None:
+        fields["error"] = result.error
+        return json.dumps(fields).encode() + b"\n"
+
+    # The state is spliced in as stored. Uploads are parsed as JSON, which rejects raw line
+    # breaks inside strings, so any left are whitespace and dropping them keeps one line each.
+    state = result.data.replace(b"\r", b"").replace(b"\n", b"") if result.data else b"null"
+    return json.dumps(fields).encode()[:-1] + b', "state": ' + state + b"}\n"
 
 
 async def get_state_service(
@@ -41,12 +126,23 @@ async def get_state_service(
 
 @router.get("/{state_identifier}", status_code=status.HTTP_200_OK)
 async def get_state(
+    request: Request,
     state_identifier: str = Path(..., description="The state identifier"),
     state_service: StateService = Depends(get_state_service),
 ):
-    state_data = await state_service.get_state(state_identifier)
-    logger.info(f"State data for {state_identifier}: {state_data}")
-    return Response(content=state_data, media_type="application/json")
+    with log_duration(logger, "State read", state=state_identifier) as log_fields:
+        latest_version = await state_service.get_latest_version(state_identifier)
+        if latest_version:
+            etag = _matching_etag(request.headers.get("if-none-match"), latest_version.state_hash)
+            log_fields["not_modified"] = etag is not None
+            if etag:
+                return _not_modified(etag)
+
+        state_stream = await state_service.get_state_stream(
+            state_identifier, _accepted_encodings(request), latest_version=latest_version
+        )
+        log_fields["size"] = state_stream.content_length
+    return _streaming_response(state_stream)
 
 
 @router.post(
@@ -54,20 +150,46 @@ async def get_state(
 )
 async def save_state(
     request: Request,
+    response: Response,
     state_identifier: str = Path(..., description="The state identifier"),
     ID: str = Query(str),
     state_service: StateService = Depends(get_state_service),
 ):
-    state_data = await request.body()
-    logger.info(f"Saving state {state_identifier} with operation ID: {ID}")
+    expected_version_id = None
+    if_match = request.headers.get("if-match")
+    if if_match is not None:
+        latest_version = await state_service.get_latest_version(state_identifier)
+        if not latest_version or not _strong_matching_etag(if_match, latest_version.state_hash):
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="State does not match If-Match",
+            )
+        expected_version_id = latest_version.id
+
     try:
-        await state_service.save_state(state_identifier, state_data, operation_id=ID)
-        logger.info(f"Successfully saved state {state_identifier} for operation ID: {ID}")
-        return LockResponseSchema()
+        with log_duration(logger, "State save request", state=state_identifier, operation_id=ID):
+            version = await state_service.save_state_stream(
+                state_identifier,
+                request.stream(),
+                operation_id=ID,
+                expected_version_id=expected_version_id,
+            )
     except ValueError as exc:
-        logger.error(f"Failed to save state {state_identifier} for operation ID {ID}: {str(exc)}")
+        logger.error(
+            "Failed to save state %s",
+            LogFields(state=state_identifier, operation_id=ID, error=exc),
+        )
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
 
+    if version is None and expected_version_id is not None:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="State was modified concurrently",
+        )
+    if version is not None:
+        response.headers["ETag"] = _etag(version.state_hash)
+    return LockResponseSchema()
+
 
 @router.api_route(
     "/{state_identifier}/lock",
@@ -78,12 +200,24 @@ async def save_state(
 async def lock_state(
     request: Request,
     state_identifier: str = Path(..., description="The state identifier"),
+    wait: float = Query(
+        0, ge=0, description="Seconds to wait for a held lock to be released before 409"
+    ),
     state_service: StateService = Depends(get_state_service),
 ):
     lock_data = LockRequestSchema.model_validate(await request.json())
-    logger.info(f"Lock data for {state_identifier}: {lock_data}")
-    success = await state_service.lock_state(state_identifier, lock_data)
+    with log_duration(
+        logger,
+        "State lock",
+        state=state_identifier,
+        lock_id=lock_data.Id,
+        who=lock_data.who,
+        wait=wait,
+    ) as log_fields:
+        success = await state_service.lock_state(state_identifier, lock_data, wait)
+        log_fields["acquired"] = success
     if not success:
+        LOCK_CONFLICTS.labels(operation="lock").inc()
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="State is already locked")
 
     return LockResponseSchema()
@@ -102,10 +236,42 @@ async def unlock_state(
 ):
     lock_request = LockRequestSchema.model_validate(await request.json())
 
-    success = await state_service.unlock_state(state_identifier, lock_request.Id)
+    with log_duration(
+        logger, "State unlock", state=state_identifier, lock_id=lock_request.Id
+    ) as log_fields:
+        success = await state_service.unlock_state(state_identifier, lock_request.Id)
+        log_fields["released"] = success
     if success is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Lock ID not found")
     if not success:
+        LOCK_CONFLICTS.labels(operation="unlock").inc()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Invalid lock ID")
+
+    return LockResponseSchema()
+
+
+@router.api_route(
+    "/{state_identifier}/renew",
+    methods=["POST"],
+    status_code=status.HTTP_200_OK,
+    response_model=LockResponseSchema,
+)
+async def renew_lock(
+    request: Request,
+    state_identifier: str = Path(..., description="The state identifier"),
+    state_service: StateService = Depends(get_state_service),
+):
+    lock_request = LockRequestSchema.model_validate(await request.json())
+
+    with log_duration(
+        logger, "State lock renew", state=state_identifier, lock_id=lock_request.Id
+    ) as log_fields:
+        success = await state_service.renew_lock(state_identifier, lock_request.Id)
+        log_fields["renewed"] = success
+    if success is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Lock ID not found")
+    if not success:
+        LOCK_CONFLICTS.labels(operation="renew").inc()
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Invalid lock ID")
 
     return LockResponseSchema()
@@ -118,11 +284,26 @@ async def unlock_state(
 )
 async def get_state_versions(
     state_identifier: str = Path(..., description="The state identifier"),
+    limit: int = Query(
+        DEFAULT_VERSIONS_PAGE_SIZE,
+        ge=1,
+        le=MAX_VERSIONS_PAGE_SIZE,
+        description="Maximum number of versions to return",
+    ),
+    before_id: Optional[int] = Query(None, description="Return versions older than this one"),
+    after_id: Optional[int] = Query(None, description="Return versions newer than this one"),
     state_service: StateService = Depends(get_state_service),
 ):
-    versions = await state_service.get_state_versions(state_identifier)
+    versions = await state_service.get_state_versions(
+        state_identifier, limit=limit + 1, before_id=before_id, after_id=after_id
+    )
+    has_more = len(versions) > limit
+    if has_more:
+        versions = versions[1:] if after_id is not None and before_id is None else versions[:-1]
 
-    return StateVersionListResponseSchema(data=[version.model_dump() for version in versions])
+    return StateVersionListResponseSchema(
+        data=[version.model_dump() for version in versions], has_more=has_more
+    )
 
 
 @router.get(
@@ -131,17 +312,90 @@ async def get_state_versions(
     response_model=StateVersionResponseSchema,
 )
 async def get_state_version(
+    request: Request,
+    response: Response,
     version_id: int = Path(..., description="The version identifier"),
     state_identifier: str = Path(..., description="The state identifier"),
     state_service: StateService = Depends(get_state_service),
 ):
-    logger.info(f"Retrieving state version: {version_id} for {state_identifier}")
+    logger.info(
+        "Retrieving state version %s", LogFields(state=state_identifier, version_id=version_id)
+    )
     version = await state_service.get_state_version(state_identifier, version_id)
     if not version:
-        logger.warning(f"State version not found: {version_id} for {state_identifier}")
+        logger.warning(
+            "State version not found %s", LogFields(state=state_identifier, version_id=version_id)
+        )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"State version with id={version_id} not found",
         )
-    logger.debug(f"Successfully retrieved state version: {version_id} for {state_identifier}")
+    etag = _matching_etag(request.headers.get("if-none-match"), version.state_hash)
+    if etag:
+        return _not_modified(etag)
+
+    logger.debug(
+        "Retrieved state version %s", LogFields(state=state_identifier, version_id=version_id)
+    )
+    response.headers["ETag"] = _etag(version.state_hash)
     return StateVersionResponseSchema(**version.model_dump())
+
+
+@router.get("/{state_identifier}/versions/{version_id}/download", status_code=status.HTTP_200_OK)
+async def download_state_version(
+    request: Request,
+    version_id: int = Path(..., description="The version identifier"),
+    state_identifier: str = Path(..., description="The state identifier"),
+    state_service: StateService = Depends(get_state_service),
+):
+    with log_duration(
+        logger, "State version download", state=state_identifier, version_id=version_id
+    ) as log_fields:
+        version = await state_service.get_state_version(state_identifier, version_id)
+        if version:
+            etag = _matching_etag(request.headers.get("if-none-match"), version.state_hash)
+            log_fields["not_modified"] = etag is not None
+            if etag:
+                return _not_modified(etag)
+
+        state_stream = (
+            await state_service.open_version_stream(version, _accepted_encodings(request))
+            if version
+            else None
+        )
+        log_fields["size"] = state_stream.content_length if state_stream else None
+    if state_stream is None:
+        logger.warning(
+            "State version not found %s", LogFields(state=state_identifier, version_id=version_id)
+        )
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"State version with id={version_id} not found",
+        )
+    return _streaming_response(state_stream)
+
+
+@router.post("/_bulk/states", status_code=status.HTTP_200_OK)
+async def read_states(
+    bulk_request: BulkStateReadRequestSchema,
+    state_service: StateService = Depends(get_state_service),
+    settings: Settings = Depends(get_settings),
+):
+    if len(bulk_request.names) > settings.BULK_READ_MAX_STATES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.BULK_READ_MAX_STATES} states can be read at once",
+        )
+
+    results = await state_service.read_latest_states(bulk_request.names)
+
+    async def lines() -> AsyncIterator[bytes]:
+        with log_duration(
+            logger, "Bulk state read", requested=len(bulk_request.names), failed=0
+        ) as log_fields:
+            async for result in results:
+                if result.error is not None:
+                    log_fields["failed"] += 1
+                yield _ndjson_line(result)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
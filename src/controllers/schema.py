@@ -1,5 +1,10 @@
 from datetime import datetime
-from typing import List
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+)
 
 from pydantic import BaseModel, Field
 
@@ -8,6 +13,18 @@ class HealthResponse(BaseModel):
     status: str
 
 
+class DependencyStatus(BaseModel):
+    status: str
+    latency_ms: float
+    checked_at: datetime
+    error: Optional[str] = None
+
+
+class ReadinessResponse(BaseModel):
+    status: str
+    checks: Dict[str, DependencyStatus]
+
+
 class SystemInfo(BaseModel):
     python_version: str
     platform: str
@@ -20,6 +37,8 @@ class InfoResponse(BaseModel):
     environment: str
     timestamp: str
     system: SystemInfo
+    database_pool: Dict[str, Any]
+    state_cache: Dict[str, Any]
 
 
 class LockRequestSchema(BaseModel):
@@ -43,7 +62,13 @@ class StateVersionResponseSchema(BaseModel):
     created_at: datetime
     operation_id: str
     state_id: int
+    codec: str
 
 
 class StateVersionListResponseSchema(BaseModel):
     data: List[StateVersionResponseSchema]
+    has_more: bool = False
+
+
+class BulkStateReadRequestSchema(BaseModel):
+    names: List[str] = Field(..., min_length=1)
@@ -1,5 +1,17 @@
+import atexit
 import logging
+import logging.handlers
+import queue
+import random
 import sys
+import time
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    Optional,
+)
 
 from json_log_formatter import JSONFormatter
 
@@ -7,8 +19,59 @@ from src.core.settings import LogFormat, Settings
 
 logger = logging.getLogger(__name__)
 
+APP_LOGGER_NAME = "src"
+
+_queue_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class LogFields(dict):  # type: ignore[type-arg]
+    """Structured log fields rendered as ``key=value`` only when a record is emitted."""
+
+    def __str__(self) -> str:
+        return " ".join(f"{key}={value}" for key, value in self.items())
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue records unformatted, so ``msg % args`` runs on the listener thread.
+
+    Arguments are read when the record is formatted, so they must not be mutated after logging.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class DebugSamplingFilter(logging.Filter):
+
+    def __init__(self, sample_rate: float):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.sample_rate >= 1:
+            return True
+        return random.random() < self.sample_rate
+
+
+@contextmanager
+def log_duration(
+    log: logging.Logger, message: str, level: int = logging.INFO, **fields: Any
+) -> Iterator[Dict[str, Any]]:
+    log_fields = LogFields(fields)
+    start = time.perf_counter()
+    try:
+        yield log_fields
+    finally:
+        if log.isEnabledFor(level):
+            log_fields["duration_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            # A copy, as the record is formatted later and the caller still holds the fields.
+            emitted_fields = LogFields(log_fields)
+            log.log(level, "%s %s", message, emitted_fields, extra=emitted_fields)
+
 
 def setup_logging(settings: Settings) -> None:
+    global _queue_listener
+
     fmt = "%(asctime)s - %(threadName)s - %(name)s - %(levelname)s - %(lineno)d %(message)s  %(funcName)s"
     match settings.LOG_FORMAT:
         case LogFormat.JSON:
@@ -16,9 +79,33 @@ def setup_logging(settings: Settings) -> None:
         case _:
             formatter = logging.Formatter(fmt)
 
-    handler = logging.StreamHandler(sys.stdout)
-    handler.setFormatter(formatter)
-    logging.basicConfig(handlers=[handler], level=logging.INFO)
-    logger.setLevel(logging.getLevelName(settings.LOG_LEVEL))
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+
+    handler: logging.Handler = stream_handler
+    if settings.LOG_QUEUE_ENABLED:
+        stop_logging()
+        log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        handler = DeferredQueueHandler(log_queue)
+        _queue_listener = logging.handlers.QueueListener(
+            log_queue, stream_handler, respect_handler_level=True
+        )
+        _queue_listener.start()
+    handler.addFilter(DebugSamplingFilter(settings.LOG_DEBUG_SAMPLE_RATE))
+
+    logging.basicConfig(handlers=[handler], level=logging.INFO, force=True)
+    # LOG_LEVEL applies to the application's loggers; libraries stay at INFO.
+    logging.getLogger(APP_LOGGER_NAME).setLevel(logging.getLevelName(settings.LOG_LEVEL))
     for logger_name in ("fastapi", "uvicorn", "uvicorn.error", "uvicorn.access"):
         logging.getLogger(logger_name).handlers = [handler]
+
+
+def stop_logging() -> None:
+    global _queue_listener
+
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+
+
+atexit.register(stop_logging)
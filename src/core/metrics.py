@@ -0,0 +1,198 @@
+import functools
+import os
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.metrics_core import GaugeMetricFamily, Metric
+from prometheus_client.registry import Collector
+from starlette.routing import Match
+from starlette.types import (
+    ASGIApp,
+    Message,
+    Receive,
+    Scope,
+    Send,
+)
+
+from src.core.tracing import trace_span
+
+# generate_latest writes the Prometheus text exposition format, version 0.0.4.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = tuple(float(1024**power * 4**step) for power in (1, 2) for step in range(5))
+
+LabelValues = Tuple[str, ...]
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+_callback_gauges: List["CallbackGauge"] = []
+
+
+class CallbackGauge(Collector):
+    """Gauge whose samples are read from ``callback`` at scrape time.
+
+    The values describe the process serving the scrape, so they are not aggregated
+    across gunicorn workers.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        callback: Callable[[], Dict[LabelValues, float]],
+        registry: Optional[CollectorRegistry] = REGISTRY,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        if registry is not None:
+            registry.register(self)
+        if registry is REGISTRY:
+            _callback_gauges.append(self)
+
+    def describe(self) -> List[Metric]:
+        return [GaugeMetricFamily(self.name, self.documentation, labels=self.labelnames)]
+
+    def collect(self) -> Iterator[Metric]:
+        family = GaugeMetricFamily(self.name, self.documentation, labels=self.labelnames)
+        for values, value in self.callback().items():
+            family.add_metric(values, value)
+        yield family
+
+
+def render_metrics() -> bytes:
+    # Under gunicorn each worker writes its samples to PROMETHEUS_MULTIPROC_DIR; any worker
+    # can then serve the scrape by merging those files.
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return generate_latest(REGISTRY)
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    for gauge in _callback_gauges:
+        registry.register(gauge)
+    return generate_latest(registry)
+
+
+def observe_duration(histogram: Histogram) -> Callable[[F], F]:
+    """Time and trace an async repository method, labelled with its class and method name."""
+
+    def decorator(func: F) -> F:
+        repository, method = func.__qualname__.split(".")[-2:]
+        timer = histogram.labels(repository=repository, method=method)
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with trace_span(f"db.{repository}.{method}"), timer.time():
+                return await func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency until the last body chunk is sent",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Database time per repository method, including commits",
+    ["repository", "method"],
+    buckets=LATENCY_BUCKETS,
+)
+STORAGE_OPERATION_DURATION = Histogram(
+    "storage_operation_duration_seconds",
+    "Object storage call latency",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+STORAGE_BYTES = Counter(
+    "storage_bytes_total",
+    "Bytes transferred to and from object storage",
+    ["direction"],
+)
+STORAGE_REQUESTS_IN_PROGRESS = Gauge(
+    "storage_requests_in_progress",
+    "Object storage calls holding a pooled connection",
+    multiprocess_mode="livesum",
+)
+STORAGE_POOL_MAX_CONNECTIONS = Gauge(
+    "storage_pool_max_connections",
+    "Connections available in the object storage client pool",
+    multiprocess_mode="livesum",
+)
+STATE_SIZE = Histogram(
+    "state_size_bytes",
+    "Size of uploaded state documents",
+    buckets=SIZE_BUCKETS,
+)
+LOCK_CONFLICTS = Counter(
+    "state_lock_conflicts_total",
+    "LOCK, UNLOCK and lock renew requests rejected with 409",
+    ["operation"],
+)
+LOCKS_EXPIRED = Counter(
+    "state_locks_expired_total",
+    "Locks released by the reaper after their lease expired",
+)
+
+
+def _route_template(scope: Scope) -> str:
+    route = scope.get("route")
+    if route is None:
+        for candidate in getattr(scope.get("app"), "routes", ()):
+            if candidate.matches(scope)[0] == Match.FULL:
+                route = candidate
+                break
+    return getattr(route, "path", "unmatched")
+
+
+class MetricsMiddleware:
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_DURATION.labels(
+                method=scope["method"], route=_route_template(scope), status=status_code
+            ).observe(time.perf_counter() - start)
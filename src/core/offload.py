@@ -0,0 +1,29 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import (
+    Any,
+    Callable,
+    TypeVar,
+)
+
+from src.core.settings import get_settings
+
+T = TypeVar("T")
+
+
+@lru_cache()
+def get_offload_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(
+        max_workers=get_settings().STATE_OFFLOAD_WORKERS, thread_name_prefix="state-offload"
+    )
+
+
+async def run_offloaded(func: Callable[..., T], *args: Any) -> T:
+    """Run CPU-bound ``func`` in the offload pool so the event loop keeps serving requests.
+
+    hashlib, zlib and zstandard release the GIL on large buffers, so that work runs in
+    parallel; pure Python work still yields the loop at every GIL switch interval.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_offload_executor(), func, *args)
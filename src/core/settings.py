@@ -1,5 +1,6 @@
 from enum import Enum, StrEnum
 from functools import lru_cache
+from typing import Optional
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -21,6 +22,28 @@ class StorageType(str, Enum):
     # AWS_S3 = "aws_s3" # TODO: Add AWS S3 storage
 
 
+class CacheType(str, Enum):
+    NONE = "none"
+    MEMORY = "memory"
+    REDIS = "redis"
+
+
+class TracingExporter(str, Enum):
+    OTLP = "otlp"
+    FILE = "file"
+
+
+class LockBackend(str, Enum):
+    ROW = "row"
+    ADVISORY = "advisory"
+
+
+class CompressionType(str, Enum):
+    IDENTITY = "identity"
+    GZIP = "gzip"
+    ZSTD = "zstd"
+
+
 class Settings(BaseSettings):
     APP_NAME: str = Field("OpenTofu State Manager API", alias="APP_NAME")
     APP_DESCRIPTION: str = Field("API for managing OpenTofu state", alias="APP_DESCRIPTION")
@@ -29,6 +52,8 @@ class Settings(BaseSettings):
     ALLOWED_HOSTS: list[str] = Field(["*"], alias="ALLOWED_HOSTS")
     LOG_LEVEL: str = Field("INFO", alias="LOG_LEVEL")
     LOG_FORMAT: LogFormat = Field(LogFormat.TEXT, alias="LOG_FORMAT")
+    LOG_QUEUE_ENABLED: bool = Field(True, alias="LOG_QUEUE_ENABLED")
+    LOG_DEBUG_SAMPLE_RATE: float = Field(1.0, ge=0, le=1, alias="LOG_DEBUG_SAMPLE_RATE")
     DB_ECHO: bool = Field(False, alias="DB_ECHO")
     API_TOKEN: str = Field("API_TOKEN=managing-opentofu-state-secure-api-token", alias="API_TOKEN")
     STORAGE_TYPE: StorageType = Field(StorageType.MINIO, alias="STORAGE_TYPE")
@@ -38,12 +63,64 @@ class Settings(BaseSettings):
     DB_HOST: str = Field("localhost", alias="DB_HOST")
     DB_PORT: str = Field("5432", alias="DB_PORT")
     DB_NAME: str = Field("opentofu_state", alias="DB_NAME")
+    DB_POOL_SIZE: int = Field(10, alias="DB_POOL_SIZE")
+    DB_MAX_OVERFLOW: int = Field(20, alias="DB_MAX_OVERFLOW")
+    DB_POOL_RECYCLE: int = Field(1800, alias="DB_POOL_RECYCLE")
+    DB_POOL_TIMEOUT: int = Field(30, alias="DB_POOL_TIMEOUT")
 
     MINIO_ENDPOINT: str = Field("localhost:9000", alias="MINIO_ENDPOINT")
     MINIO_ACCESS_KEY: str = Field("minioadmin", alias="MINIO_ACCESS_KEY")
     MINIO_SECRET_KEY: str = Field("minioadmin", alias="MINIO_SECRET_KEY")
     MINIO_SECURE: bool = Field(False, alias="MINIO_SECURE")
     MINIO_BUCKET_NAME: str = Field("opentofu-states", alias="MINIO_BUCKET_NAME")
+    MINIO_MAX_POOL_CONNECTIONS: int = Field(50, alias="MINIO_MAX_POOL_CONNECTIONS")
+    MINIO_CONNECT_TIMEOUT: float = Field(5.0, alias="MINIO_CONNECT_TIMEOUT")
+    MINIO_READ_TIMEOUT: float = Field(60.0, alias="MINIO_READ_TIMEOUT")
+    MINIO_KEEPALIVE_TIMEOUT: float = Field(60.0, alias="MINIO_KEEPALIVE_TIMEOUT")
+    MINIO_RETRY_MODE: str = Field("standard", alias="MINIO_RETRY_MODE")
+    MINIO_MAX_ATTEMPTS: int = Field(3, alias="MINIO_MAX_ATTEMPTS")
+    MINIO_MULTIPART_PART_SIZE: int = Field(
+        8 * 1024 * 1024, ge=5 * 1024 * 1024, alias="MINIO_MULTIPART_PART_SIZE"
+    )
+    STORAGE_COMPRESSION: CompressionType = Field(CompressionType.GZIP, alias="STORAGE_COMPRESSION")
+    STORAGE_COMPRESSION_LEVEL: int = Field(3, alias="STORAGE_COMPRESSION_LEVEL")
+    STORAGE_ZSTD_DICTIONARY_PATH: Optional[str] = Field(None, alias="STORAGE_ZSTD_DICTIONARY_PATH")
+    STORAGE_ZSTD_DICTIONARY_DIR: Optional[str] = Field(None, alias="STORAGE_ZSTD_DICTIONARY_DIR")
+    STORAGE_INLINE_UPLOAD_SIZE: int = Field(8 * 1024 * 1024, alias="STORAGE_INLINE_UPLOAD_SIZE")
+    STORAGE_STREAM_CHUNK_SIZE: int = Field(256 * 1024, alias="STORAGE_STREAM_CHUNK_SIZE")
+    STORAGE_DELTA_ENABLED: bool = Field(False, alias="STORAGE_DELTA_ENABLED")
+    STORAGE_DELTA_SNAPSHOT_INTERVAL: int = Field(10, ge=1, alias="STORAGE_DELTA_SNAPSHOT_INTERVAL")
+    STATE_OFFLOAD_THRESHOLD: int = Field(1024 * 1024, ge=0, alias="STATE_OFFLOAD_THRESHOLD")
+    STATE_OFFLOAD_WORKERS: int = Field(4, ge=1, alias="STATE_OFFLOAD_WORKERS")
+    STATE_CACHE_MAX_SIZE: int = Field(256 * 1024 * 1024, ge=0, alias="STATE_CACHE_MAX_SIZE")
+    STATE_CACHE_MAX_ENTRY_SIZE: int = Field(
+        16 * 1024 * 1024, ge=0, alias="STATE_CACHE_MAX_ENTRY_SIZE"
+    )
+    BULK_READ_CONCURRENCY: int = Field(32, ge=1, alias="BULK_READ_CONCURRENCY")
+    BULK_READ_MAX_STATES: int = Field(10000, ge=1, alias="BULK_READ_MAX_STATES")
+    BULK_READ_MAX_BUFFER_SIZE: int = Field(
+        256 * 1024 * 1024, ge=1, alias="BULK_READ_MAX_BUFFER_SIZE"
+    )
+    CACHE_TYPE: CacheType = Field(CacheType.NONE, alias="CACHE_TYPE")
+    CACHE_REDIS_URL: str = Field("redis://localhost:6379/0", alias="CACHE_REDIS_URL")
+    CACHE_REDIS_TIMEOUT: float = Field(0.5, alias="CACHE_REDIS_TIMEOUT")
+    CACHE_KEY_PREFIX: str = Field("opentofu-state", alias="CACHE_KEY_PREFIX")
+    CACHE_TTL: int = Field(300, ge=1, alias="CACHE_TTL")
+    CACHE_MAX_BLOB_SIZE: int = Field(1024 * 1024, ge=0, alias="CACHE_MAX_BLOB_SIZE")
+    READINESS_CACHE_TTL: float = Field(5.0, gt=0, alias="READINESS_CACHE_TTL")
+    READINESS_PROBE_TIMEOUT: float = Field(2.0, gt=0, alias="READINESS_PROBE_TIMEOUT")
+    LOCK_BACKEND: LockBackend = Field(LockBackend.ROW, alias="LOCK_BACKEND")
+    LOCK_TTL: int = Field(0, ge=0, alias="LOCK_TTL")
+    LOCK_REAPER_INTERVAL: float = Field(60.0, gt=0, alias="LOCK_REAPER_INTERVAL")
+    LOCK_REAPER_BATCH_SIZE: int = Field(500, ge=1, alias="LOCK_REAPER_BATCH_SIZE")
+    LOCK_WAIT_MAX_TIMEOUT: float = Field(60.0, ge=0, alias="LOCK_WAIT_MAX_TIMEOUT")
+    LOCK_WAIT_POLL_INTERVAL: float = Field(5.0, gt=0, alias="LOCK_WAIT_POLL_INTERVAL")
+    TRACING_ENABLED: bool = Field(False, alias="TRACING_ENABLED")
+    TRACING_EXPORTER: TracingExporter = Field(TracingExporter.OTLP, alias="TRACING_EXPORTER")
+    TRACING_OTLP_ENDPOINT: str = Field(
+        "http://localhost:4318/v1/traces", alias="TRACING_OTLP_ENDPOINT"
+    )
+    TRACING_FILE_PATH: str = Field("traces.jsonl", alias="TRACING_FILE_PATH")
 
     @property
     def DATABASE_URL(self) -> str:
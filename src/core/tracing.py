@@ -0,0 +1,175 @@
+import logging
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    Optional,
+    Sequence,
+)
+
+from starlette.types import (
+    ASGIApp,
+    Message,
+    Receive,
+    Scope,
+    Send,
+)
+
+from src.core.settings import Settings, TracingExporter
+
+try:
+    from opentelemetry import propagate
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import (
+        ReadableSpan,
+        Tracer,
+        TracerProvider,
+    )
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,
+        SimpleSpanProcessor,
+        SpanExporter,
+        SpanExportResult,
+    )
+    from opentelemetry.trace import (
+        SpanKind,
+        Status,
+        StatusCode,
+    )
+except ImportError:  # pragma: no cover - optional dependency
+    TracerProvider = None  # type: ignore[assignment,misc]
+    SpanExporter = object  # type: ignore[assignment,misc]
+
+logger = logging.getLogger(__name__)
+
+_tracer_provider: Optional["TracerProvider"] = None
+_tracer: Optional["Tracer"] = None
+
+
+class FileSpanExporter(SpanExporter):  # type: ignore[misc,valid-type]
+    """Append finished spans to a file as JSON lines, for tests and local debugging."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: Sequence["ReadableSpan"]) -> "SpanExportResult":
+        with open(self.path, "a", encoding="utf-8") as trace_file:
+            for span in spans:
+                trace_file.write(span.to_json(indent=None) + "\n")
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        pass
+
+
+def setup_tracing(settings: Settings) -> None:
+    global _tracer_provider, _tracer
+
+    shutdown_tracing()
+    if not settings.TRACING_ENABLED:
+        return
+
+    if TracerProvider is None:
+        raise ValueError("Tracing requires the 'opentelemetry-sdk' package (the 'tracing' extra)")
+
+    match settings.TRACING_EXPORTER:
+        case TracingExporter.FILE:
+            processor: Any = SimpleSpanProcessor(FileSpanExporter(settings.TRACING_FILE_PATH))
+        case _:
+            try:
+                from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+                    OTLPSpanExporter,
+                )
+            except ImportError:
+                raise ValueError(
+                    "OTLP tracing requires the 'opentelemetry-exporter-otlp-proto-http' package "
+                    "(the 'tracing' extra)"
+                )
+            processor = BatchSpanProcessor(
+                OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT)
+            )
+
+    resource = Resource.create(
+        {"service.name": settings.APP_NAME, "service.version": settings.APP_VERSION}
+    )
+    # The provider is kept here rather than installed globally so it can be replaced.
+    _tracer_provider = TracerProvider(resource=resource)
+    _tracer_provider.add_span_processor(processor)
+    _tracer = _tracer_provider.get_tracer(__name__, settings.APP_VERSION)
+    logger.info(f"Tracing enabled with {settings.TRACING_EXPORTER.value} exporter")
+
+
+def shutdown_tracing() -> None:
+    global _tracer_provider, _tracer
+
+    if _tracer_provider is not None:
+        _tracer_provider.shutdown()
+    _tracer_provider = None
+    _tracer = None
+
+
+def _span_attributes(fields: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        name: value if isinstance(value, (str, bool, int, float)) else str(value)
+        for name, value in fields.items()
+        if value is not None
+    }
+
+
+@contextmanager
+def trace_span(name: str, **fields: Any) -> Iterator[Dict[str, Any]]:
+    """Record a span around the block; fields added to the yielded dict become attributes.
+
+    Without a configured tracer this only yields the dict.
+    """
+    span_fields: Dict[str, Any] = dict(fields)
+    if _tracer is None:
+        yield span_fields
+        return
+
+    with _tracer.start_as_current_span(name) as span:
+        try:
+            yield span_fields
+        finally:
+            span.set_attributes(_span_attributes(span_fields))
+
+
+class TracingMiddleware:
+    """Start a server span per HTTP request, continuing any incoming W3C trace context."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or _tracer is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = {
+            key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]
+        }
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        with _tracer.start_as_current_span(
+            scope["method"],
+            context=propagate.extract(headers),
+            kind=SpanKind.SERVER,
+            attributes={"http.request.method": scope["method"], "url.path": scope["path"]},
+        ) as span:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    span.update_name(f"{scope['method']} {route}")
+                    span.set_attribute("http.route", route)
+                span.set_attribute("http.response.status_code", status_code)
+                if status_code >= 500:
+                    span.set_status(Status(StatusCode.ERROR))
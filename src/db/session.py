@@ -1,31 +1,105 @@
-from typing import AsyncGenerator
+import logging
+from typing import (
+    Any,
+    AsyncGenerator,
+    Dict,
+    Optional,
+    Tuple,
+)
 
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
 
+from src.core.metrics import CallbackGauge
 from src.core.settings import get_settings
 
+logger = logging.getLogger(__name__)
+
+_engine: Optional[AsyncEngine] = None
+_session_factory: Optional[async_sessionmaker[AsyncSession]] = None
+
 
-def get_engine():
+def create_engine() -> AsyncEngine:
     settings = get_settings()
     return create_async_engine(
         settings.DATABASE_URL,
         echo=settings.DB_ECHO,
         pool_pre_ping=True,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
     )
 
 
-def get_session_factory():
-    return async_sessionmaker(
-        bind=get_engine(),
-        class_=AsyncSession,
-        expire_on_commit=False,
-        autocommit=False,
-        autoflush=False,
-    )
+def init_engine() -> AsyncEngine:
+    global _engine, _session_factory
+
+    if _engine is None:
+        _engine = create_engine()
+        _session_factory = async_sessionmaker(
+            bind=_engine,
+            class_=AsyncSession,
+            expire_on_commit=False,
+            autocommit=False,
+            autoflush=False,
+        )
+        logger.info(f"Database engine initialized with pool size: {_engine.pool.size()}")
+
+    return _engine
+
+
+async def dispose_engine() -> None:
+    global _engine, _session_factory
+
+    if _engine is not None:
+        await _engine.dispose()
+        logger.info("Database engine disposed")
+
+    _engine = None
+    _session_factory = None
+
+
+def get_engine() -> AsyncEngine:
+    return init_engine()
+
+
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    init_engine()
+    assert _session_factory is not None
+    return _session_factory
+
+
+def get_pool_status() -> Dict[str, Any]:
+    if _engine is None:
+        return {"initialized": False}
+
+    pool: Any = _engine.pool
+    return {
+        "initialized": True,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
+
+
+def _pool_connections() -> Dict[Tuple[str, ...], float]:
+    pool_status = get_pool_status()
+    pool_status.pop("initialized")
+    return {(state,): value for state, value in pool_status.items()}
+
+
+DB_POOL_CONNECTIONS = CallbackGauge(
+    "db_pool_connections",
+    "Database connection pool usage by state",
+    ["state"],
+    _pool_connections,
+)
 
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
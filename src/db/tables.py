@@ -2,9 +2,14 @@ from datetime import datetime
 from typing import Optional
 
 from sqlalchemy import (
+    BigInteger,
     DateTime,
     ForeignKey,
+    Index,
+    Integer,
     String,
+    Text,
+    text,
 )
 from sqlalchemy.orm import (
     DeclarativeBase,
@@ -19,6 +24,13 @@ class Base(DeclarativeBase):
 
 class State(Base):
     __tablename__ = "states"
+    __table_args__ = (
+        Index(
+            "ix_states_locked_at",
+            "locked_at",
+            postgresql_where=text("lock_id IS NOT NULL"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
@@ -29,14 +41,65 @@ class State(Base):
     locked_by: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     locked_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     lock_id: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    latest_version_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey(
+            "state_versions.id",
+            name="fk_states_latest_version_id",
+            ondelete="SET NULL",
+            use_alter=True,
+        ),
+        nullable=True,
+    )
 
 
 class StateVersion(Base):
     __tablename__ = "state_versions"
+    __table_args__ = (
+        Index(
+            "ix_state_versions_state_id_created_at",
+            "state_id",
+            "created_at",
+            "id",
+            # Covers every other column, so version listings are index-only scans.
+            postgresql_include=[
+                "state_hash",
+                "storage_path",
+                "operation_id",
+                "codec",
+                "base_version_id",
+            ],
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     state_hash: Mapped[str] = mapped_column(String(64), nullable=False)
     storage_path: Mapped[str] = mapped_column(String(255), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
     operation_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    codec: Mapped[str] = mapped_column(String(16), nullable=False, default="identity")
+    base_version_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("state_versions.id"), nullable=True
+    )
     state_id: Mapped[Optional[int]] = mapped_column(ForeignKey("states.id"))
+
+
+class StateBlob(Base):
+    __tablename__ = "state_blobs"
+
+    state_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    storage_path: Mapped[str] = mapped_column(String(255), nullable=False)
+    size: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    codec: Mapped[str] = mapped_column(String(16), nullable=False, default="identity")
+    ref_count: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+
+class StateLock(Base):
+    __tablename__ = "state_locks"
+
+    name: Mapped[str] = mapped_column(String(255), primary_key=True)
+    lock_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    locked_by: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    operation: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    info: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    locked_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
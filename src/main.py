@@ -7,7 +7,23 @@ from fastapi.middleware.trustedhost import TrustedHostMiddleware
 
 from src.controllers import health, opentofu
 from src.core.logging import setup_logging
+from src.core.metrics import MetricsMiddleware
 from src.core.settings import get_settings
+from src.core.tracing import (
+    TracingMiddleware,
+    setup_tracing,
+    shutdown_tracing,
+)
+from src.db.session import dispose_engine, init_engine
+from src.repos.cache import close_cache_repository, init_cache_repository
+from src.repos.storage import close_storage_repository, init_storage_repository
+from src.services.locks import (
+    start_lock_reaper,
+    start_lock_release_listener,
+    stop_lock_reaper,
+    stop_lock_release_listener,
+)
+from src.services.readiness import start_readiness_checks, stop_readiness_checks
 
 logger = logging.getLogger(__name__)
 
@@ -21,7 +37,21 @@ async def lifespan(app: FastAPI):
     logger.debug(
         f"App configuration: title='{app.title}', docs_url='{app.docs_url}', environment='{settings.ENVIRONMENT.value}'"
     )
+    setup_tracing(settings)
+    init_engine()
+    await init_storage_repository()
+    await init_cache_repository()
+    start_readiness_checks()
+    start_lock_reaper()
+    start_lock_release_listener()
     yield
+    await stop_lock_release_listener()
+    await stop_lock_reaper()
+    await stop_readiness_checks()
+    await close_cache_repository()
+    await close_storage_repository()
+    await dispose_engine()
+    shutdown_tracing()
     logger.info(f"Shutdown {settings.APP_NAME} v{settings.APP_VERSION}")
 
 
@@ -43,6 +73,8 @@ def init_fastapi_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    app.add_middleware(MetricsMiddleware)
+    app.add_middleware(TracingMiddleware)
     logger.debug(f"Configuring TrustedHost middleware with hosts: {settings.ALLOWED_HOSTS}")
     app.add_middleware(TrustedHostMiddleware, allowed_hosts=settings.ALLOWED_HOSTS)
 
@@ -0,0 +1,9 @@
+from .base import BaseCacheRepository
+from .factory import (
+    close_cache_repository,
+    create_cache_repository,
+    get_shared_cache_repository,
+    init_cache_repository,
+)
+from .memory_repos import MemoryCacheRepository
+from .redis_repos import RedisCacheRepository
@@ -0,0 +1,34 @@
+from abc import ABC, abstractmethod
+from typing import (
+    List,
+    Optional,
+    Sequence,
+)
+
+
+class BaseCacheRepository(ABC):
+
+    async def connect(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    @abstractmethod
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: Optional[int] = None) -> None:
+        pass
+
+    @abstractmethod
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[int] = None) -> int:
+        pass
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        pass
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return (await self.get_many([key]))[0]
@@ -0,0 +1,69 @@
+import logging
+from typing import Optional
+
+from src.core.settings import CacheType, get_settings
+from src.repos.cache.base import BaseCacheRepository
+from src.repos.cache.memory_repos import MemoryCacheRepository
+from src.repos.cache.redis_repos import RedisCacheRepository
+
+logger = logging.getLogger(__name__)
+
+
+def create_cache_repository(
+    cache_type: Optional[CacheType] = None,
+) -> Optional[BaseCacheRepository]:
+
+    REPOSITORIES = {
+        CacheType.MEMORY: MemoryCacheRepository,
+        CacheType.REDIS: RedisCacheRepository,
+    }
+
+    settings = get_settings()
+    cache_type = cache_type or settings.CACHE_TYPE
+
+    if cache_type == CacheType.NONE:
+        return None
+
+    repository_class = REPOSITORIES.get(cache_type)
+
+    if repository_class is None:
+        logger.error(f"Unsupported cache type: {cache_type}")
+        raise ValueError(f"Unsupported cache type: {cache_type}")
+
+    return repository_class()
+
+
+_cache_repository: Optional[BaseCacheRepository] = None
+_cache_repository_created = False
+
+
+def get_shared_cache_repository() -> Optional[BaseCacheRepository]:
+    global _cache_repository, _cache_repository_created
+
+    if not _cache_repository_created:
+        _cache_repository = create_cache_repository()
+        _cache_repository_created = True
+
+    return _cache_repository
+
+
+async def init_cache_repository() -> Optional[BaseCacheRepository]:
+    cache_repo = get_shared_cache_repository()
+    if cache_repo is None:
+        return None
+
+    try:
+        await cache_repo.connect()
+    except Exception as exc:
+        logger.warning(f"Cache backend could not be reached on startup: {exc}")
+    return cache_repo
+
+
+async def close_cache_repository() -> None:
+    global _cache_repository, _cache_repository_created
+
+    if _cache_repository is not None:
+        await _cache_repository.close()
+
+    _cache_repository = None
+    _cache_repository_created = False
@@ -0,0 +1,48 @@
+import time
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from src.repos.cache.base import BaseCacheRepository
+
+
+class MemoryCacheRepository(BaseCacheRepository):
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, Tuple[bytes, Optional[float]]] = {}
+
+    def _get_entry(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+
+        return value
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        return [self._get_entry(key) for key in keys]
+
+    async def set(self, key: str, value: bytes, ttl: Optional[int] = None) -> None:
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._entries[key] = (value, expires_at)
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[int] = None) -> int:
+        value = int(self._get_entry(key) or 0) + amount
+        entry = self._entries.get(key)
+        if ttl:
+            expires_at: Optional[float] = time.monotonic() + ttl
+        else:
+            expires_at = entry[1] if entry else None
+        self._entries[key] = (str(value).encode(), expires_at)
+        return value
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
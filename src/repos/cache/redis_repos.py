@@ -0,0 +1,62 @@
+import logging
+from typing import (
+    Any,
+    List,
+    Optional,
+    Sequence,
+)
+
+from src.core.settings import get_settings
+from src.repos.cache.base import BaseCacheRepository
+
+try:
+    from redis import asyncio as redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class RedisCacheRepository(BaseCacheRepository):
+
+    def __init__(self, client: Optional[Any] = None):
+        if client is None and redis is None:
+            raise ValueError("Redis cache requires the 'redis' package (the 'redis' extra)")
+
+        self.settings = get_settings()
+        self._client = client
+
+    def _get_client(self) -> Any:
+        if self._client is None:
+            self._client = redis.Redis.from_url(
+                self.settings.CACHE_REDIS_URL,
+                socket_timeout=self.settings.CACHE_REDIS_TIMEOUT,
+                socket_connect_timeout=self.settings.CACHE_REDIS_TIMEOUT,
+            )
+            logger.info("Redis cache client created")
+        return self._client
+
+    async def connect(self) -> None:
+        await self._get_client().ping()
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        return await self._get_client().mget(keys)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[int] = None) -> None:
+        await self._get_client().set(key, value, ex=ttl)
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[int] = None) -> int:
+        if ttl is None:
+            return await self._get_client().incrby(key, amount)
+
+        async with self._get_client().pipeline(transaction=True) as pipeline:
+            value, _ = await pipeline.incrby(key, amount).expire(key, ttl).execute()
+        return value
+
+    async def delete(self, key: str) -> None:
+        await self._get_client().delete(key)
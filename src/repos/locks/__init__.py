@@ -0,0 +1,4 @@
+from .advisory_repos import AdvisoryLockRepository
+from .base import LOCK_RELEASED_CHANNEL, BaseLockRepository
+from .factory import create_lock_repository
+from .row_repos import RowLockRepository
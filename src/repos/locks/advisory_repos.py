@@ -0,0 +1,142 @@
+from typing import List, Optional
+
+from sqlalchemy import (
+    delete,
+    false,
+    func,
+    literal,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert
+
+from src.controllers.schema import LockRequestSchema
+from src.core.metrics import DB_QUERY_DURATION, observe_duration
+from src.core.tracing import trace_span
+from src.db.tables import StateLock
+from src.repos.locks.base import (
+    BaseLockRepository,
+    lease_cutoff,
+    lease_now,
+    lock_started_at,
+)
+
+# Seed for hashtextextended, so state names map to their own range of advisory lock keys.
+ADVISORY_LOCK_SEED = 0x6F74
+
+
+class AdvisoryLockRepository(BaseLockRepository):
+    """Keeps locks in ``state_locks``, leaving the ``states`` rows untouched.
+
+    Acquisition takes a transaction-scoped advisory lock on a hash of the state name, so
+    concurrent LOCK requests for one state fail fast instead of queueing on row locks. The
+    holder is recorded in ``state_locks`` because session advisory locks would pin a pooled
+    connection for the whole plan or apply.
+    """
+
+    @observe_duration(DB_QUERY_DURATION)
+    async def lock(self, name: str, lock_data: LockRequestSchema, lease_ttl: int = 0) -> bool:
+        advisory_key = func.hashtextextended(name, ADVISORY_LOCK_SEED)
+        values = select(
+            literal(name),
+            literal(lock_data.Id),
+            literal(lock_data.who),
+            literal(lock_data.operation),
+            literal(lock_data.info),
+            lock_started_at(lock_data, lease_ttl),
+        ).where(func.pg_try_advisory_xact_lock(advisory_key))
+
+        query = insert(StateLock).from_select(
+            ["name", "lock_id", "locked_by", "operation", "info", "locked_at"], values
+        )
+        query = query.on_conflict_do_update(
+            index_elements=[StateLock.name],
+            set_={
+                "lock_id": query.excluded.lock_id,
+                "locked_by": query.excluded.locked_by,
+                "operation": query.excluded.operation,
+                "info": query.excluded.info,
+                "locked_at": query.excluded.locked_at,
+            },
+            where=StateLock.locked_at < lease_cutoff(lease_ttl) if lease_ttl else false(),
+        ).returning(StateLock.name)
+
+        result = await self.session.execute(query)
+        locked_name = result.scalar_one_or_none()
+        with trace_span("db.commit"):
+            await self.session.commit()
+
+        return locked_name is not None
+
+    @observe_duration(DB_QUERY_DURATION)
+    async def renew_lock(self, name: str, lock_id: str) -> Optional[bool]:
+        query = (
+            update(StateLock)
+            .where(StateLock.name == name, StateLock.lock_id == lock_id)
+            .values(locked_at=lease_now())
+            .returning(StateLock.name)
+        )
+
+        result = await self.session.execute(query)
+        renewed = result.scalar_one_or_none()
+        with trace_span("db.commit"):
+            await self.session.commit()
+
+        if renewed is not None:
+            return True
+
+        return await self._lock_exists(name)
+
+    @observe_duration(DB_QUERY_DURATION)
+    async def unlock(self, name: str, lock_id: str) -> Optional[bool]:
+        query = (
+            delete(StateLock)
+            .where(StateLock.name == name, StateLock.lock_id == lock_id)
+            .returning(StateLock.name)
+        )
+
+        result = await self.session.execute(query)
+        unlocked = result.scalar_one_or_none()
+        if unlocked is not None:
+            await self._notify_lock_released([name])
+        with trace_span("db.commit"):
+            await self.session.commit()
+
+        if unlocked is not None:
+            return True
+
+        return await self._lock_exists(name)
+
+    @observe_duration(DB_QUERY_DURATION)
+    async def release_expired_locks(self, lease_ttl: int, batch_size: int) -> List[str]:
+        expired = (
+            select(StateLock.name)
+            .where(StateLock.locked_at < lease_cutoff(lease_ttl))
+            .order_by(StateLock.locked_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        query = (
+            delete(StateLock)
+            .where(StateLock.name.in_(expired))
+            .returning(StateLock.name)
+            .execution_options(synchronize_session=False)
+        )
+
+        result = await self.session.execute(query)
+        names = list(result.scalars())
+        if names:
+            await self._notify_lock_released(names)
+        with trace_span("db.commit"):
+            await self.session.commit()
+
+        return names
+
+    async def _lock_exists(self, name: str) -> Optional[bool]:
+        # Without a lock row there is nothing to release or renew for this state.
+        result = await self.session.execute(select(StateLock.name).where(StateLock.name == name))
+        if result.scalar_one_or_none() is None:
+            return None
+
+        return False
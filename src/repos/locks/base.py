@@ -0,0 +1,67 @@
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import (
+    DateTime,
+    String,
+    cast,
+    func,
+    literal,
+    select,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+
+from src.controllers.schema import LockRequestSchema
+
+# Postgres NOTIFY channel carrying the names of states whose lock was released.
+LOCK_RELEASED_CHANNEL = "state_lock_released"
+
+
+def lease_now() -> ColumnElement[datetime]:
+    # Leases are timed by the database clock in UTC, so clock skew between app hosts and
+    # DST changes cannot shorten or stretch them.
+    return func.timezone("UTC", func.now())
+
+
+def lease_cutoff(lease_ttl: int) -> ColumnElement[datetime]:
+    return lease_now() - timedelta(seconds=lease_ttl)
+
+
+def lock_started_at(lock_data: LockRequestSchema, lease_ttl: int) -> ColumnElement[datetime]:
+    # Without leases the lock keeps the client's Created time, as OpenTofu reported it.
+    if lease_ttl:
+        return lease_now()
+    return literal(lock_data.created.replace(tzinfo=None), DateTime)
+
+
+class BaseLockRepository(ABC):
+    """Stores OpenTofu state locks. ``lease_ttl`` of 0 means locks never expire."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @abstractmethod
+    async def lock(self, name: str, lock_data: LockRequestSchema, lease_ttl: int = 0) -> bool:
+        pass
+
+    @abstractmethod
+    async def renew_lock(self, name: str, lock_id: str) -> Optional[bool]:
+        pass
+
+    @abstractmethod
+    async def unlock(self, name: str, lock_id: str) -> Optional[bool]:
+        pass
+
+    @abstractmethod
+    async def release_expired_locks(self, lease_ttl: int, batch_size: int) -> List[str]:
+        pass
+
+    async def _notify_lock_released(self, names: List[str]) -> None:
+        # Delivered to listeners on commit, so waiters never see the lock still held.
+        released = func.unnest(cast(names, ARRAY(String))).table_valued("name")
+        await self.session.execute(
+            select(func.pg_notify(LOCK_RELEASED_CHANNEL, released.c.name)).select_from(released)
+        )
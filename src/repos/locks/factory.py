@@ -0,0 +1,32 @@
+import logging
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.settings import LockBackend, get_settings
+from src.repos.locks.advisory_repos import AdvisoryLockRepository
+from src.repos.locks.base import BaseLockRepository
+from src.repos.locks.row_repos import RowLockRepository
+
+logger = logging.getLogger(__name__)
+
+
+def create_lock_repository(
+    session: AsyncSession, lock_backend: Optional[LockBackend] = None
+) -> BaseLockRepository:
+
+    REPOSITORIES = {
+        LockBackend.ROW: RowLockRepository,
+        LockBackend.ADVISORY: AdvisoryLockRepository,
+    }
+
+    settings = get_settings()
+    lock_backend = lock_backend or settings.LOCK_BACKEND
+
+    repository_class = REPOSITORIES.get(lock_backend)
+
+    if repository_class is None:
+        logger.error(f"Unsupported lock backend: {lock_backend}")
+        raise ValueError(f"Unsupported lock backend: {lock_backend}")
+
+    return repository_class(session)
@@ -0,0 +1,128 @@
+from typing import List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from src.controllers.schema import LockRequestSchema
+from src.core.metrics import DB_QUERY_DURATION, observe_duration
+from src.core.tracing import trace_span
+from src.db.tables import State
+from src.repos.locks.base import (
+    BaseLockRepository,
+    lease_cutoff,
+    lease_now,
+    lock_started_at,
+)
+from src.repos.state.schema import StateUpdateSchema
+
+
+class RowLockRepository(BaseLockRepository):
+    """Keeps the lock in the lock columns of the state's ``states`` row."""
+
+    @observe_duration(DB_QUERY_DURATION)
+    async def lock(self, name: str, lock_data: LockRequestSchema, lease_ttl: int = 0) -> bool:
+        lock_free = State.lock_id.is_(None)
+        if lease_ttl:
+            lock_free = lock_free | (State.locked_at < lease_cutoff(lease_ttl))
+
+        query = insert(State).values(
+            name=name,
+            locked_by=lock_data.who,
+            locked_at=lock_started_at(lock_data, lease_ttl),
+            lock_id=lock_data.Id,
+        )
+        query = query.on_conflict_do_update(
+            index_elements=[State.name],
+            set_={
+                "locked_by": query.excluded.locked_by,
+                "locked_at": query.excluded.locked_at,
+                "lock_id": query.excluded.lock_id,
+            },
+            where=lock_free,
+        ).returning(State)
+
+        result = await self.session.execute(query, execution_options={"populate_existing": True})
+        state = result.scalar_one_or_none()
+        with trace_span("db.commit"):
+            await self.session.commit()
+
+        return state is not None
+
+    @observe_duration(DB_QUERY_DURATION)
+    async def renew_lock(self, name: str, lock_id: str) -> Optional[bool]:
+        query = (
+            update(State)
+            .where(State.name == name, State.lock_id == lock_id)
+            .values(locked_at=lease_now())
+            .returning(State.id)
+        )
+
+        result = await self.session.execute(query)
+        state_id = result.scalar_one_or_none()
+        with trace_span("db.commit"):
+            await self.session.commit()
+
+        if state_id is not None:
+            return True
+
+        return await self._state_exists(name)
+
+    @observe_duration(DB_QUERY_DURATION)
+    async def unlock(self, name: str, lock_id: str) -> Optional[bool]:
+        update_data = StateUpdateSchema(
+            locked_by=None,
+            locked_at=None,
+            lock_id=None,
+        )
+        query = (
+            update(State)
+            .where(State.name == name, State.lock_id == lock_id)
+            .values(**update_data.model_dump())
+            .returning(State.id)
+        )
+
+        result = await self.session.execute(query)
+        state_id = result.scalar_one_or_none()
+        if state_id is not None:
+            await self._notify_lock_released([name])
+        with trace_span("db.commit"):
+            await self.session.commit()
+
+        if state_id is not None:
+            return True
+
+        return await self._state_exists(name)
+
+    @observe_duration(DB_QUERY_DURATION)
+    async def release_expired_locks(self, lease_ttl: int, batch_size: int) -> List[str]:
+        expired = (
+            select(State.id)
+            .where(State.lock_id.is_not(None), State.locked_at < lease_cutoff(lease_ttl))
+            .order_by(State.locked_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        query = (
+            update(State)
+            .where(State.id.in_(expired))
+            .values(locked_by=None, locked_at=None, lock_id=None)
+            .returning(State.name)
+            .execution_options(synchronize_session=False)
+        )
+
+        result = await self.session.execute(query)
+        names = list(result.scalars())
+        if names:
+            await self._notify_lock_released(names)
+        with trace_span("db.commit"):
+            await self.session.commit()
+
+        return names
+
+    async def _state_exists(self, name: str) -> Optional[bool]:
+        result = await self.session.execute(select(State.id).where(State.name == name))
+        if result.scalar_one_or_none() is None:
+            return None
+
+        return False
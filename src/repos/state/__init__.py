@@ -1 +1,5 @@
-from .state_repos import StateRepository, StateVersionRepository
+from .state_repos import (
+    StateBlobRepository,
+    StateRepository,
+    StateVersionRepository,
+)
@@ -21,6 +21,7 @@ class StateSchema(StateBaseSchema):
     locked_by: Optional[str] = None
     locked_at: Optional[datetime] = None
     lock_id: Optional[str] = None
+    latest_version_id: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -31,6 +32,8 @@ class StateVersionCreateSchema(BaseModel):
     storage_path: str
     operation_id: str
     state_id: int
+    codec: str = "identity"
+    base_version_id: Optional[int] = None
 
 
 class StateVersionSchema(BaseModel):
@@ -40,6 +43,26 @@ class StateVersionSchema(BaseModel):
     created_at: datetime
     operation_id: str
     state_id: int
+    codec: str = "identity"
+    base_version_id: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+
+class LatestStateVersionSchema(BaseModel):
+    version: StateVersionSchema
+    base_version: Optional[StateVersionSchema] = None
+    size: Optional[int] = None
+
+
+class StateBlobSchema(BaseModel):
+    state_hash: str
+    storage_path: str
+    size: Optional[int] = None
+    codec: str = "identity"
+    ref_count: int
+    created_at: datetime
 
     class Config:
         from_attributes = True
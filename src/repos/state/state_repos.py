@@ -1,16 +1,42 @@
 import logging
 from datetime import datetime
-from typing import List, Optional
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
-from sqlalchemy import select
+from sqlalchemy import (
+    BigInteger,
+    Integer,
+    String,
+    any_,
+    cast,
+    func,
+    literal,
+    select,
+    true,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.ext.asyncio import AsyncSession
-
-from src.controllers.schema import LockRequestSchema
-from src.db.tables import State, StateVersion
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql.selectable import ScalarSelect
+
+from src.core.metrics import DB_QUERY_DURATION, observe_duration
+from src.core.tracing import trace_span
+from src.db.tables import (
+    State,
+    StateBlob,
+    StateVersion,
+)
 from src.repos.state.schema import (
+    LatestStateVersionSchema,
+    StateBlobSchema,
     StateSchema,
-    StateUpdateSchema,
-    StateVersionCreateSchema,
     StateVersionSchema,
 )
 
@@ -22,62 +48,13 @@ class StateRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
+    @observe_duration(DB_QUERY_DURATION)
     async def get_by_name(self, name: str) -> Optional[State]:
         query = select(State).where(State.name == name)
         result = await self.session.execute(query)
         return result.scalar_one_or_none()
 
-    async def lock(self, name: str, lock_data: LockRequestSchema) -> bool:
-        state = await self.get_by_name(name)
-
-        if not state:
-            state = State(
-                name=name,
-                locked_by=lock_data.who,
-                locked_at=lock_data.created.replace(tzinfo=None),
-                lock_id=lock_data.Id,
-            )
-            self.session.add(state)
-            await self.session.commit()
-            return True
-
-        if state.locked_by:
-            return False
-
-        # Lock the state
-        update_data = StateUpdateSchema(
-            locked_by=lock_data.who,
-            locked_at=lock_data.created.replace(tzinfo=None),
-            lock_id=lock_data.Id,
-        )
-        state.locked_by = update_data.locked_by
-        state.locked_at = update_data.locked_at
-        state.lock_id = update_data.lock_id
-        await self.session.commit()
-
-        return True
-
-    async def unlock(self, name: str, lock_id: str) -> Optional[bool]:
-        state = await self.get_by_name(name)
-
-        if not state:
-            return None
-
-        if state.lock_id != lock_id:
-            return False
-
-        update_data = StateUpdateSchema(
-            locked_by=None,
-            locked_at=None,
-            lock_id=None,
-        )
-        state.locked_by = update_data.locked_by
-        state.locked_at = update_data.locked_at
-        state.lock_id = update_data.lock_id
-        await self.session.commit()
-
-        return True
-
+    @observe_duration(DB_QUERY_DURATION)
     async def save_state(self, name: str) -> StateSchema:
         state = await self.get_by_name(name)
 
@@ -87,8 +64,10 @@ class StateRepository:
             state = State(name=name)
             self.session.add(state)
 
-        await self.session.commit()
-        await self.session.refresh(state)
+        with trace_span("db.commit"):
+            await self.session.commit()
+        with trace_span("db.refresh"):
+            await self.session.refresh(state)
 
         return StateSchema.model_validate(state)
 
@@ -97,40 +76,235 @@ class StateVersionRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
+    @observe_duration(DB_QUERY_DURATION)
     async def create_version(
-        self, state_hash: str, storage_path: str, operation_id: str, state_id: int
-    ) -> StateVersionSchema:
-        state_version_data = StateVersionCreateSchema(
-            state_hash=state_hash,
-            storage_path=storage_path,
-            operation_id=operation_id,
-            state_id=state_id,
+        self,
+        name: str,
+        state_hash: str,
+        storage_path: str,
+        operation_id: str,
+        codec: str = "identity",
+        size: Optional[int] = None,
+        base_version_id: Optional[int] = None,
+        expected_latest_version_id: Optional[int] = None,
+    ) -> Optional[StateVersionSchema]:
+        """Create the state if needed, record a version and make it the latest in one statement.
+
+        Full versions also take a reference on the blob for ``state_hash`` and use the storage
+        path and codec of an already stored blob. Returns None, writing nothing, when
+        ``expected_latest_version_id`` is given and no longer the latest version.
+        """
+        now = datetime.now()
+
+        # The version id is drawn up front so the states row is written once, by the upsert
+        # that also checks the expected latest version while holding the row lock.
+        next_version = select(
+            func.nextval(func.pg_get_serial_sequence(StateVersion.__tablename__, "id")).label("id")
+        ).cte("next_version")
+        state_query = insert(State).values(
+            name=name,
+            created_at=now,
+            updated_at=now,
+            latest_version_id=select(next_version.c.id).scalar_subquery(),
+        )
+        state_cte = (
+            state_query.on_conflict_do_update(
+                index_elements=[State.name],
+                set_={
+                    "latest_version_id": state_query.excluded.latest_version_id,
+                    "updated_at": now,
+                },
+                where=(
+                    State.latest_version_id == expected_latest_version_id
+                    if expected_latest_version_id is not None
+                    else None
+                ),
+            )
+            .returning(State.id, State.latest_version_id)
+            .cte("saved_state")
+        )
+
+        version_source: Any = state_cte
+        path_value: Any = literal(storage_path)
+        codec_value: Any = literal(codec)
+        if base_version_id is None:
+            blob_query = insert(StateBlob).from_select(
+                ["state_hash", "storage_path", "size", "codec", "ref_count", "created_at"],
+                select(
+                    literal(state_hash),
+                    literal(storage_path),
+                    literal(size, BigInteger),
+                    literal(codec),
+                    literal(1),
+                    literal(now),
+                ).select_from(state_cte),
+            )
+            blob_cte = (
+                blob_query.on_conflict_do_update(
+                    index_elements=[StateBlob.state_hash],
+                    set_={"ref_count": StateBlob.ref_count + 1},
+                )
+                .returning(StateBlob.storage_path, StateBlob.codec)
+                .cte("blob")
+            )
+            version_source = state_cte.join(blob_cte, true())
+            path_value, codec_value = blob_cte.c.storage_path, blob_cte.c.codec
+
+        version_values = select(
+            state_cte.c.latest_version_id,
+            literal(state_hash),
+            path_value,
+            literal(now),
+            literal(operation_id),
+            codec_value,
+            literal(base_version_id, Integer),
+            state_cte.c.id,
+        ).select_from(version_source)
+
+        version_cte = (
+            insert(StateVersion)
+            .from_select(
+                [
+                    "id",
+                    "state_hash",
+                    "storage_path",
+                    "created_at",
+                    "operation_id",
+                    "codec",
+                    "base_version_id",
+                    "state_id",
+                ],
+                version_values,
+            )
+            .returning(*StateVersion.__table__.columns)
+            .cte("version")
+        )
+
+        try:
+            result = await self.session.execute(select(version_cte))
+            state_version = result.one_or_none()
+            with trace_span("db.commit"):
+                await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+
+        if state_version is None:
+            return None
+
+        return StateVersionSchema.model_validate(state_version)
+
+    @observe_duration(DB_QUERY_DURATION)
+    async def get_versions_by_state_id(
+        self,
+        state_id: int,
+        limit: Optional[int] = None,
+        before_id: Optional[int] = None,
+        after_id: Optional[int] = None,
+    ) -> List[StateVersionSchema]:
+        position = tuple_(StateVersion.created_at, StateVersion.id)
+        query = select(StateVersion).where(StateVersion.state_id == state_id)
+
+        if before_id is not None:
+            query = query.where(position < self._cursor_position(state_id, before_id))
+        if after_id is not None:
+            query = query.where(position > self._cursor_position(state_id, after_id))
+
+        if after_id is not None and before_id is None:
+            query = query.order_by(StateVersion.created_at.asc(), StateVersion.id.asc())
+        else:
+            query = query.order_by(StateVersion.created_at.desc(), StateVersion.id.desc())
+
+        if limit is not None:
+            query = query.limit(limit)
+
+        result = await self.session.execute(query)
+        versions = list(result.scalars().all())
+        if after_id is not None and before_id is None:
+            versions.reverse()
+
+        return [StateVersionSchema.model_validate(version) for version in versions]
+
+    def _cursor_position(self, state_id: int, version_id: int) -> ScalarSelect[Any]:
+        cursor = aliased(StateVersion)
+        return (
+            select(cursor.created_at, cursor.id)
+            .where(cursor.state_id == state_id, cursor.id == version_id)
+            .scalar_subquery()
         )
 
-        state_version = StateVersion(
-            state_hash=state_version_data.state_hash,
-            storage_path=state_version_data.storage_path,
-            operation_id=state_version_data.operation_id,
-            state_id=state_version_data.state_id,
+    @observe_duration(DB_QUERY_DURATION)
+    async def get_latest_version(self, name: str) -> Optional[StateVersionSchema]:
+        query = (
+            select(StateVersion)
+            .join(State, State.latest_version_id == StateVersion.id)
+            .where(State.name == name)
         )
+        result = await self.session.execute(query)
+        state_version = result.scalar_one_or_none()
 
-        self.session.add(state_version)
-        await self.session.commit()
-        await self.session.refresh(state_version)
+        if not state_version:
+            return None
 
         return StateVersionSchema.model_validate(state_version)
 
-    async def get_versions_by_state_id(self, state_id: int) -> List[StateVersionSchema]:
+    @observe_duration(DB_QUERY_DURATION)
+    async def get_latest_versions(
+        self, names: Sequence[str]
+    ) -> Dict[str, LatestStateVersionSchema]:
+        # Delta versions come with the snapshot they apply to, so they need no further queries.
+        # Their content size is only recorded if it was also stored in full; otherwise the
+        # snapshot's size is the closest estimate.
+        base_version = aliased(StateVersion)
+        version_blob = aliased(StateBlob)
+        base_blob = aliased(StateBlob)
+        query = (
+            select(
+                State.name,
+                StateVersion,
+                base_version,
+                func.coalesce(version_blob.size, base_blob.size),
+            )
+            .join(StateVersion, State.latest_version_id == StateVersion.id)
+            .outerjoin(base_version, base_version.id == StateVersion.base_version_id)
+            .outerjoin(version_blob, version_blob.state_hash == StateVersion.state_hash)
+            .outerjoin(base_blob, base_blob.state_hash == base_version.state_hash)
+            .where(State.name == any_(cast(list(names), ARRAY(String))))
+        )
+        result = await self.session.execute(query)
+
+        return {
+            name: LatestStateVersionSchema(
+                version=StateVersionSchema.model_validate(version),
+                base_version=StateVersionSchema.model_validate(base) if base else None,
+                size=size,
+            )
+            for name, version, base, size in result.all()
+        }
+
+    @observe_duration(DB_QUERY_DURATION)
+    async def get_latest_snapshot(self, name: str) -> Tuple[Optional[StateVersionSchema], int]:
         query = (
             select(StateVersion)
-            .where(StateVersion.state_id == state_id)
-            .order_by(StateVersion.created_at.desc())
+            .join(State, State.id == StateVersion.state_id)
+            .where(State.name == name, StateVersion.base_version_id.is_(None))
+            .order_by(StateVersion.id.desc())
+            .limit(1)
         )
         result = await self.session.execute(query)
-        versions = result.scalars().all()
+        snapshot = result.scalar_one_or_none()
 
-        return [StateVersionSchema.model_validate(version) for version in versions]
+        if not snapshot:
+            return None, 0
 
+        count_query = select(func.count(StateVersion.id)).where(
+            StateVersion.state_id == snapshot.state_id, StateVersion.id > snapshot.id
+        )
+        versions_since = (await self.session.execute(count_query)).scalar_one()
+
+        return StateVersionSchema.model_validate(snapshot), versions_since
+
+    @observe_duration(DB_QUERY_DURATION)
     async def get_version_by_id(
         self, state_id: int, version_id: int
     ) -> Optional[StateVersionSchema]:
@@ -144,3 +318,19 @@ class StateVersionRepository:
             return None
 
         return StateVersionSchema.model_validate(state_version)
+
+
+class StateBlobRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @observe_duration(DB_QUERY_DURATION)
+    async def get_by_hash(self, state_hash: str) -> Optional[StateBlobSchema]:
+        query = select(StateBlob).where(StateBlob.state_hash == state_hash)
+        result = await self.session.execute(query)
+        state_blob = result.scalar_one_or_none()
+
+        if not state_blob:
+            return None
+
+        return StateBlobSchema.model_validate(state_blob)
@@ -1,3 +1,9 @@
-from .base import BaseStorageRepository
-from .factory import create_storage_repository
+from .base import BaseStorageRepository, StorageStream
+from .compression import BaseCodec, get_codec
+from .factory import (
+    close_storage_repository,
+    create_storage_repository,
+    get_shared_storage_repository,
+    init_storage_repository,
+)
 from .minio_repos import MinioStorageRepository
@@ -1,17 +1,56 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+
+@dataclass
+class StorageStream:
+    chunks: AsyncIterator[bytes]
+    content_length: Optional[int] = None
+    content_encoding: Optional[str] = None
+    etag: Optional[str] = None
 
 
 class BaseStorageRepository(ABC):
 
+    async def connect(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def ping(self) -> None:
+        pass
+
     @abstractmethod
     async def get(self, path: str) -> Optional[bytes]:
         pass
 
+    async def get_stream(self, path: str, chunk_size: int) -> Optional[StorageStream]:
+        data = await self.get(path)
+        if data is None:
+            return None
+
+        async def chunks() -> AsyncIterator[bytes]:
+            for start in range(0, len(data), chunk_size):
+                yield data[start : start + chunk_size]
+
+        return StorageStream(chunks=chunks(), content_length=len(data))
+
     @abstractmethod
     async def put(self, path: str, data: bytes) -> None:
         pass
 
+    async def put_stream(self, path: str, chunks: AsyncIterator[bytes]) -> None:
+        data = b"".join([chunk async for chunk in chunks])
+        await self.put(path, data)
+
+    async def copy(self, source_path: str, destination_path: str) -> None:
+        data = await self.get(source_path)
+        if data is None:
+            raise ValueError(f"Storage object not found: {source_path}")
+        await self.put(destination_path, data)
+
     @abstractmethod
     async def delete(self, path: str) -> None:
         pass
@@ -0,0 +1,202 @@
+import logging
+import os
+import zlib
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import (
+    Any,
+    AsyncIterator,
+    Optional,
+)
+
+from src.core.offload import run_offloaded
+from src.core.settings import (
+    CompressionType,
+    Settings,
+    get_settings,
+)
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+
+class BaseCodec(ABC):
+    name: CompressionType
+    # HTTP Content-Encoding that clients can decode themselves, if any.
+    content_encoding: Optional[str] = None
+
+    @property
+    def identifier(self) -> str:
+        """Codec name recorded with stored blobs and passed back to ``get_codec`` to read them."""
+        return self.name.value
+
+    @abstractmethod
+    def compressor(self) -> Any:
+        pass
+
+    @abstractmethod
+    def decompressor(self) -> Any:
+        pass
+
+    def compress(self, data: bytes) -> bytes:
+        compressor = self.compressor()
+        return compressor.compress(data) + compressor.flush()
+
+    def decompress(self, data: bytes) -> bytes:
+        decompressor = self.decompressor()
+        return decompressor.decompress(data) + decompressor.flush()
+
+    async def compress_stream(
+        self, chunks: AsyncIterator[bytes], offload_size: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        """Compress ``chunks``; those of at least ``offload_size`` bytes in the offload pool."""
+        compressor = self.compressor()
+        async for chunk in chunks:
+            if offload_size is not None and len(chunk) >= offload_size:
+                compressed = await run_offloaded(compressor.compress, chunk)
+            else:
+                compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+    async def decompress_stream(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        decompressor = self.decompressor()
+        async for chunk in chunks:
+            decompressed = decompressor.decompress(chunk)
+            if decompressed:
+                yield decompressed
+        remaining = decompressor.flush()
+        if remaining:
+            yield remaining
+
+
+class IdentityCodec(BaseCodec):
+    name = CompressionType.IDENTITY
+
+    def compressor(self) -> Any:
+        return None
+
+    def decompressor(self) -> Any:
+        return None
+
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def decompress(self, data: bytes) -> bytes:
+        return data
+
+    async def compress_stream(
+        self, chunks: AsyncIterator[bytes], offload_size: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        async for chunk in chunks:
+            yield chunk
+
+    async def decompress_stream(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        async for chunk in chunks:
+            yield chunk
+
+
+class GzipCodec(BaseCodec):
+    name = CompressionType.GZIP
+    content_encoding = "gzip"
+
+    def __init__(self, level: int):
+        self.level = level
+
+    def compressor(self) -> Any:
+        return zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def decompressor(self) -> Any:
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+
+class ZstdCodec(BaseCodec):
+    name = CompressionType.ZSTD
+
+    def __init__(self, level: int, dictionary: Any = None):
+        if zstandard is None:
+            raise ValueError(
+                "zstd compression requires the 'zstandard' package (the 'zstd' extra)"
+            )
+
+        self.dictionary_id = dictionary.dict_id() if dictionary is not None else None
+        self._compressor = zstandard.ZstdCompressor(level=level, dict_data=dictionary)
+        self._decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+
+    @property
+    def identifier(self) -> str:
+        # Blobs written with a dictionary can only be read with the same one.
+        if self.dictionary_id is None:
+            return self.name.value
+        return f"{self.name.value}:{self.dictionary_id}"
+
+    def compressor(self) -> Any:
+        return self._compressor.compressobj()
+
+    def decompressor(self) -> Any:
+        return self._decompressor.decompressobj()
+
+
+def _load_zstd_dictionary(path: str) -> Any:
+    with open(path, "rb") as dictionary_file:
+        dictionary = zstandard.ZstdCompressionDict(dictionary_file.read())
+    if not dictionary.dict_id():
+        raise ValueError(f"{path} is not a trained zstd dictionary")
+    return dictionary
+
+
+def _find_zstd_dictionary(settings: Settings, dictionary_id: int) -> Any:
+    paths = []
+    if settings.STORAGE_ZSTD_DICTIONARY_PATH:
+        paths.append(settings.STORAGE_ZSTD_DICTIONARY_PATH)
+    if settings.STORAGE_ZSTD_DICTIONARY_DIR:
+        directory = settings.STORAGE_ZSTD_DICTIONARY_DIR
+        paths.extend(os.path.join(directory, name) for name in sorted(os.listdir(directory)))
+
+    for path in paths:
+        dictionary = _load_zstd_dictionary(path)
+        if dictionary.dict_id() == dictionary_id:
+            return dictionary
+    raise ValueError(f"zstd dictionary {dictionary_id} not found in STORAGE_ZSTD_DICTIONARY_DIR")
+
+
+def _configured_zstd_dictionary(settings: Settings) -> Any:
+    path = settings.STORAGE_ZSTD_DICTIONARY_PATH
+    if not path:
+        return None
+    dictionary = _load_zstd_dictionary(path)
+    logger.info(f"Loaded zstd dictionary {dictionary.dict_id()} from {path}")
+    return dictionary
+
+
+@lru_cache()
+def get_codec(name: Optional[str] = None) -> BaseCodec:
+    """Codec for writing new blobs, or for reading blobs recorded under ``name``."""
+    settings = get_settings()
+    codec_name, _, dictionary_id = (name or settings.STORAGE_COMPRESSION.value).partition(":")
+
+    match CompressionType(codec_name):
+        case CompressionType.GZIP:
+            return GzipCodec(settings.STORAGE_COMPRESSION_LEVEL)
+        case CompressionType.ZSTD if dictionary_id:
+            return ZstdCodec(
+                settings.STORAGE_COMPRESSION_LEVEL,
+                _find_zstd_dictionary(settings, int(dictionary_id)),
+            )
+        case CompressionType.ZSTD if name is None and zstandard is None:
+            logger.warning("zstd compression needs the 'zstd' extra, falling back to gzip")
+            return GzipCodec(settings.STORAGE_COMPRESSION_LEVEL)
+        case CompressionType.ZSTD:
+            # Plain "zstd" is also what blobs written with a dictionary were recorded as before
+            # the id was kept, so it reads with the configured one. Frames written without a
+            # dictionary decode the same either way.
+            return ZstdCodec(
+                settings.STORAGE_COMPRESSION_LEVEL, _configured_zstd_dictionary(settings)
+            )
+        case _:
+            return IdentityCodec()
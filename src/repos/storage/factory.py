@@ -25,3 +25,34 @@ def create_storage_repository(storage_type: Optional[StorageType] = None) -> Bas
         raise ValueError(f"Unsupported storage type: {storage_type}")
 
     return repository_class()
+
+
+_storage_repository: Optional[BaseStorageRepository] = None
+
+
+def get_shared_storage_repository() -> BaseStorageRepository:
+    global _storage_repository
+
+    if _storage_repository is None:
+        _storage_repository = create_storage_repository()
+
+    return _storage_repository
+
+
+async def init_storage_repository() -> BaseStorageRepository:
+    storage_repo = get_shared_storage_repository()
+    await storage_repo.connect()
+    try:
+        await storage_repo.ensure_bucket_exists()
+    except Exception as exc:
+        logger.warning(f"Storage bucket could not be verified on startup: {exc}")
+    return storage_repo
+
+
+async def close_storage_repository() -> None:
+    global _storage_repository
+
+    if _storage_repository is not None:
+        await _storage_repository.close()
+
+    _storage_repository = None
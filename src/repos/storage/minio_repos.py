@@ -1,18 +1,109 @@
+import asyncio
 import logging
-from typing import Optional
+from contextlib import (
+    AsyncExitStack,
+    contextmanager,
+    suppress,
+)
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+)
 
 import aiobotocore.session
 from aiobotocore.client import AioBaseClient
+from aiobotocore.config import AioConfig
 from botocore.exceptions import ClientError
 from fastapi import HTTPException, status
 
+from src.core.metrics import (
+    STORAGE_BYTES,
+    STORAGE_OPERATION_DURATION,
+    STORAGE_POOL_MAX_CONNECTIONS,
+    STORAGE_REQUESTS_IN_PROGRESS,
+)
 from src.core.settings import get_settings
-from src.repos.storage.base import BaseStorageRepository
+from src.core.tracing import trace_span
+from src.repos.storage.base import BaseStorageRepository, StorageStream
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
 
+@contextmanager
+def _track_operation(operation: str, **fields: Any) -> Iterator[None]:
+    STORAGE_REQUESTS_IN_PROGRESS.inc()
+    try:
+        with (
+            trace_span(f"storage.{operation}", **fields),
+            STORAGE_OPERATION_DURATION.labels(operation=operation).time(),
+        ):
+            yield
+    finally:
+        STORAGE_REQUESTS_IN_PROGRESS.dec()
+
+
+class MinioMultipartUpload:
+
+    def __init__(self, client: AioBaseClient, bucket_name: str, path: str, upload_id: str):
+        self.client = client
+        self.bucket_name = bucket_name
+        self.path = path
+        self.upload_id = upload_id
+        self.parts: List[Dict[str, Any]] = []
+        self._pending: Optional[asyncio.Task[Dict[str, Any]]] = None
+
+    async def add_part(self, data: bytes) -> None:
+        # Keep at most one part in flight so the caller can fill the next one meanwhile.
+        await self._collect_pending()
+        self._pending = asyncio.create_task(self._upload_part(len(self.parts) + 1, data))
+
+    async def complete(self) -> None:
+        await self._collect_pending()
+        with _track_operation("complete_multipart_upload", path=self.path, parts=len(self.parts)):
+            await self.client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=self.path,
+                UploadId=self.upload_id,
+                MultipartUpload={"Parts": self.parts},
+            )
+
+    async def abort(self) -> None:
+        if self._pending is not None:
+            self._pending.cancel()
+            with suppress(asyncio.CancelledError, Exception):
+                await self._pending
+            self._pending = None
+
+        try:
+            await self.client.abort_multipart_upload(
+                Bucket=self.bucket_name, Key=self.path, UploadId=self.upload_id
+            )
+        except ClientError as exc:
+            logger.error(f"Failed to abort MinIO multipart upload for {self.path}: {exc}")
+
+    async def _upload_part(self, part_number: int, data: bytes) -> Dict[str, Any]:
+        with _track_operation("upload_part", path=self.path, part=part_number, size=len(data)):
+            response = await self.client.upload_part(
+                Bucket=self.bucket_name,
+                Key=self.path,
+                UploadId=self.upload_id,
+                PartNumber=part_number,
+                Body=data,
+            )
+        STORAGE_BYTES.labels(direction="upload").inc(len(data))
+        return {"ETag": response["ETag"], "PartNumber": part_number}
+
+    async def _collect_pending(self) -> None:
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            self.parts.append(await pending)
+
+
 class MinioStorageRepository(BaseStorageRepository):
 
     def __init__(self):
@@ -20,55 +111,212 @@ class MinioStorageRepository(BaseStorageRepository):
             f"{'https' if settings.MINIO_SECURE else 'http'}://{settings.MINIO_ENDPOINT}"
         )
         self.bucket_name = settings.MINIO_BUCKET_NAME
+        self.multipart_part_size = settings.MINIO_MULTIPART_PART_SIZE
+        STORAGE_POOL_MAX_CONNECTIONS.set(settings.MINIO_MAX_POOL_CONNECTIONS)
         self.session = aiobotocore.session.get_session()
         self.client_kwargs = {
             "endpoint_url": self.endpoint_url,
             "aws_access_key_id": settings.MINIO_ACCESS_KEY,
             "aws_secret_access_key": settings.MINIO_SECRET_KEY,
+            "config": AioConfig(
+                max_pool_connections=settings.MINIO_MAX_POOL_CONNECTIONS,
+                connect_timeout=settings.MINIO_CONNECT_TIMEOUT,
+                read_timeout=settings.MINIO_READ_TIMEOUT,
+                retries={
+                    "mode": settings.MINIO_RETRY_MODE,
+                    "max_attempts": settings.MINIO_MAX_ATTEMPTS,
+                },
+                tcp_keepalive=True,
+                connector_args={"keepalive_timeout": settings.MINIO_KEEPALIVE_TIMEOUT},
+            ),
         }
+        self._client: Optional[AioBaseClient] = None
+        self._exit_stack: Optional[AsyncExitStack] = None
+        self._client_lock = asyncio.Lock()
+        self._bucket_verified = False
+
+    async def connect(self) -> None:
+        async with self._client_lock:
+            if self._client is not None:
+                return
+
+            exit_stack = AsyncExitStack()
+            self._client = await exit_stack.enter_async_context(
+                self.session.create_client("s3", **self.client_kwargs)
+            )
+            self._exit_stack = exit_stack
+            logger.info(f"MinIO client connected to {self.endpoint_url}")
+
+    async def close(self) -> None:
+        async with self._client_lock:
+            if self._exit_stack is not None:
+                await self._exit_stack.aclose()
+                logger.info("MinIO client closed")
+
+            self._client = None
+            self._exit_stack = None
 
     async def _get_client(self) -> AioBaseClient:
-        return self.session.create_client("s3", **self.client_kwargs)
+        if self._client is None:
+            await self.connect()
+        assert self._client is not None
+        return self._client
 
     async def get(self, path: str) -> Optional[bytes]:
         try:
-            async with await self._get_client() as client:
+            client = await self._get_client()
+            with _track_operation("get", path=path):
                 response = await client.get_object(Bucket=self.bucket_name, Key=path)
                 async with response["Body"] as stream:
-                    return await stream.read()
+                    data = await stream.read()
+            STORAGE_BYTES.labels(direction="download").inc(len(data))
+            return data
+        except ClientError as exc:
+            logger.error(f"Got MinIO error: {exc}")
+            return None
+
+    async def get_stream(self, path: str, chunk_size: int) -> Optional[StorageStream]:
+        try:
+            client = await self._get_client()
+            with _track_operation("get_stream", path=path):
+                response = await client.get_object(Bucket=self.bucket_name, Key=path)
         except ClientError as exc:
             logger.error(f"Got MinIO error: {exc}")
             return None
 
+        async def chunks() -> AsyncIterator[bytes]:
+            async with response["Body"] as stream:
+                async for chunk in stream.iter_chunks(chunk_size):
+                    STORAGE_BYTES.labels(direction="download").inc(len(chunk))
+                    yield chunk
+
+        return StorageStream(chunks=chunks(), content_length=response.get("ContentLength"))
+
     async def put(self, path: str, data: bytes) -> None:
         if not data or not isinstance(data, bytes):
             raise ValueError(f"Invalid data for MinIO storage: {type(data)}")
 
         try:
-            async with await self._get_client() as client:
+            await self._put_object(path, data)
+        except ClientError as exc:
+            if not self._is_missing_bucket_error(exc):
+                raise self._storage_error(exc)
+
+            await self._recreate_missing_bucket()
+            try:
+                await self._put_object(path, data)
+            except ClientError as retry_exc:
+                raise self._storage_error(retry_exc)
+
+    async def _put_object(self, path: str, data: bytes) -> None:
+        try:
+            client = await self._get_client()
+            with _track_operation("put", path=path, size=len(data)):
                 await client.put_object(
                     Bucket=self.bucket_name, Key=path, Body=data, ContentType="application/json"
                 )
+            STORAGE_BYTES.labels(direction="upload").inc(len(data))
+        except ClientError:
+            raise
         except Exception as exc:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"MinIO storage error: {str(exc)}",
+            raise self._storage_error(exc)
+
+    async def put_stream(self, path: str, chunks: AsyncIterator[bytes]) -> None:
+        buffer = bytearray()
+        upload: Optional[MinioMultipartUpload] = None
+
+        try:
+            async for chunk in chunks:
+                buffer.extend(chunk)
+                if len(buffer) >= self.multipart_part_size:
+                    if upload is None:
+                        upload = await self._create_multipart_upload(path)
+                    await upload.add_part(bytes(buffer))
+                    buffer.clear()
+
+            if upload is None:
+                await self.put(path, bytes(buffer))
+                return
+
+            if buffer:
+                await upload.add_part(bytes(buffer))
+            await upload.complete()
+        except ClientError as exc:
+            if upload is not None:
+                await upload.abort()
+            raise self._storage_error(exc)
+        except BaseException:
+            if upload is not None:
+                await upload.abort()
+            raise
+
+    async def _create_multipart_upload(self, path: str) -> MinioMultipartUpload:
+        client = await self._get_client()
+        try:
+            response = await client.create_multipart_upload(
+                Bucket=self.bucket_name, Key=path, ContentType="application/json"
             )
+        except ClientError as exc:
+            if not self._is_missing_bucket_error(exc):
+                raise
+
+            await self._recreate_missing_bucket()
+            response = await client.create_multipart_upload(
+                Bucket=self.bucket_name, Key=path, ContentType="application/json"
+            )
+
+        return MinioMultipartUpload(client, self.bucket_name, path, response["UploadId"])
+
+    def _is_missing_bucket_error(self, exc: ClientError) -> bool:
+        return exc.response.get("Error", {}).get("Code") == "NoSuchBucket"
+
+    async def _recreate_missing_bucket(self) -> None:
+        logger.warning(f"Bucket {self.bucket_name} is missing, provisioning it again")
+        self._bucket_verified = False
+        await self.ensure_bucket_exists()
+
+    def _storage_error(self, exc: Exception) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"MinIO storage error: {str(exc)}",
+        )
+
+    async def copy(self, source_path: str, destination_path: str) -> None:
+        try:
+            client = await self._get_client()
+            with _track_operation("copy", source=source_path, path=destination_path):
+                await client.copy_object(
+                    Bucket=self.bucket_name,
+                    Key=destination_path,
+                    CopySource={"Bucket": self.bucket_name, "Key": source_path},
+                )
+        except Exception as exc:
+            raise self._storage_error(exc)
 
     async def delete(self, path: str) -> None:
         try:
-            async with await self._get_client() as client:
+            client = await self._get_client()
+            with _track_operation("delete", path=path):
                 await client.delete_object(Bucket=self.bucket_name, Key=path)
         except ClientError as exc:
             logger.error(f"Got MinIO error: {exc}")
 
+    async def ping(self) -> None:
+        client = await self._get_client()
+        with _track_operation("head_bucket"):
+            await client.head_bucket(Bucket=self.bucket_name)
+
     async def ensure_bucket_exists(self) -> None:
+        if self._bucket_verified:
+            return
+
         try:
-            async with await self._get_client() as client:
-                try:
-                    await client.head_bucket(Bucket=self.bucket_name)
-                except ClientError:
-                    await client.create_bucket(Bucket=self.bucket_name)
+            client = await self._get_client()
+            try:
+                await client.head_bucket(Bucket=self.bucket_name)
+            except ClientError:
+                await client.create_bucket(Bucket=self.bucket_name)
+            self._bucket_verified = True
         except Exception as exc:
             logger.error(f"Error managing MinIO bucket: {exc}")
             raise HTTPException(
@@ -0,0 +1,244 @@
+import json
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import (
+    Any,
+    Dict,
+    Optional,
+    Tuple,
+)
+
+from src.core.logging import LogFields
+from src.core.metrics import CallbackGauge
+from src.core.settings import get_settings
+from src.repos.cache import BaseCacheRepository
+from src.repos.state.schema import StateVersionSchema
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CachedBlob:
+    codec: str
+    data: bytes
+
+
+class StateCache:
+    """Byte-size bounded LRU cache of state blobs keyed by the SHA-256 of their content.
+
+    Blobs are kept in their stored encoding. Entries never go stale because a hash always
+    identifies the same content; a new state version simply gets a new key.
+    """
+
+    def __init__(self, max_size: int, max_entry_size: int):
+        self.max_size = max_size
+        self.max_entry_size = min(max_entry_size, max_size)
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, CachedBlob]" = OrderedDict()
+
+    def accepts(self, size: Optional[int]) -> bool:
+        return size is not None and 0 < size <= self.max_entry_size
+
+    def get(self, state_hash: str) -> Optional[CachedBlob]:
+        blob = self._entries.get(state_hash)
+        if blob is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(state_hash)
+        self.hits += 1
+        return blob
+
+    def put(self, state_hash: str, blob: CachedBlob) -> None:
+        if not self.accepts(len(blob.data)):
+            return
+
+        previous = self._entries.pop(state_hash, None)
+        if previous is not None:
+            self.size -= len(previous.data)
+
+        self._entries[state_hash] = blob
+        self.size += len(blob.data)
+
+        while self.size > self.max_size:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted.data)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "size": self.size,
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def _state_cache_stats() -> Dict[Tuple[str, ...], float]:
+    stats = get_state_cache().get_stats()
+    return {(name,): value for name, value in stats.items()}
+
+
+STATE_CACHE = CallbackGauge(
+    "state_cache",
+    "In-process state cache entries, bytes and hit/miss/eviction counts",
+    ["stat"],
+    _state_cache_stats,
+)
+
+
+@lru_cache()
+def get_state_cache() -> StateCache:
+    settings = get_settings()
+    return StateCache(settings.STATE_CACHE_MAX_SIZE, settings.STATE_CACHE_MAX_ENTRY_SIZE)
+
+
+class SharedStateCache:
+    """Cache shared between workers for latest-version metadata and small state blobs.
+
+    Latest-version metadata is guarded by a per-state stamp and a count of writers in flight.
+    Before committing, a writer registers itself and bumps the stamp, so readers skip the
+    cache until it is done and nothing read earlier can be stored as current. The cache never
+    blocks a write: if it cannot be invalidated beforehand, the writer tries again after
+    committing, and a stale entry left behind expires after the cache TTL. If the writer cannot
+    deregister, the state bypasses the cache until the count expires. Other backend failures
+    are logged and treated as misses.
+    """
+
+    def __init__(self, backend: Optional[BaseCacheRepository]):
+        settings = get_settings()
+        self.backend = backend
+        self.ttl = settings.CACHE_TTL
+        self.max_blob_size = settings.CACHE_MAX_BLOB_SIZE
+        self.key_prefix = settings.CACHE_KEY_PREFIX
+
+    def _key(self, kind: str, value: str) -> str:
+        return f"{self.key_prefix}:{kind}:{value}"
+
+    async def get_latest_version(
+        self, name: str
+    ) -> Tuple[Optional[StateVersionSchema], Optional[int]]:
+        if self.backend is None:
+            return None, None
+
+        try:
+            stamp_value, writers, entry = await self.backend.get_many(
+                [self._key("stamp", name), self._key("writers", name), self._key("latest", name)]
+            )
+        except Exception as exc:
+            logger.warning("Shared cache read failed %s", LogFields(state=name, error=exc))
+            return None, None
+
+        if int(writers or 0):
+            return None, None
+
+        stamp = int(stamp_value or 0)
+        if entry is None:
+            return None, stamp
+
+        try:
+            cached = json.loads(entry)
+            if cached["stamp"] != stamp:
+                return None, stamp
+            return StateVersionSchema.model_validate(cached["version"]), stamp
+        except (ValueError, KeyError, TypeError) as exc:
+            logger.warning(
+                "Ignoring corrupt shared cache entry %s", LogFields(state=name, error=exc)
+            )
+            return None, stamp
+
+    async def set_latest_version(self, name: str, version: StateVersionSchema, stamp: int) -> None:
+        if self.backend is None:
+            return
+
+        entry = json.dumps({"stamp": stamp, "version": version.model_dump(mode="json")})
+        try:
+            await self.backend.set(self._key("latest", name), entry.encode(), self.ttl)
+        except Exception as exc:
+            logger.warning("Shared cache write failed %s", LogFields(state=name, error=exc))
+
+    async def begin_update(self, name: str) -> Optional[int]:
+        """Invalidate the cached latest version of a state that is about to be committed."""
+        if self.backend is None:
+            return None
+
+        try:
+            await self.backend.incr(self._key("writers", name), ttl=self.ttl)
+            return await self.backend.incr(self._key("stamp", name))
+        except Exception as exc:
+            logger.warning(
+                "Shared cache invalidation failed, retrying after commit %s",
+                LogFields(state=name, error=exc),
+            )
+            return None
+
+    async def end_update(
+        self, name: str, stamp: Optional[int], version: Optional[StateVersionSchema]
+    ) -> None:
+        if self.backend is None:
+            return
+
+        if stamp is None:
+            # begin_update failed: a new stamp makes any stored entry stale. A writer count it
+            # may have left behind is not touched and expires on its own.
+            try:
+                await self.backend.incr(self._key("stamp", name))
+            except Exception as exc:
+                logger.error(
+                    "Shared cache invalidation failed, stale entry served until it expires %s",
+                    LogFields(state=name, error=exc, ttl=self.ttl),
+                )
+            return
+
+        try:
+            # Bumped again so writers that overlapped this one see it and do not publish.
+            current_stamp = await self.backend.incr(self._key("stamp", name))
+            writers = await self.backend.incr(self._key("writers", name), -1, self.ttl)
+        except Exception as exc:
+            logger.warning(
+                "Shared cache write failed, bypassing it until the entry expires %s",
+                LogFields(state=name, error=exc, ttl=self.ttl),
+            )
+            return
+
+        # Only a writer that overlapped with no other knows its version is the latest.
+        if version is not None and writers == 0 and current_stamp == stamp + 1:
+            await self.set_latest_version(name, version, current_stamp)
+
+    async def get_blob(self, state_hash: str) -> Optional[CachedBlob]:
+        if self.backend is None:
+            return None
+
+        try:
+            entry = await self.backend.get(self._key("blob", state_hash))
+        except Exception as exc:
+            logger.warning("Shared cache read failed %s", LogFields(hash=state_hash, error=exc))
+            return None
+
+        if entry is None:
+            return None
+
+        codec, _, data = entry.partition(b"\n")
+        return CachedBlob(codec=codec.decode(), data=data)
+
+    async def put_blob(self, state_hash: str, blob: CachedBlob) -> None:
+        if self.backend is None or len(blob.data) > self.max_blob_size:
+            return
+
+        try:
+            await self.backend.set(
+                self._key("blob", state_hash), blob.codec.encode() + b"\n" + blob.data, self.ttl
+            )
+        except Exception as exc:
+            logger.warning("Shared cache write failed %s", LogFields(hash=state_hash, error=exc))
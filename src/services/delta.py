@@ -0,0 +1,106 @@
+import json
+from difflib import SequenceMatcher
+from typing import (
+    List,
+    Union,
+)
+
+# A delta is a JSON list of operations applied in order: ``[start, end]`` copies that range of
+# lines from the base, a string inserts literal text. Lines keep their endings, so applying a
+# delta reproduces the target byte for byte and the stored state hash stays valid.
+DeltaOperation = Union[List[int], str]
+
+
+def _decode(data: bytes) -> str:
+    return data.decode("utf-8", "surrogateescape")
+
+
+def _encode(text: str) -> bytes:
+    return text.encode("utf-8", "surrogateescape")
+
+
+def _common_prefix(base: List[str], target: List[str]) -> int:
+    size = min(len(base), len(target))
+    index = 0
+    while index < size and base[index] == target[index]:
+        index += 1
+    return index
+
+
+def _common_suffix(base: List[str], target: List[str], prefix: int) -> int:
+    size = min(len(base), len(target)) - prefix
+    index = 0
+    while index < size and base[-index - 1] == target[-index - 1]:
+        index += 1
+    return index
+
+
+def _append(operations: List[DeltaOperation], operation: DeltaOperation) -> None:
+    if operations:
+        last = operations[-1]
+        if isinstance(last, str) and isinstance(operation, str):
+            operations[-1] = last + operation
+            return
+        if isinstance(last, list) and isinstance(operation, list) and last[1] == operation[0]:
+            last[1] = operation[1]
+            return
+    operations.append(operation)
+
+
+def make_delta(base: bytes, target: bytes) -> bytes:
+    base_lines = _decode(base).splitlines(keepends=True)
+    target_lines = _decode(target).splitlines(keepends=True)
+
+    # Consecutive state versions usually differ in a few places, so trimming the shared head
+    # and tail keeps the quadratic matcher away from most of the document.
+    prefix = _common_prefix(base_lines, target_lines)
+    suffix = _common_suffix(base_lines, target_lines, prefix)
+    base_end = len(base_lines) - suffix
+    target_end = len(target_lines) - suffix
+
+    operations: List[DeltaOperation] = []
+    if prefix:
+        _append(operations, [0, prefix])
+
+    matcher = SequenceMatcher(
+        None, base_lines[prefix:base_end], target_lines[prefix:target_end], autojunk=True
+    )
+    for tag, base_start, base_stop, target_start, target_stop in matcher.get_opcodes():
+        if tag == "equal":
+            _append(operations, [prefix + base_start, prefix + base_stop])
+        elif tag in ("replace", "insert"):
+            _append(
+                operations, "".join(target_lines[prefix + target_start : prefix + target_stop])
+            )
+
+    if suffix:
+        _append(operations, [base_end, len(base_lines)])
+
+    return json.dumps(operations, separators=(",", ":")).encode()
+
+
+def apply_delta(base: bytes, delta: bytes) -> bytes:
+    try:
+        operations = json.loads(delta)
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"Invalid state delta: {str(exc)}")
+
+    if not isinstance(operations, list):
+        raise ValueError("Invalid state delta: expected a list of operations")
+
+    base_lines = _decode(base).splitlines(keepends=True)
+    parts: List[str] = []
+    for operation in operations:
+        if isinstance(operation, str):
+            parts.append(operation)
+        elif (
+            isinstance(operation, list)
+            and len(operation) == 2
+            and all(isinstance(index, int) for index in operation)
+            and 0 <= operation[0] <= operation[1] <= len(base_lines)
+        ):
+            parts.extend(base_lines[operation[0] : operation[1]])
+        else:
+            raise ValueError(f"Invalid state delta operation: {operation!r}")
+
+    return _encode("".join(parts))
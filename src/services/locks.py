@@ -0,0 +1,223 @@
+import asyncio
+import logging
+from collections import deque
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Optional,
+)
+
+import asyncpg
+
+from src.core.logging import LogFields
+from src.core.metrics import LOCKS_EXPIRED
+from src.core.settings import get_settings
+from src.db.session import get_session_factory
+from src.repos.locks import LOCK_RELEASED_CHANNEL, create_lock_repository
+
+logger = logging.getLogger(__name__)
+
+
+class LockWaitQueue:
+    """FIFO queues of LOCK requests waiting, per state, for the current holder to unlock.
+
+    Only the head of a queue retries the lock: on a release notification, or every
+    ``poll_interval`` seconds in case a notification was missed. Ordering is fair between
+    waiters of one worker; across workers the first head to retry after a release wins.
+    """
+
+    def __init__(self, poll_interval: float):
+        self.poll_interval = poll_interval
+        self._waiters: Dict[str, Deque[asyncio.Event]] = {}
+
+    def notify(self, name: str) -> None:
+        waiters = self._waiters.get(name)
+        if waiters:
+            waiters[0].set()
+
+    async def acquire(
+        self, name: str, try_lock: Callable[[], Awaitable[bool]], timeout: float
+    ) -> bool:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        waiters = self._waiters.setdefault(name, deque())
+        waiter = asyncio.Event()
+        waiters.append(waiter)
+        acquired = False
+        try:
+            while True:
+                if waiters[0] is waiter:
+                    acquired = await try_lock()
+                    if acquired:
+                        return True
+
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return False
+                waiter.clear()
+                try:
+                    await asyncio.wait_for(waiter.wait(), min(remaining, self.poll_interval))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            waiters.remove(waiter)
+            if not waiters:
+                del self._waiters[name]
+            elif not acquired:
+                # Leaving without the lock, so the next waiter should try in our place.
+                waiters[0].set()
+
+
+class LockReleaseListener:
+    """Relays Postgres lock release notifications from every worker to the local queue."""
+
+    def __init__(self, dsn: str, queue: LockWaitQueue, retry_interval: float):
+        self.dsn = dsn
+        self.queue = queue
+        self.retry_interval = retry_interval
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def _on_notification(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        self.queue.notify(payload)
+
+    async def _listen(self) -> None:
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                await connection.add_listener(LOCK_RELEASED_CHANNEL, self._on_notification)
+                logger.info(f"Listening for lock releases on {LOCK_RELEASED_CHANNEL}")
+                await closed.wait()
+                logger.warning("Lock release listener connection closed")
+            except Exception as exc:
+                logger.error(f"Lock release listener failed: {exc}")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(self.retry_interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class LockReaper:
+    """Periodically releases locks whose lease is older than ``lease_ttl`` seconds."""
+
+    def __init__(self, lease_ttl: int, interval: float, batch_size: int):
+        self.lease_ttl = lease_ttl
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task[None]] = None
+
+    async def reap(self) -> int:
+        released = 0
+        while True:
+            async with get_session_factory()() as session:
+                names = await create_lock_repository(session).release_expired_locks(
+                    self.lease_ttl, self.batch_size
+                )
+            for name in names:
+                logger.warning(
+                    "Released expired lock %s", LogFields(state=name, lease_ttl=self.lease_ttl)
+                )
+                get_lock_wait_queue().notify(name)
+            released += len(names)
+            LOCKS_EXPIRED.inc(len(names))
+            if len(names) < self.batch_size:
+                return released
+
+    async def _reap_periodically(self) -> None:
+        while True:
+            try:
+                await self.reap()
+            except Exception as exc:
+                logger.error(f"Lock reaper failed: {exc}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._reap_periodically())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+_lock_reaper: Optional[LockReaper] = None
+_lock_wait_queue: Optional[LockWaitQueue] = None
+_lock_release_listener: Optional[LockReleaseListener] = None
+
+
+def get_lock_wait_queue() -> LockWaitQueue:
+    global _lock_wait_queue
+
+    if _lock_wait_queue is None:
+        _lock_wait_queue = LockWaitQueue(get_settings().LOCK_WAIT_POLL_INTERVAL)
+
+    return _lock_wait_queue
+
+
+def start_lock_release_listener() -> None:
+    global _lock_release_listener
+
+    settings = get_settings()
+    if not settings.LOCK_WAIT_MAX_TIMEOUT or _lock_release_listener is not None:
+        return
+
+    dsn = settings.DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1)
+    _lock_release_listener = LockReleaseListener(
+        dsn, get_lock_wait_queue(), settings.LOCK_WAIT_POLL_INTERVAL
+    )
+    _lock_release_listener.start()
+
+
+async def stop_lock_release_listener() -> None:
+    global _lock_release_listener
+
+    if _lock_release_listener is not None:
+        await _lock_release_listener.stop()
+
+    _lock_release_listener = None
+
+
+def start_lock_reaper() -> None:
+    global _lock_reaper
+
+    settings = get_settings()
+    if not settings.LOCK_TTL or _lock_reaper is not None:
+        return
+
+    _lock_reaper = LockReaper(
+        settings.LOCK_TTL, settings.LOCK_REAPER_INTERVAL, settings.LOCK_REAPER_BATCH_SIZE
+    )
+    _lock_reaper.start()
+    logger.info(f"Lock reaper started with lease TTL {settings.LOCK_TTL}s")
+
+
+async def stop_lock_reaper() -> None:
+    global _lock_reaper
+
+    if _lock_reaper is not None:
+        await _lock_reaper.stop()
+
+    _lock_reaper = None
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    Optional,
+)
+
+from sqlalchemy import text
+
+from src.core.logging import LogFields
+from src.core.settings import get_settings
+from src.db.session import get_engine
+from src.repos.storage import get_shared_storage_repository
+
+logger = logging.getLogger(__name__)
+
+Probe = Callable[[], Awaitable[None]]
+
+
+@dataclass
+class ProbeResult:
+    ok: bool
+    latency_ms: float
+    checked_at: datetime
+    error: Optional[str] = None
+
+
+async def probe_database() -> None:
+    async with get_engine().connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+
+async def probe_storage() -> None:
+    await get_shared_storage_repository().ping()
+
+
+class ReadinessChecker:
+    """Runs dependency probes and serves their last results for ``ttl`` seconds."""
+
+    def __init__(self, probes: Dict[str, Probe], ttl: float, timeout: float):
+        self.probes = probes
+        self.ttl = ttl
+        self.timeout = timeout
+        self._results: Dict[str, ProbeResult] = {}
+        self._refreshed_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def _is_fresh(self) -> bool:
+        return self._refreshed_at is not None and time.monotonic() - self._refreshed_at < self.ttl
+
+    async def check(self) -> Dict[str, ProbeResult]:
+        if not self._is_fresh():
+            async with self._lock:
+                if not self._is_fresh():
+                    await self.refresh()
+        return self._results
+
+    async def refresh(self) -> None:
+        names = list(self.probes)
+        results = await asyncio.gather(*(self._run_probe(name) for name in names))
+        self._results = dict(zip(names, results))
+        self._refreshed_at = time.monotonic()
+
+    async def _run_probe(self, name: str) -> ProbeResult:
+        start = time.perf_counter()
+        error = None
+        try:
+            await asyncio.wait_for(self.probes[name](), self.timeout)
+        except asyncio.TimeoutError:
+            error = f"timed out after {self.timeout}s"
+        except Exception as exc:
+            error = str(exc) or type(exc).__name__
+
+        latency_ms = round((time.perf_counter() - start) * 1000, 2)
+        if error:
+            logger.warning(
+                "Readiness probe failed %s",
+                LogFields(dependency=name, latency_ms=latency_ms, error=error),
+            )
+        return ProbeResult(
+            ok=error is None, latency_ms=latency_ms, checked_at=datetime.now(), error=error
+        )
+
+    async def _refresh_periodically(self) -> None:
+        while True:
+            try:
+                async with self._lock:
+                    await self.refresh()
+            except Exception as exc:
+                logger.error(f"Readiness refresh failed: {exc}")
+            # Refresh at twice the TTL rate so probes never have to run inline.
+            await asyncio.sleep(self.ttl / 2)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+_readiness_checker: Optional[ReadinessChecker] = None
+
+
+def get_readiness_checker() -> ReadinessChecker:
+    global _readiness_checker
+
+    if _readiness_checker is None:
+        settings = get_settings()
+        _readiness_checker = ReadinessChecker(
+            {"database": probe_database, "storage": probe_storage},
+            ttl=settings.READINESS_CACHE_TTL,
+            timeout=settings.READINESS_PROBE_TIMEOUT,
+        )
+
+    return _readiness_checker
+
+
+def start_readiness_checks() -> None:
+    get_readiness_checker().start()
+
+
+async def stop_readiness_checks() -> None:
+    global _readiness_checker
+
+    if _readiness_checker is not None:
+        await _readiness_checker.stop()
+
+    _readiness_checker = None
@@ -1,18 +1,91 @@
+import asyncio
 import hashlib
 import json
 import logging
+import time
 import uuid
-from typing import List, Optional
+from dataclasses import dataclass
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Collection,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.controllers.schema import LockRequestSchema
-from src.repos.state import StateRepository, StateVersionRepository
-from src.repos.state.schema import StateVersionSchema
-from src.repos.storage import BaseStorageRepository, create_storage_repository
+from src.core.logging import LogFields, log_duration
+from src.core.metrics import STATE_SIZE
+from src.core.offload import run_offloaded
+from src.core.settings import CompressionType, get_settings
+from src.core.tracing import trace_span
+from src.repos.cache import get_shared_cache_repository
+from src.repos.locks import create_lock_repository
+from src.repos.state import (
+    StateBlobRepository,
+    StateRepository,
+    StateVersionRepository,
+)
+from src.repos.state.schema import LatestStateVersionSchema, StateVersionSchema
+from src.repos.storage import (
+    BaseStorageRepository,
+    StorageStream,
+    get_codec,
+    get_shared_storage_repository,
+)
+from src.services.cache import (
+    CachedBlob,
+    SharedStateCache,
+    get_state_cache,
+)
+from src.services.delta import (
+    apply_delta,
+    make_delta,
+)
+from src.services.locks import get_lock_wait_queue
+from src.services.validation import StreamingJSONValidator
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+
+class ByteBudget:
+    """Admits work while the bytes it holds stay within ``limit``.
+
+    When nothing is held, any size is admitted, so an item larger than the limit runs alone.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+        self._changed = asyncio.Condition()
+
+    async def acquire(self, size: int) -> None:
+        async with self._changed:
+            await self._changed.wait_for(lambda: not self.used or self.used + size <= self.limit)
+            self.used += size
+
+    async def adjust(self, delta: int) -> None:
+        async with self._changed:
+            self.used += delta
+            self._changed.notify_all()
+
+
+@dataclass
+class StateReadResult:
+    name: str
+    version: Optional[StateVersionSchema] = None
+    data: Optional[bytes] = None
+    error: Optional[str] = None
+
 
 INITIAL_STATE = {
     "version": 4,
@@ -30,75 +103,523 @@ class StateService:
         self, session: AsyncSession, storage_repo: Optional[BaseStorageRepository] = None
     ):
         self.state_repo = StateRepository(session)
+        self.lock_repo = create_lock_repository(session)
         self.state_version_repo = StateVersionRepository(session)
-        self.storage_repo = storage_repo or create_storage_repository()
-
-    def _get_hash(self, state_data: bytes) -> str:
-        return hashlib.sha256(state_data).hexdigest()
+        self.storage_repo = storage_repo or get_shared_storage_repository()
+        self.state_blob_repo = StateBlobRepository(session)
+        self.chunk_size = get_settings().STORAGE_STREAM_CHUNK_SIZE
+        self.inline_upload_size = get_settings().STORAGE_INLINE_UPLOAD_SIZE
+        self.codec = get_codec()
+        self.delta_enabled = get_settings().STORAGE_DELTA_ENABLED
+        self.snapshot_interval = get_settings().STORAGE_DELTA_SNAPSHOT_INTERVAL
+        self.offload_threshold = get_settings().STATE_OFFLOAD_THRESHOLD
+        self.lock_ttl = get_settings().LOCK_TTL
+        self.lock_wait_max_timeout = get_settings().LOCK_WAIT_MAX_TIMEOUT
+        self.bulk_read_concurrency = get_settings().BULK_READ_CONCURRENCY
+        self.bulk_read_max_buffer_size = get_settings().BULK_READ_MAX_BUFFER_SIZE
+        self.cache = get_state_cache()
+        self.shared_cache = SharedStateCache(get_shared_cache_repository())
 
     def _generate_initial_state(self) -> bytes:
         initial_state = INITIAL_STATE.copy()
         initial_state["lineage"] = str(uuid.uuid4())
         return json.dumps(initial_state).encode()
 
-    async def get_state(self, name: str) -> bytes:
-        state = await self.state_repo.get_by_name(name)
+    def _generate_initial_state_stream(self) -> StorageStream:
+        return self._bytes_stream(self._generate_initial_state())
 
-        if not state:
-            logger.info(f"No state found for {name}, returning initial state")
-            return self._generate_initial_state()
+    async def _run_cpu_bound(self, size: int, func: Callable[..., T], *args: Any) -> T:
+        if size < self.offload_threshold:
+            return func(*args)
+        return await run_offloaded(func, *args)
+
+    def _bytes_stream(self, data: bytes) -> StorageStream:
+        async def chunks() -> AsyncIterator[bytes]:
+            yield data
 
-        versions = await self.state_version_repo.get_versions_by_state_id(state.id)
-        if not versions:
-            logger.info(f"No state versions found for {name}, returning initial state")
+        return StorageStream(chunks=chunks(), content_length=len(data))
+
+    async def get_state(self, name: str) -> bytes:
+        latest_version = await self.get_latest_version(name)
+        if not latest_version:
+            logger.info(
+                "No state versions found, returning initial state %s", LogFields(state=name)
+            )
             return self._generate_initial_state()
 
-        latest_version = versions[0]
-        state_data = await self.storage_repo.get(latest_version.storage_path)
+        state_data = await self._load_version_data(latest_version)
 
-        if not state_data:
+        if state_data is None:
             logger.warning(
-                f"State file not found in storage at {latest_version.storage_path}, returning initial state"
+                "State file not found in storage, returning initial state %s",
+                LogFields(state=name, storage_path=latest_version.storage_path),
             )
             return self._generate_initial_state()
 
         return state_data
 
-    async def save_state(self, name: str, state_data: bytes, operation_id: str) -> None:
-        await self.storage_repo.ensure_bucket_exists()
+    async def read_latest_states(self, names: Sequence[str]) -> AsyncIterator[StateReadResult]:
+        """Resolve the latest versions of ``names`` and return their results as they load.
+
+        Versions are resolved in one query before returning, so loading never touches the
+        session. At most ``bulk_read_concurrency`` states are loaded at once, and together with
+        the results the consumer has not taken yet they hold at most
+        ``bulk_read_max_buffer_size`` bytes. States of unknown size are loaded on their own.
+        Loaded states are not added to the caches, so a scan does not evict hot entries.
+        """
+        names = list(dict.fromkeys(names))
+        versions = await self.state_version_repo.get_latest_versions(names)
+        return self._load_latest_states(names, versions)
+
+    async def _load_latest_states(
+        self, names: List[str], versions: Dict[str, LatestStateVersionSchema]
+    ) -> AsyncIterator[StateReadResult]:
+        pending = iter(names)
+        budget = ByteBudget(self.bulk_read_max_buffer_size)
+        results: asyncio.Queue[Tuple[StateReadResult, int]] = asyncio.Queue()
+
+        async def load(name: str, latest: LatestStateVersionSchema) -> StateReadResult:
+            version = latest.version
+            try:
+                data = await self._load_version_data(version, latest.base_version, cache=False)
+            except Exception as exc:
+                logger.error(
+                    "Failed to load state %s",
+                    LogFields(state=name, storage_path=version.storage_path, error=exc),
+                )
+                return StateReadResult(name=name, version=version, error=str(exc) or repr(exc))
+
+            if data is None:
+                return StateReadResult(
+                    name=name, version=version, error="State file not found in storage"
+                )
+            return StateReadResult(name=name, version=version, data=data)
+
+        async def worker() -> None:
+            for name in pending:
+                latest = versions.get(name)
+                if latest is None:
+                    await results.put((StateReadResult(name=name), 0))
+                    continue
 
+                reserved = self.bulk_read_max_buffer_size if latest.size is None else latest.size
+                await budget.acquire(reserved)
+                result = await load(name, latest)
+                held = len(result.data or b"")
+                await budget.adjust(held - reserved)
+                await results.put((result, held))
+
+        workers = [
+            asyncio.create_task(worker())
+            for _ in range(min(self.bulk_read_concurrency, len(names)))
+        ]
         try:
-            json.loads(state_data)
-        except json.JSONDecodeError as exc:
-            logger.error(f"Invalid JSON in state data: {exc}")
-            raise ValueError(f"Invalid JSON in state data: {str(exc)}")
-
-        state_hash = self._get_hash(state_data)
-        storage_path = f"states/{name}/{state_hash}_{operation_id}"
-
-        logger.info(f"Saving state for {name}, hash: {state_hash}, operation: {operation_id}")
-        await self.storage_repo.put(storage_path, state_data)
-
-        state = await self.state_repo.save_state(name)
-        if state and state.id:
-            await self.state_version_repo.create_version(
-                state_hash=state_hash,
-                storage_path=storage_path,
-                operation_id=operation_id,
-                state_id=state.id,
+            for _ in names:
+                result, held = await results.get()
+                yield result
+                await budget.adjust(-held)
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _load_version_data(
+        self,
+        version: StateVersionSchema,
+        base_version: Optional[StateVersionSchema] = None,
+        cache: bool = True,
+    ) -> Optional[bytes]:
+        blob = await self._get_cached_blob(version.state_hash, cache)
+        if blob is None:
+            blob = await self._read_version_blob(version, base_version, cache)
+            if blob is None:
+                return None
+            if cache:
+                await self._cache_blob(version.state_hash, blob)
+
+        return await self._run_cpu_bound(
+            len(blob.data), get_codec(blob.codec).decompress, blob.data
+        )
+
+    async def _read_version_blob(
+        self,
+        version: StateVersionSchema,
+        base_version: Optional[StateVersionSchema] = None,
+        cache: bool = True,
+    ) -> Optional[CachedBlob]:
+        stored_data = await self.storage_repo.get(version.storage_path)
+        if stored_data is None:
+            return None
+
+        if version.base_version_id is None:
+            return CachedBlob(codec=version.codec, data=stored_data)
+
+        delta = await self._run_cpu_bound(
+            len(stored_data), get_codec(version.codec).decompress, stored_data
+        )
+        if base_version is None:
+            base_version = await self.state_version_repo.get_version_by_id(
+                version.state_id, version.base_version_id
+            )
+        base_data = (
+            await self._load_version_data(base_version, cache=cache) if base_version else None
+        )
+        if base_data is None:
+            logger.warning(
+                "Snapshot for state delta not found %s",
+                LogFields(version_id=version.id, base_version_id=version.base_version_id),
+            )
+            return None
+
+        with log_duration(
+            logger, "State delta applied", version_id=version.id, delta_size=len(delta)
+        ):
+            state_data = await self._run_cpu_bound(len(base_data), apply_delta, base_data, delta)
+
+        return CachedBlob(codec=CompressionType.IDENTITY.value, data=state_data)
+
+    async def open_version_stream(
+        self, version: StateVersionSchema, accepted_encodings: Collection[str] = ()
+    ) -> Optional[StorageStream]:
+        stream = await self._read_version_stream(version, accepted_encodings)
+        if stream is not None:
+            stream.etag = version.state_hash
+        return stream
+
+    async def _read_version_stream(
+        self, version: StateVersionSchema, accepted_encodings: Collection[str]
+    ) -> Optional[StorageStream]:
+        blob = await self._get_cached_blob(version.state_hash)
+        if blob is None:
+            if version.base_version_id is not None:
+                blob = await self._read_version_blob(version)
+            else:
+                stream = await self.storage_repo.get_stream(version.storage_path, self.chunk_size)
+                if stream is None:
+                    return None
+                if not self.cache.accepts(stream.content_length):
+                    return self._decode_stream(stream, version.codec, accepted_encodings)
+                stored_data = b"".join([chunk async for chunk in stream.chunks])
+                blob = CachedBlob(codec=version.codec, data=stored_data)
+
+            if blob is None:
+                return None
+            await self._cache_blob(version.state_hash, blob)
+
+        return self._decode_stream(self._bytes_stream(blob.data), blob.codec, accepted_encodings)
+
+    async def _get_cached_blob(
+        self, state_hash: str, populate: bool = True
+    ) -> Optional[CachedBlob]:
+        blob = self.cache.get(state_hash)
+        if blob is None:
+            blob = await self.shared_cache.get_blob(state_hash)
+            if blob is not None and populate:
+                self.cache.put(state_hash, blob)
+        return blob
+
+    async def _cache_blob(self, state_hash: str, blob: CachedBlob) -> None:
+        self.cache.put(state_hash, blob)
+        await self.shared_cache.put_blob(state_hash, blob)
+
+    def _decode_stream(
+        self, stream: StorageStream, codec_name: str, accepted_encodings: Collection[str]
+    ) -> StorageStream:
+        codec = get_codec(codec_name)
+        if codec.name == CompressionType.IDENTITY:
+            return stream
+
+        if codec.content_encoding and codec.content_encoding in accepted_encodings:
+            return StorageStream(
+                chunks=stream.chunks,
+                content_length=stream.content_length,
+                content_encoding=codec.content_encoding,
+            )
+
+        return StorageStream(chunks=codec.decompress_stream(stream.chunks))
+
+    async def get_latest_version(self, name: str) -> Optional[StateVersionSchema]:
+        latest_version, stamp = await self.shared_cache.get_latest_version(name)
+        if latest_version:
+            return latest_version
+
+        latest_version = await self.state_version_repo.get_latest_version(name)
+        if latest_version and stamp is not None:
+            await self.shared_cache.set_latest_version(name, latest_version, stamp)
+        return latest_version
+
+    async def get_state_stream(
+        self,
+        name: str,
+        accepted_encodings: Collection[str] = (),
+        latest_version: Optional[StateVersionSchema] = None,
+    ) -> StorageStream:
+        if latest_version is None:
+            latest_version = await self.get_latest_version(name)
+        if not latest_version:
+            logger.info(
+                "No state versions found, returning initial state %s", LogFields(state=name)
+            )
+            return self._generate_initial_state_stream()
+
+        stream = await self.open_version_stream(latest_version, accepted_encodings)
+
+        if stream is None:
+            logger.warning(
+                "State file not found in storage, returning initial state %s",
+                LogFields(state=name, storage_path=latest_version.storage_path),
             )
+            return self._generate_initial_state_stream()
+
+        return stream
+
+    async def save_state(
+        self,
+        name: str,
+        state_data: bytes,
+        operation_id: str,
+        expected_version_id: Optional[int] = None,
+    ) -> Optional[StateVersionSchema]:
+        async def chunks() -> AsyncIterator[bytes]:
+            yield state_data
+
+        return await self.save_state_stream(name, chunks(), operation_id, expected_version_id)
+
+    async def save_state_stream(
+        self,
+        name: str,
+        chunks: AsyncIterator[bytes],
+        operation_id: str,
+        expected_version_id: Optional[int] = None,
+    ) -> Optional[StateVersionSchema]:
+        with trace_span("state.save", state=name):
+            return await self._save_state_stream(name, chunks, operation_id, expected_version_id)
+
+    async def _save_state_stream(
+        self,
+        name: str,
+        chunks: AsyncIterator[bytes],
+        operation_id: str,
+        expected_version_id: Optional[int],
+    ) -> Optional[StateVersionSchema]:
+        hasher = hashlib.sha256()
+        validator = StreamingJSONValidator()
+        # Hashing and validation run chunk by chunk between reads and storage writes, so their
+        # cost is accumulated onto the upload span instead of getting spans of their own.
+        stage_seconds = {"hash": 0.0, "validate": 0.0}
+
+        def check(batch: List[bytes]) -> None:
+            for chunk in batch:
+                started = time.perf_counter()
+                hasher.update(chunk)
+                hashed = time.perf_counter()
+                validator.feed(chunk)
+                stage_seconds["hash"] += hashed - started
+                stage_seconds["validate"] += time.perf_counter() - hashed
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(
+                        "Received state chunk %s",
+                        LogFields(state=name, chunk_size=len(chunk), received=validator.size),
+                    )
+
+        async def checked_chunks() -> AsyncIterator[bytes]:
+            # Past the offload threshold chunks are checked, and then compressed, in the offload
+            # pool in batches of that size so a large upload does not pay a thread hop per chunk.
+            batch: List[bytes] = []
+            batch_size = 0
+            try:
+                async for chunk in chunks:
+                    if not batch and validator.size + len(chunk) < self.offload_threshold:
+                        check([chunk])
+                        yield chunk
+                        continue
+
+                    batch.append(chunk)
+                    batch_size += len(chunk)
+                    if batch_size >= self.offload_threshold:
+                        await run_offloaded(check, batch)
+                        yield b"".join(batch)
+                        batch, batch_size = [], 0
+
+                check(batch)
+                for checked_chunk in batch:
+                    yield checked_chunk
+                validator.close()
+            except ValueError as exc:
+                logger.error("Invalid JSON in state data %s", LogFields(state=name, error=exc))
+                raise ValueError(f"Invalid JSON in state data: {str(exc)}")
+
+        with (
+            trace_span("state.upload") as span_fields,
+            log_duration(logger, "State uploaded", state=name) as log_fields,
+        ):
+            stream = checked_chunks()
+            head = bytearray()
+            exhausted = True
+            async for chunk in stream:
+                head.extend(chunk)
+                if len(head) >= self.inline_upload_size:
+                    exhausted = False
+                    break
+
+            base_version = None
+            if exhausted:
+                state_hash = hasher.hexdigest()
+                storage_path, base_version = await self._store_small_blob(
+                    name, state_hash, bytes(head)
+                )
+            else:
+                state_hash, storage_path = await self._store_large_blob(hasher, head, stream)
+
+            STATE_SIZE.observe(validator.size)
+            log_fields["size"] = validator.size
+            log_fields["hash"] = state_hash
+            log_fields["deduplicated"] = storage_path is None
+            log_fields["delta"] = base_version is not None
+            span_fields.update(log_fields)
+            span_fields["hash_ms"] = round(stage_seconds["hash"] * 1000, 2)
+            span_fields["validate_ms"] = round(stage_seconds["validate"] * 1000, 2)
+
+        with (
+            trace_span("state.record", hash=state_hash),
+            log_duration(logger, "State version recorded", state=name, hash=state_hash),
+        ):
+            stamp = None
+            version = None
+            try:
+                stamp = await self.shared_cache.begin_update(name)
+                version = await self.state_version_repo.create_version(
+                    name=name,
+                    state_hash=state_hash,
+                    storage_path=storage_path or self._get_blob_path(state_hash),
+                    operation_id=operation_id,
+                    codec=self.codec.identifier,
+                    size=validator.size,
+                    base_version_id=base_version.id if base_version else None,
+                    expected_latest_version_id=expected_version_id,
+                )
+            finally:
+                await self.shared_cache.end_update(name, stamp, version)
+                if version is None and storage_path:
+                    # Objects are keyed by content, so a concurrent save of the same bytes may
+                    # be about to commit a version pointing at this one: it is never deleted.
+                    logger.info(
+                        "State object left unreferenced %s",
+                        LogFields(state=name, storage_path=storage_path),
+                    )
+
+            if version is None:
+                logger.warning(
+                    "State changed since the expected version %s",
+                    LogFields(state=name, expected_version_id=expected_version_id),
+                )
+            return version
+
+    def _get_blob_path(self, state_hash: str) -> str:
+        return f"blobs/sha256/{state_hash}"
 
-    async def lock_state(self, name: str, lock_data: LockRequestSchema) -> bool:
-        return await self.state_repo.lock(name, lock_data)
+    async def _store_small_blob(
+        self, name: str, state_hash: str, state_data: bytes
+    ) -> Tuple[Optional[str], Optional[StateVersionSchema]]:
+        if await self.state_blob_repo.get_by_hash(state_hash):
+            return None, None
 
-    async def unlock_state(self, name: str, lock_id: str) -> bool:
-        return await self.state_repo.unlock(name, lock_id)
+        if self.delta_enabled:
+            delta = await self._store_delta(name, state_hash, state_data)
+            if delta:
+                await self._cache_blob(
+                    state_hash, CachedBlob(codec=CompressionType.IDENTITY.value, data=state_data)
+                )
+                return delta
 
-    async def get_state_versions(self, name: str) -> List[StateVersionSchema]:
+        storage_path = self._get_blob_path(state_hash)
+        stored_data = await self._run_cpu_bound(len(state_data), self.codec.compress, state_data)
+        await self.storage_repo.put(storage_path, stored_data)
+        await self._cache_blob(
+            state_hash, CachedBlob(codec=self.codec.identifier, data=stored_data)
+        )
+        return storage_path, None
+
+    async def _store_delta(
+        self, name: str, state_hash: str, state_data: bytes
+    ) -> Optional[Tuple[str, StateVersionSchema]]:
+        snapshot, versions_since = await self.state_version_repo.get_latest_snapshot(name)
+        if not snapshot or versions_since + 1 >= self.snapshot_interval:
+            return None
+
+        base_data = await self._load_version_data(snapshot)
+        if base_data is None:
+            return None
+
+        with trace_span("state.delta", base_version_id=snapshot.id) as span_fields:
+            delta = await self._run_cpu_bound(len(state_data), make_delta, base_data, state_data)
+            span_fields["size"] = len(delta)
+        if len(delta) >= len(state_data):
+            return None
+
+        storage_path = f"deltas/sha256/{snapshot.state_hash}/{state_hash}"
+        stored_delta = await self._run_cpu_bound(len(delta), self.codec.compress, delta)
+        await self.storage_repo.put(storage_path, stored_delta)
+        return storage_path, snapshot
+
+    async def _store_large_blob(
+        self, hasher: "hashlib._Hash", head: bytearray, stream: AsyncIterator[bytes]
+    ) -> Tuple[str, Optional[str]]:
+        # The key depends on the hash, which is only known once the whole body has been read.
+        staging_path = f"uploads/{uuid.uuid4().hex}"
+
+        async def remaining_chunks() -> AsyncIterator[bytes]:
+            yield bytes(head)
+            head.clear()
+            async for chunk in stream:
+                yield chunk
+
+        await self.storage_repo.put_stream(
+            staging_path, self.codec.compress_stream(remaining_chunks(), self.offload_threshold)
+        )
+        state_hash = hasher.hexdigest()
+
+        try:
+            if await self.state_blob_repo.get_by_hash(state_hash):
+                return state_hash, None
+
+            storage_path = self._get_blob_path(state_hash)
+            await self.storage_repo.copy(staging_path, storage_path)
+            return state_hash, storage_path
+        finally:
+            await self.storage_repo.delete(staging_path)
+
+    async def lock_state(self, name: str, lock_data: LockRequestSchema, wait: float = 0) -> bool:
+        wait = min(wait, self.lock_wait_max_timeout)
+        if not wait:
+            return await self.lock_repo.lock(name, lock_data, self.lock_ttl)
+
+        return await get_lock_wait_queue().acquire(
+            name, lambda: self.lock_repo.lock(name, lock_data, self.lock_ttl), wait
+        )
+
+    async def renew_lock(self, name: str, lock_id: str) -> Optional[bool]:
+        return await self.lock_repo.renew_lock(name, lock_id)
+
+    async def unlock_state(self, name: str, lock_id: str) -> Optional[bool]:
+        unlocked = await self.lock_repo.unlock(name, lock_id)
+        if unlocked:
+            get_lock_wait_queue().notify(name)
+        return unlocked
+
+    async def get_state_versions(
+        self,
+        name: str,
+        limit: Optional[int] = None,
+        before_id: Optional[int] = None,
+        after_id: Optional[int] = None,
+    ) -> List[StateVersionSchema]:
         state = await self.state_repo.get_by_name(name)
         if not state:
             return []
-        return await self.state_version_repo.get_versions_by_state_id(state.id)
+        return await self.state_version_repo.get_versions_by_state_id(
+            state.id, limit=limit, before_id=before_id, after_id=after_id
+        )
 
     async def get_state_version(self, name: str, version_id: int) -> Optional[StateVersionSchema]:
         state = await self.state_repo.get_by_name(name)
@@ -110,3 +631,12 @@ class StateService:
             return None
 
         return version
+
+    async def get_state_version_stream(
+        self, name: str, version_id: int, accepted_encodings: Collection[str] = ()
+    ) -> Optional[StorageStream]:
+        version = await self.get_state_version(name, version_id)
+        if not version:
+            return None
+
+        return await self.open_version_stream(version, accepted_encodings)
@@ -0,0 +1,63 @@
+from typing import (
+    Any,
+    Optional,
+    Tuple,
+)
+
+import ijson
+
+
+class _FirstEvent:
+    """Parser sink that keeps only the first event, to check the top-level value type."""
+
+    __slots__ = ("event",)
+
+    def __init__(self) -> None:
+        self.event: Optional[Tuple[str, Any]] = None
+
+    def send(self, event: Tuple[str, Any]) -> None:
+        if self.event is None:
+            self.event = event
+
+
+class StreamingJSONValidator:
+    """Incremental validation of a JSON document fed in chunks.
+
+    Chunks are pushed through ijson's parser (yajl in C when available), so the document
+    is fully parsed without being held in memory. It must be a single top-level object.
+    """
+
+    def __init__(self) -> None:
+        self.size = 0
+        self._first = _FirstEvent()
+        self._parser = ijson.basic_parse_coro(self._first)
+
+    def feed(self, chunk: bytes) -> None:
+        if not chunk:
+            # An empty chunk would tell the parser the document has ended.
+            return
+        try:
+            self._parser.send(chunk)
+        except ijson.JSONError as exc:
+            raise ValueError(_error_message(exc)) from None
+        self._check_root()
+        self.size += len(chunk)
+
+    def close(self) -> None:
+        try:
+            self._parser.close()
+        except ijson.JSONError as exc:
+            raise ValueError(_error_message(exc)) from None
+        self._check_root()
+
+    def _check_root(self) -> None:
+        if self._first.event is not None and self._first.event[0] != "start_map":
+            raise ValueError("Expected a single top-level object")
+
+
+def _error_message(exc: Exception) -> str:
+    # yajl errors quote the offending text over several lines; the first one names the problem.
+    message = exc.args[0] if exc.args else exc
+    if isinstance(message, bytes):
+        message = message.decode(errors="replace")
+    return str(message).strip().splitlines()[0].capitalize()
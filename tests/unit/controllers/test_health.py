@@ -1,9 +1,15 @@
-from unittest.mock import MagicMock, patch
+from unittest.mock import (
+    AsyncMock,
+    MagicMock,
+    patch,
+)
 
 import pytest
 from fastapi import status
+from prometheus_client.parser import text_string_to_metric_families
 
 from src.controllers.schema import HealthResponse
+from src.services.readiness import ReadinessChecker
 
 
 @pytest.mark.asyncio
@@ -37,3 +43,67 @@ async def test_info_endpoint(async_client):
         response_data = response.json()
 
         assert response_data["app_name"] == "Test App"
+
+
+@pytest.mark.asyncio
+async def test_info_endpoint_reports_database_pool(async_client):
+    response = await async_client.get("/info")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert "initialized" in response.json()["database_pool"]
+
+
+@pytest.mark.asyncio
+async def test_info_endpoint_reports_state_cache(async_client):
+    response = await async_client.get("/info")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert {"hits", "misses", "evictions", "size"} <= set(response.json()["state_cache"])
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(db_session, async_client, auth_async_client):
+    await auth_async_client.get("/metrics_state")
+    await auth_async_client.request("LOCK", "/metrics_state/lock", json={"ID": "lock-1"})
+    await auth_async_client.request("LOCK", "/metrics_state/lock", json={"ID": "lock-2"})
+
+    response = await async_client.get("/metrics")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(response.text)
+        for sample in family.samples
+    }
+    http_labels = (("method", "GET"), ("route", "/{state_identifier}"), ("status", "200"))
+    assert samples[("http_request_duration_seconds_count", http_labels)] >= 1
+    db_labels = (("method", "lock"), ("repository", "RowLockRepository"))
+    assert samples[("db_query_duration_seconds_count", db_labels)] >= 2
+    assert samples[("state_lock_conflicts_total", (("operation", "lock"),))] >= 1
+    assert ("db_pool_connections", (("state", "checked_out"),)) in samples
+
+
+@pytest.mark.asyncio
+async def test_ready_endpoint(db_session, async_client):
+    with patch("src.services.readiness._readiness_checker", None):
+        response = await async_client.get("/ready")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["status"] == "ready"
+    assert set(response.json()["checks"]) == {"database", "storage"}
+    assert response.json()["checks"]["database"]["latency_ms"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_ready_endpoint_reports_failed_dependency(async_client):
+    checker = ReadinessChecker(
+        {"database": AsyncMock(side_effect=ConnectionError("pool exhausted"))}, ttl=60, timeout=1
+    )
+
+    with patch("src.services.readiness._readiness_checker", checker):
+        response = await async_client.get("/ready")
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.json()["status"] == "not_ready"
+    assert response.json()["checks"]["database"]["error"] == "pool exhausted"
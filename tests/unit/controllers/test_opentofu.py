@@ -1,5 +1,9 @@
+import asyncio
+import hashlib
 import json
+import logging
 from datetime import datetime
+from unittest.mock import patch
 
 import pytest
 from fastapi import status
@@ -27,6 +31,19 @@ async def test_get_state(db_session, auth_async_client):
     assert response_data["version"] == 4
 
 
+@pytest.mark.asyncio
+async def test_get_state_does_not_log_payload(db_session, auth_async_client, caplog):
+    service = StateService(db_session)
+    await service.save_state("logged_state", json.dumps(STATE_DATA).encode(), "test-operation-id")
+
+    with caplog.at_level(logging.DEBUG):
+        response = await auth_async_client.get("/logged_state")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert "test-lineage" not in caplog.text
+    assert "State read state=logged_state" in caplog.text
+
+
 @pytest.mark.asyncio
 async def test_save_state(db_session, auth_async_client):
     state_data = json.dumps(STATE_DATA)
@@ -41,6 +58,59 @@ async def test_save_state(db_session, auth_async_client):
     assert response.json() == {"status": "ok"}
 
 
+@pytest.mark.asyncio
+async def test_save_large_state(db_session, auth_async_client):
+    state_data = json.dumps(
+        {**STATE_DATA, "resources": [{"name": f"resource-{i}"} for i in range(400_000)]}
+    ).encode()
+
+    response = await auth_async_client.post(
+        "/large_state?ID=large-operation-id",
+        content=state_data,
+        headers={"Content-Type": "application/json"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+
+    response = await auth_async_client.get("/large_state")
+
+    assert response.content == state_data
+
+
+@pytest.mark.asyncio
+async def test_save_identical_state_reuses_blob(db_session, auth_async_client):
+    for operation_id in ("first-operation-id", "second-operation-id"):
+        response = await auth_async_client.post(
+            f"/deduplicated_state?ID={operation_id}",
+            content=json.dumps(STATE_DATA),
+            headers={"Content-Type": "application/json"},
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+    versions = (await auth_async_client.get("/deduplicated_state/versions")).json()["data"]
+
+    assert len(versions) == 2
+    assert versions[0]["storage_path"] == versions[1]["storage_path"]
+    assert versions[0]["state_hash"] in versions[0]["storage_path"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "content",
+    [b'{"version": 4', b"{abc}", b'{"a": nope}', b'{"a": 1,}', b'{"a": "line\nbreak"}'],
+)
+async def test_save_invalid_state(db_session, auth_async_client, content):
+    response = await auth_async_client.post(
+        "/invalid_state?ID=test-operation-id",
+        content=content,
+        headers={"Content-Type": "application/json"},
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "Invalid JSON" in response.json()["detail"]
+    assert (await auth_async_client.get("/invalid_state/versions")).json()["data"] == []
+
+
 @pytest.mark.asyncio
 async def test_lock_state(db_session, auth_async_client):
     lock_data = {
@@ -93,6 +163,39 @@ async def test_unlock_state(db_session, auth_async_client):
     assert response.json() == {"status": "ok"}
 
 
+@pytest.mark.asyncio
+async def test_lock_state_waits_for_release(db_session, auth_async_client):
+    service = StateService(db_session)
+    await service.lock_state("waited_state", LockRequestSchema(ID="holder"))
+
+    waiting = asyncio.create_task(
+        auth_async_client.request("LOCK", "/waited_state/lock?wait=5", json={"ID": "waiter"})
+    )
+    conflict = await auth_async_client.request(
+        "LOCK", "/waited_state/lock", json={"ID": "impatient"}
+    )
+    await service.unlock_state("waited_state", "holder")
+    response = await waiting
+
+    assert conflict.status_code == status.HTTP_409_CONFLICT
+    assert response.status_code == status.HTTP_200_OK
+    assert (await service.state_repo.get_by_name("waited_state")).lock_id == "waiter"
+
+
+@pytest.mark.asyncio
+async def test_renew_lock(db_session, auth_async_client):
+    service = StateService(db_session)
+    await service.lock_state("renewed_state", LockRequestSchema(ID="test-lock-id"))
+
+    renewed = await auth_async_client.post("/renewed_state/renew", json={"ID": "test-lock-id"})
+    conflict = await auth_async_client.post("/renewed_state/renew", json={"ID": "other-id"})
+    missing = await auth_async_client.post("/missing_state/renew", json={"ID": "test-lock-id"})
+
+    assert renewed.status_code == status.HTTP_200_OK
+    assert conflict.status_code == status.HTTP_409_CONFLICT
+    assert missing.status_code == status.HTTP_404_NOT_FOUND
+
+
 @pytest.mark.asyncio
 async def test_get_state_version(db_session, auth_async_client):
     service = StateService(db_session)
@@ -106,9 +209,213 @@ async def test_get_state_version(db_session, auth_async_client):
     assert response.json()["operation_id"] == "test-operation-id"
 
 
+@pytest.mark.asyncio
+async def test_download_state_version(db_session, auth_async_client):
+    service = StateService(db_session)
+    state_data = json.dumps(STATE_DATA).encode()
+    await service.save_state("download_state", state_data, "download-operation-id")
+    versions = await service.get_state_versions("download_state")
+
+    response = await auth_async_client.get(
+        f"/download_state/versions/{versions[0].id}/download",
+        headers={"Accept-Encoding": "identity"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert "content-encoding" not in response.headers
+    assert response.content == state_data
+
+
+@pytest.mark.asyncio
+async def test_get_state_gzip_encoded(db_session, auth_async_client):
+    service = StateService(db_session)
+    state_data = json.dumps(STATE_DATA).encode()
+    await service.save_state("gzip_state", state_data, "gzip-operation-id")
+
+    response = await auth_async_client.get("/gzip_state", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == state_data
+
+
 @pytest.mark.asyncio
 async def test_get_state_version_not_found(db_session, auth_async_client):
     response = await auth_async_client.get("/state_identifier/versions/999")
 
     assert response.status_code == status.HTTP_404_NOT_FOUND
     assert "not found" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_get_state_versions_paginated(db_session, auth_async_client):
+    service = StateService(db_session)
+    for operation in range(3):
+        await service.save_state(
+            "paginated_state", json.dumps(STATE_DATA).encode(), f"operation-{operation}"
+        )
+
+    response = await auth_async_client.get("/paginated_state/versions?limit=2")
+
+    assert response.status_code == status.HTTP_200_OK
+    first_page = response.json()
+    assert first_page["has_more"] is True
+    assert [version["operation_id"] for version in first_page["data"]] == [
+        "operation-2",
+        "operation-1",
+    ]
+
+    response = await auth_async_client.get(
+        f"/paginated_state/versions?limit=2&before_id={first_page['data'][-1]['id']}"
+    )
+
+    second_page = response.json()
+    assert second_page["has_more"] is False
+    assert [version["operation_id"] for version in second_page["data"]] == ["operation-0"]
+
+
+@pytest.mark.asyncio
+async def test_get_state_if_none_match(db_session, auth_async_client):
+    state_data = json.dumps(STATE_DATA).encode()
+    etag = f'"{hashlib.sha256(state_data).hexdigest()}"'
+    await StateService(db_session).save_state("etag_state", state_data, "etag-operation-id")
+
+    response = await auth_async_client.get("/etag_state", headers={"Accept-Encoding": "identity"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["etag"] == etag
+
+    with patch.object(StateService, "get_state_stream") as get_state_stream:
+        response = await auth_async_client.get("/etag_state", headers={"If-None-Match": etag})
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+    get_state_stream.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_state_if_none_match_stale(db_session, auth_async_client):
+    await StateService(db_session).save_state(
+        "stale_etag_state", json.dumps(STATE_DATA).encode(), "etag-operation-id"
+    )
+
+    response = await auth_async_client.get(
+        "/stale_etag_state", headers={"If-None-Match": '"outdated-hash"'}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == STATE_DATA
+
+
+@pytest.mark.asyncio
+async def test_get_state_version_if_none_match(db_session, auth_async_client):
+    service = StateService(db_session)
+    await service.save_state("version_etag_state", json.dumps(STATE_DATA).encode(), "etag-op")
+    version = (await service.get_state_versions("version_etag_state"))[0]
+
+    for path in (f"/versions/{version.id}", f"/versions/{version.id}/download"):
+        response = await auth_async_client.get(f"/version_etag_state{path}")
+        assert response.status_code == status.HTTP_200_OK
+        assert version.state_hash in response.headers["etag"]
+
+        response = await auth_async_client.get(
+            f"/version_etag_state{path}", headers={"If-None-Match": response.headers["etag"]}
+        )
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.asyncio
+async def test_save_state_if_match(db_session, auth_async_client):
+    response = await auth_async_client.post(
+        "/if_match_state?ID=first-operation-id", content=json.dumps(STATE_DATA)
+    )
+    etag = response.headers["etag"]
+
+    response = await auth_async_client.post(
+        "/if_match_state?ID=second-operation-id",
+        content=json.dumps({**STATE_DATA, "serial": 2}),
+        headers={"If-Match": etag},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["etag"] != etag
+
+    response = await auth_async_client.post(
+        "/if_match_state?ID=third-operation-id",
+        content=json.dumps({**STATE_DATA, "serial": 3}),
+        headers={"If-Match": etag},
+    )
+
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+    versions = (await auth_async_client.get("/if_match_state/versions")).json()["data"]
+    assert [version["operation_id"] for version in versions] == [
+        "second-operation-id",
+        "first-operation-id",
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "name, template",
+    [
+        ("weak_if_match_state", "W/{etag}"),
+        ("encoded_if_match_state", '"{state_hash}-gzip"'),
+        ("weak_encoded_if_match_state", 'W/"{state_hash}-gzip"'),
+    ],
+)
+async def test_save_state_if_match_uses_strong_comparison(
+    db_session, auth_async_client, name, template
+):
+    response = await auth_async_client.post(
+        f"/{name}?ID=first-operation-id", content=json.dumps(STATE_DATA)
+    )
+    etag = response.headers["etag"]
+
+    response = await auth_async_client.post(
+        f"/{name}?ID=second-operation-id",
+        content=json.dumps({**STATE_DATA, "serial": 2}),
+        headers={"If-Match": template.format(etag=etag, state_hash=etag.strip('"'))},
+    )
+
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+
+
+@pytest.mark.asyncio
+async def test_save_new_state_if_match(db_session, auth_async_client):
+    response = await auth_async_client.post(
+        "/new_if_match_state?ID=test-operation-id",
+        content=json.dumps(STATE_DATA),
+        headers={"If-Match": "*"},
+    )
+
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+
+
+@pytest.mark.asyncio
+async def test_read_states(db_session, auth_async_client):
+    service = StateService(db_session)
+    for serial, name in enumerate(["bulk_state_a", "bulk_state_b"]):
+        state_data = json.dumps({**STATE_DATA, "serial": serial}, indent=2).encode()
+        await service.save_state(name, state_data, f"operation-{serial}")
+
+    response = await auth_async_client.post(
+        "/_bulk/states", json={"names": ["bulk_state_a", "bulk_state_b", "bulk_state_missing"]}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = {line["name"]: line for line in map(json.loads, response.text.splitlines())}
+    assert lines["bulk_state_a"]["state"] == {**STATE_DATA, "serial": 0}
+    assert lines["bulk_state_b"]["state"] == {**STATE_DATA, "serial": 1}
+    assert len(lines["bulk_state_b"]["state_hash"]) == 64
+    assert lines["bulk_state_missing"] == {"name": "bulk_state_missing", "state": None}
+
+
+@pytest.mark.asyncio
+async def test_read_states_rejects_too_many_names(auth_async_client, test_settings):
+    names = [f"state_{index}" for index in range(test_settings.BULK_READ_MAX_STATES + 1)]
+
+    response = await auth_async_client.post("/_bulk/states", json={"names": names})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
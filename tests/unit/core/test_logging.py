@@ -0,0 +1,88 @@
+import io
+import logging
+import logging.handlers
+import queue
+import threading
+
+import pytest
+
+from src.core.logging import (
+    DebugSamplingFilter,
+    DeferredQueueHandler,
+    LogFields,
+    log_duration,
+    setup_logging,
+)
+from src.core.settings import Settings, get_settings
+
+
+def make_record(level: int) -> logging.LogRecord:
+    return logging.LogRecord("test", level, __file__, 1, "message", None, None)
+
+
+def test_log_fields_render_as_key_value():
+    assert str(LogFields(state="test-state", size=42)) == "state=test-state size=42"
+
+
+def test_log_duration_emits_fields(caplog):
+    test_logger = logging.getLogger("test.log_duration")
+
+    with caplog.at_level(logging.INFO, logger="test.log_duration"):
+        with log_duration(test_logger, "State read", state="test-state") as log_fields:
+            log_fields["size"] = 42
+
+    record = caplog.records[-1]
+    assert record.getMessage().startswith("State read state=test-state size=42 duration_ms=")
+    assert record.state == "test-state"
+    assert record.size == 42
+    assert record.duration_ms >= 0
+
+
+def test_log_duration_skips_disabled_level(caplog):
+    test_logger = logging.getLogger("test.log_duration.disabled")
+
+    with caplog.at_level(logging.INFO, logger="test.log_duration.disabled"):
+        with log_duration(test_logger, "State chunk", level=logging.DEBUG):
+            pass
+
+    assert not caplog.records
+
+
+def test_debug_sampling_filter():
+    assert DebugSamplingFilter(0).filter(make_record(logging.DEBUG)) is False
+    assert DebugSamplingFilter(0).filter(make_record(logging.INFO)) is True
+    assert DebugSamplingFilter(1).filter(make_record(logging.DEBUG)) is True
+
+
+@pytest.fixture
+def restore_logging():
+    yield
+    setup_logging(get_settings())
+
+
+def test_log_level_applies_to_application_loggers_only(restore_logging):
+    setup_logging(Settings(LOG_LEVEL="DEBUG", LOG_QUEUE_ENABLED=False))
+
+    assert logging.getLogger("src.services.state").isEnabledFor(logging.DEBUG)
+    assert not logging.getLogger("sqlalchemy.engine").isEnabledFor(logging.DEBUG)
+
+
+def test_deferred_queue_handler_formats_on_listener_thread():
+    rendered_on = []
+
+    class Fields(LogFields):
+        def __str__(self):
+            rendered_on.append(threading.current_thread())
+            return super().__str__()
+
+    log_queue = queue.SimpleQueue()
+    output = io.StringIO()
+    listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler(output))
+    listener.start()
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "%s", (Fields(size=1),), None)
+
+    DeferredQueueHandler(log_queue).handle(record)
+    listener.stop()
+
+    assert output.getvalue() == "size=1\n"
+    assert rendered_on and threading.current_thread() not in rendered_on
@@ -0,0 +1,54 @@
+import pytest
+from prometheus_client import (
+    CollectorRegistry,
+    Histogram,
+    generate_latest,
+)
+
+from src.core.metrics import (
+    CallbackGauge,
+    observe_duration,
+    render_metrics,
+)
+from src.db.session import DB_POOL_CONNECTIONS
+
+
+@pytest.mark.asyncio
+async def test_observe_duration_labels_repository_method():
+    registry = CollectorRegistry()
+    histogram = Histogram("query_seconds", "Queries", ["repository", "method"], registry=registry)
+
+    class ExampleRepository:
+        @observe_duration(histogram)
+        async def get_by_name(self, name):
+            return name
+
+    assert await ExampleRepository().get_by_name("state") == "state"
+    assert (
+        registry.get_sample_value(
+            "query_seconds_count", {"repository": "ExampleRepository", "method": "get_by_name"}
+        )
+        == 1
+    )
+
+
+def test_callback_gauge_reads_values_at_scrape_time():
+    registry = CollectorRegistry()
+    values = {("a",): 1.0}
+    CallbackGauge("entries", "Entries", ["kind"], lambda: values, registry=registry)
+
+    values[("b",)] = 2.0
+
+    assert registry.get_sample_value("entries", {"kind": "a"}) == 1
+    assert registry.get_sample_value("entries", {"kind": "b"}) == 2
+    assert b'entries{kind="b"} 2.0' in generate_latest(registry)
+
+
+def test_render_metrics_merges_worker_files_in_multiprocess_mode(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+
+    output = render_metrics().decode()
+
+    # Worker samples come from the (here empty) directory; per-process gauges are still served.
+    assert "db_query_duration_seconds" not in output
+    assert f"# TYPE {DB_POOL_CONNECTIONS.name} gauge" in output
@@ -0,0 +1,12 @@
+import threading
+
+import pytest
+
+from src.core.offload import run_offloaded
+
+
+@pytest.mark.asyncio
+async def test_run_offloaded_runs_in_offload_pool():
+    thread_name = await run_offloaded(lambda: threading.current_thread().name)
+
+    assert thread_name.startswith("state-offload")
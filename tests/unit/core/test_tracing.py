@@ -0,0 +1,74 @@
+import json
+
+import pytest
+from fastapi import status
+
+from src.core.settings import Settings
+from src.core.tracing import (
+    setup_tracing,
+    shutdown_tracing,
+    trace_span,
+)
+
+pytest.importorskip("opentelemetry.sdk")
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    setup_tracing(
+        Settings(TRACING_ENABLED=True, TRACING_EXPORTER="file", TRACING_FILE_PATH=str(path))
+    )
+    yield path
+    shutdown_tracing()
+
+
+def read_spans(path):
+    shutdown_tracing()
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_trace_span_without_tracer_yields_fields():
+    shutdown_tracing()
+
+    with trace_span("noop", state="test") as span_fields:
+        span_fields["size"] = 1
+
+    assert span_fields == {"state": "test", "size": 1}
+
+
+def test_trace_span_records_nested_spans_with_attributes(trace_file):
+    with trace_span("outer", state="test") as span_fields:
+        with trace_span("inner"):
+            pass
+        span_fields["size"] = 42
+        span_fields["hash"] = None
+
+    inner, outer = read_spans(trace_file)
+
+    assert outer["name"] == "outer"
+    assert outer["attributes"] == {"state": "test", "size": 42}
+    assert inner["parent_id"] == outer["context"]["span_id"]
+
+
+@pytest.mark.asyncio
+async def test_save_state_request_is_traced_by_stage(trace_file, db_session, auth_async_client):
+    state_data = json.dumps({"version": 4, "serial": 1, "lineage": "traced"})
+    traceparent = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+    response = await auth_async_client.post(
+        "/traced_state?ID=test-operation-id",
+        content=state_data,
+        headers={"Content-Type": "application/json", "traceparent": traceparent},
+    )
+    spans = {span["name"]: span for span in read_spans(trace_file)}
+
+    assert response.status_code == status.HTTP_200_OK
+    request_span = spans["POST /{state_identifier}"]
+    assert request_span["context"]["trace_id"] == "0x0af7651916cd43dd8448eb211c80319c"
+    assert request_span["attributes"]["http.response.status_code"] == 200
+    assert spans["state.save"]["parent_id"] == request_span["context"]["span_id"]
+    assert spans["state.upload"]["attributes"]["size"] == len(state_data)
+    assert "validate_ms" in spans["state.upload"]["attributes"]
+    assert len(spans["state.upload"]["attributes"]["hash"]) == 64
+    assert {"state.record", "db.commit", "db.StateVersionRepository.create_version"} <= set(spans)
@@ -0,0 +1,25 @@
+import pytest
+
+from src.db import session as db_session_module
+
+
+@pytest.mark.asyncio
+async def test_engine_is_shared_between_sessions(test_settings):
+    sessions = []
+    for _ in range(2):
+        async for session in db_session_module.get_session():
+            sessions.append(session)
+
+    assert sessions[0].bind is sessions[1].bind
+    assert db_session_module.get_engine() is sessions[0].bind
+
+
+@pytest.mark.asyncio
+async def test_pool_status(test_settings):
+    db_session_module.init_engine()
+
+    pool_status = db_session_module.get_pool_status()
+
+    assert pool_status["initialized"] is True
+    assert pool_status["size"] == test_settings.DB_POOL_SIZE
+    assert pool_status["checked_out"] == 0
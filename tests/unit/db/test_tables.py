@@ -0,0 +1,13 @@
+from src.db.tables import StateVersion
+
+
+def test_state_versions_listing_index_covers_every_column():
+    index = next(
+        index
+        for index in StateVersion.__table__.indexes
+        if index.name == "ix_state_versions_state_id_created_at"
+    )
+    key_columns = {column.name for column in index.columns}
+    included_columns = set(index.dialect_options["postgresql"]["include"])
+
+    assert key_columns | included_columns == set(StateVersion.__table__.columns.keys())
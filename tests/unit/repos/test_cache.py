@@ -0,0 +1,61 @@
+from unittest.mock import patch
+
+import pytest
+
+from src.repos.cache import MemoryCacheRepository, RedisCacheRepository
+
+
+@pytest.fixture(params=["memory", "redis"])
+def cache_repository(request):
+    if request.param == "memory":
+        return MemoryCacheRepository()
+
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisCacheRepository(client=fakeredis.FakeAsyncRedis())
+
+
+@pytest.mark.asyncio
+async def test_set_and_get_many(cache_repository):
+    await cache_repository.set("key-1", b"value-1")
+    await cache_repository.set("key-2", b"value-2", ttl=60)
+
+    assert await cache_repository.get_many(["key-1", "missing", "key-2"]) == [
+        b"value-1",
+        None,
+        b"value-2",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_incr_and_delete(cache_repository):
+    assert await cache_repository.incr("counter") == 1
+    assert await cache_repository.incr("counter") == 2
+    assert await cache_repository.incr("counter", -2, ttl=60) == 0
+
+    await cache_repository.delete("counter")
+
+    assert await cache_repository.get("counter") is None
+
+
+@pytest.mark.asyncio
+async def test_memory_entries_expire():
+    cache_repository = MemoryCacheRepository()
+
+    with patch("src.repos.cache.memory_repos.time.monotonic", return_value=100.0):
+        await cache_repository.set("key", b"value", ttl=10)
+        assert await cache_repository.get("key") == b"value"
+
+    with patch("src.repos.cache.memory_repos.time.monotonic", return_value=110.0):
+        assert await cache_repository.get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_memory_incr_with_ttl_expires():
+    cache_repository = MemoryCacheRepository()
+
+    with patch("src.repos.cache.memory_repos.time.monotonic", return_value=100.0):
+        assert await cache_repository.incr("counter", ttl=10) == 1
+        assert await cache_repository.incr("counter") == 2
+
+    with patch("src.repos.cache.memory_repos.time.monotonic", return_value=110.0):
+        assert await cache_repository.get("counter") is None
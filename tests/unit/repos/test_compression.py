@@ -0,0 +1,123 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from src.core.settings import CompressionType, get_settings
+from src.repos.storage import compression
+from src.repos.storage.compression import (
+    GzipCodec,
+    IdentityCodec,
+    ZstdCodec,
+    get_codec,
+)
+
+STATE_DATA = json.dumps(
+    {"version": 4, "resources": [{"name": f"r{i}"} for i in range(1000)]}
+).encode()
+
+
+async def _chunks(data: bytes, chunk_size: int = 1024):
+    for start in range(0, len(data), chunk_size):
+        yield data[start : start + chunk_size]
+
+
+async def _collect(chunks) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
+
+
+def _codecs():
+    codecs = [IdentityCodec(), GzipCodec(level=3)]
+    try:
+        codecs.append(ZstdCodec(level=3))
+    except ValueError:
+        pass
+    return codecs
+
+
+@pytest.mark.parametrize("codec", _codecs(), ids=lambda codec: codec.name.value)
+def test_round_trip(codec):
+    assert codec.decompress(codec.compress(STATE_DATA)) == STATE_DATA
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("offload_size", [None, 512])
+@pytest.mark.parametrize("codec", _codecs(), ids=lambda codec: codec.name.value)
+async def test_stream_round_trip(codec, offload_size):
+    compressed = await _collect(codec.compress_stream(_chunks(STATE_DATA), offload_size))
+    decompressed = await _collect(codec.decompress_stream(_chunks(compressed, 100)))
+
+    assert decompressed == STATE_DATA
+    assert codec.decompress(compressed) == STATE_DATA
+
+
+def test_gzip_compresses_state():
+    assert len(GzipCodec(level=3).compress(STATE_DATA)) < len(STATE_DATA) / 5
+
+
+@pytest.fixture
+def configure_codec():
+    patchers = []
+
+    def configure(**settings):
+        get_codec.cache_clear()
+        patcher = patch.object(
+            compression, "get_settings", return_value=get_settings().model_copy(update=settings)
+        )
+        patcher.start()
+        patchers.append(patcher)
+
+    yield configure
+    for patcher in patchers:
+        patcher.stop()
+    get_codec.cache_clear()
+
+
+@pytest.fixture
+def dictionary_dir(tmp_path):
+    zstandard = pytest.importorskip("zstandard")
+    samples = [
+        json.dumps({"version": 4, "serial": serial, "resources": [{"name": f"r{i}"}]}).encode()
+        for serial in range(200)
+        for i in range(serial % 7)
+    ]
+    for size in (4096, 8192):
+        dictionary = zstandard.train_dictionary(size, samples)
+        (tmp_path / f"{dictionary.dict_id()}.zdict").write_bytes(dictionary.as_bytes())
+    return tmp_path
+
+
+def test_blobs_stay_readable_after_dictionary_changes(configure_codec, dictionary_dir):
+    first, second = sorted(dictionary_dir.iterdir())
+    configure_codec(
+        STORAGE_COMPRESSION=CompressionType.ZSTD, STORAGE_ZSTD_DICTIONARY_PATH=str(first)
+    )
+    writer = get_codec()
+    stored = writer.compress(STATE_DATA)
+
+    assert writer.identifier == f"zstd:{first.stem}"
+
+    configure_codec(
+        STORAGE_COMPRESSION=CompressionType.ZSTD,
+        STORAGE_ZSTD_DICTIONARY_PATH=str(second),
+        STORAGE_ZSTD_DICTIONARY_DIR=str(dictionary_dir),
+    )
+
+    assert get_codec().identifier == f"zstd:{second.stem}"
+    assert get_codec(writer.identifier).decompress(stored) == STATE_DATA
+
+
+def test_missing_dictionary_is_reported(configure_codec, dictionary_dir):
+    configure_codec(STORAGE_ZSTD_DICTIONARY_DIR=str(dictionary_dir))
+
+    with pytest.raises(ValueError, match="zstd dictionary 1 not found"):
+        get_codec("zstd:1")
+
+
+def test_zstd_falls_back_to_gzip_without_zstandard(configure_codec):
+    configure_codec(STORAGE_COMPRESSION=CompressionType.ZSTD)
+
+    with patch.object(compression, "zstandard", None):
+        codec = get_codec()
+
+    assert codec.identifier == "gzip"
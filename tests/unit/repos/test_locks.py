@@ -0,0 +1,256 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import (
+    func,
+    select,
+    update,
+)
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.controllers.schema import LockRequestSchema
+from src.db.tables import State, StateLock
+from src.repos.locks import (
+    AdvisoryLockRepository,
+    RowLockRepository,
+)
+from src.repos.locks.advisory_repos import ADVISORY_LOCK_SEED
+from src.repos.locks.base import lease_now
+from src.repos.state import StateRepository
+
+LOCK_TABLES = {RowLockRepository: State, AdvisoryLockRepository: StateLock}
+
+
+@pytest.fixture(params=[RowLockRepository, AdvisoryLockRepository])
+def lock_repository_class(request):
+    return request.param
+
+
+async def _expire_lock(session: AsyncSession, table, name: str, seconds: int) -> None:
+    await session.execute(
+        update(table)
+        .where(table.name == name)
+        .values(locked_at=lease_now() - timedelta(seconds=seconds))
+    )
+    await session.commit()
+
+
+async def _lock_concurrently(db_engine, repository_class, state_name: str, attempts: int) -> list:
+    factory = async_sessionmaker(bind=db_engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def try_lock(attempt: int) -> bool:
+        async with factory() as session:
+            lock_data = LockRequestSchema(ID=f"lock-{attempt}", Who=f"runner-{attempt}")
+            return await repository_class(session).lock(state_name, lock_data)
+
+    return await asyncio.gather(*(try_lock(attempt) for attempt in range(attempts)))
+
+
+@pytest.mark.asyncio
+async def test_row_lock_unlock_state(db_session):
+    state_repo = StateRepository(db_session)
+    repo = RowLockRepository(db_session)
+
+    state_name = "lock-test-state"
+    path = "test/path"
+
+    await state_repo.save_state(state_name)
+
+    lock_data = LockRequestSchema(
+        ID="test-lock-id",
+        Path=path,
+        Operation="test",
+        Info="Test lock",
+        Who="test-user",
+        Version="1.0",
+        created=datetime.now(),
+    )
+
+    lock_result = await repo.lock(state_name, lock_data)
+    assert lock_result is True
+
+    state = await state_repo.get_by_name(state_name)
+
+    assert state.lock_id == lock_data.Id
+    assert state.locked_by == lock_data.who
+    assert state.locked_at == lock_data.created
+
+    unlock_result = await repo.unlock(state_name, lock_data.Id)
+
+    assert unlock_result is True
+
+    state = await state_repo.get_by_name(state_name)
+
+    assert state.lock_id is None
+    assert state.locked_by is None
+    assert state.locked_at is None
+
+
+@pytest.mark.asyncio
+async def test_row_lock_creates_state(db_session):
+    repo = RowLockRepository(db_session)
+    state_name = "new-test-state"
+
+    lock_data = LockRequestSchema(
+        ID="new-state-lock-id",
+        Path="test/path",
+        Operation="test",
+        Info="Test lock",
+        Who="test-user",
+        Version="1.0",
+        created=datetime.now(),
+    )
+
+    lock_result = await repo.lock(state_name, lock_data)
+
+    assert lock_result is True
+
+    state = await StateRepository(db_session).get_by_name(state_name)
+
+    assert state is not None
+    assert state.name == state_name
+    assert state.lock_id == lock_data.Id
+    assert state.locked_by == lock_data.who
+
+
+@pytest.mark.asyncio
+async def test_advisory_lock_keeps_metadata_out_of_states(db_session):
+    repo = AdvisoryLockRepository(db_session)
+    lock_data = LockRequestSchema(ID="advisory-id", Who="ci", Operation="apply", Info="plan")
+
+    assert await repo.lock("advisory-state", lock_data) is True
+
+    lock = await db_session.get(StateLock, "advisory-state")
+    assert (lock.lock_id, lock.locked_by, lock.operation, lock.info) == (
+        "advisory-id",
+        "ci",
+        "apply",
+        "plan",
+    )
+    assert await StateRepository(db_session).get_by_name("advisory-state") is None
+
+    assert await repo.unlock("advisory-state", "advisory-id") is True
+    db_session.expunge_all()
+    assert await db_session.get(StateLock, "advisory-state") is None
+
+
+@pytest.mark.asyncio
+async def test_advisory_lock_fails_fast_while_key_is_held(db_engine, db_session):
+    factory = async_sessionmaker(bind=db_engine, class_=AsyncSession)
+
+    async with factory() as holder, holder.begin():
+        await holder.execute(
+            select(
+                func.pg_advisory_xact_lock(
+                    func.hashtextextended("contended-state", ADVISORY_LOCK_SEED)
+                )
+            )
+        )
+        locked = await AdvisoryLockRepository(db_session).lock(
+            "contended-state", LockRequestSchema(ID="runner")
+        )
+
+    assert locked is False
+    assert (
+        await AdvisoryLockRepository(db_session).lock(
+            "contended-state", LockRequestSchema(ID="runner")
+        )
+        is True
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lock_on_new_state(db_engine, db_session, lock_repository_class):
+    results = await _lock_concurrently(
+        db_engine, lock_repository_class, "concurrent-new-state", attempts=200
+    )
+
+    assert results.count(True) == 1
+
+    table = LOCK_TABLES[lock_repository_class]
+    result = await db_session.execute(
+        select(table.lock_id).where(table.name == "concurrent-new-state")
+    )
+    assert result.scalar_one() == f"lock-{results.index(True)}"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lock_on_released_state(db_engine, db_session, lock_repository_class):
+    repo = lock_repository_class(db_session)
+    await repo.lock("concurrent-existing-state", LockRequestSchema(ID="first"))
+    await repo.unlock("concurrent-existing-state", "first")
+
+    results = await _lock_concurrently(
+        db_engine, lock_repository_class, "concurrent-existing-state", attempts=200
+    )
+
+    assert results.count(True) == 1
+
+    winner = f"lock-{results.index(True)}"
+    assert await repo.unlock("concurrent-existing-state", "wrong-lock-id") is False
+    assert await repo.unlock("concurrent-existing-state", winner) is True
+    assert await repo.unlock("missing-state", winner) is None
+
+
+@pytest.mark.asyncio
+async def test_expired_lock_can_be_taken_over(db_session, lock_repository_class):
+    repo = lock_repository_class(db_session)
+    table = LOCK_TABLES[lock_repository_class]
+    await repo.lock("leased-state", LockRequestSchema(ID="crashed-runner"))
+    await _expire_lock(db_session, table, "leased-state", seconds=120)
+
+    assert await repo.lock("leased-state", LockRequestSchema(ID="next-runner")) is False
+    assert await repo.lock("leased-state", LockRequestSchema(ID="next-runner"), 300) is False
+    assert await repo.lock("leased-state", LockRequestSchema(ID="next-runner"), 60) is True
+    assert await repo.unlock("leased-state", "crashed-runner") is False
+
+
+@pytest.mark.asyncio
+async def test_leased_lock_is_timed_by_database_clock(db_session, lock_repository_class):
+    repo = lock_repository_class(db_session)
+    table = LOCK_TABLES[lock_repository_class]
+    # A client whose clock is a day behind must not start an already expired lease.
+    lock_data = LockRequestSchema(ID="skewed-runner", Created=datetime.now() - timedelta(days=1))
+
+    assert await repo.lock("skewed-state", lock_data, 60) is True
+
+    locked_at, database_now = (
+        await db_session.execute(
+            select(table.locked_at, lease_now()).where(table.name == "skewed-state")
+        )
+    ).one()
+    assert abs(database_now - locked_at) < timedelta(seconds=5)
+    assert await repo.lock("skewed-state", LockRequestSchema(ID="other"), 60) is False
+
+
+@pytest.mark.asyncio
+async def test_renew_lock(db_session, lock_repository_class):
+    repo = lock_repository_class(db_session)
+    table = LOCK_TABLES[lock_repository_class]
+    await repo.lock("renewed-state", LockRequestSchema(ID="runner"))
+    await _expire_lock(db_session, table, "renewed-state", seconds=120)
+
+    assert await repo.renew_lock("renewed-state", "runner") is True
+    assert await repo.lock("renewed-state", LockRequestSchema(ID="other"), 60) is False
+    assert await repo.renew_lock("renewed-state", "other") is False
+    assert await repo.renew_lock("missing-state", "runner") is None
+
+
+@pytest.mark.asyncio
+async def test_release_expired_locks_in_batches(db_session, lock_repository_class):
+    repo = lock_repository_class(db_session)
+    table = LOCK_TABLES[lock_repository_class]
+    for index in range(3):
+        await repo.lock(f"expired-{index}", LockRequestSchema(ID=f"lock-{index}"))
+        await _expire_lock(db_session, table, f"expired-{index}", seconds=120 + index)
+    await repo.lock("active", LockRequestSchema(ID="active-lock"))
+
+    first = await repo.release_expired_locks(60, batch_size=2)
+    second = await repo.release_expired_locks(60, batch_size=2)
+
+    assert set(first) == {"expired-2", "expired-1"}
+    assert second == ["expired-0"]
+    assert await repo.release_expired_locks(60, batch_size=2) == []
+    assert await repo.renew_lock("expired-0", "lock-0") in (False, None)
+    assert await repo.renew_lock("active", "active-lock") is True
@@ -1,9 +1,11 @@
-from datetime import datetime
-
 import pytest
 
-from src.controllers.schema import LockRequestSchema
-from src.repos.state import StateRepository
+from src.repos.state import (
+    StateBlobRepository,
+    StateRepository,
+    StateVersionRepository,
+)
+from src.repos.state.schema import LatestStateVersionSchema
 
 
 @pytest.mark.asyncio
@@ -33,66 +35,141 @@ async def test_get_state_by_name(db_session):
 
 
 @pytest.mark.asyncio
-async def test_lock_unlock_state(db_session):
+async def test_get_latest_version(db_session):
     repo = StateRepository(db_session)
+    version_repo = StateVersionRepository(db_session)
+    state_name = "latest-version-state"
 
-    state_name = "lock-test-state"
-    path = "test/path"
+    state = await repo.save_state(state_name)
+    await version_repo.create_version(state.name, "hash-1", "states/hash-1", "op-1")
+    latest = await version_repo.create_version(state.name, "hash-2", "states/hash-2", "op-2")
+
+    result = await version_repo.get_latest_version(state_name)
+
+    assert result is not None
+    assert result.id == latest.id
+    assert result.state_hash == "hash-2"
+
+    saved_state = await repo.get_by_name(state_name)
+    await db_session.refresh(saved_state)
+    assert saved_state.latest_version_id == latest.id
 
-    await repo.save_state(state_name)
 
-    lock_data = LockRequestSchema(
-        ID="test-lock-id",
-        Path=path,
-        Operation="test",
-        Info="Test lock",
-        Who="test-user",
-        Version="1.0",
-        created=datetime.now(),
+@pytest.mark.asyncio
+async def test_create_version_with_stale_expected_version(db_session):
+    repo = StateRepository(db_session)
+    version_repo = StateVersionRepository(db_session)
+    state = await repo.save_state("expected-version-state")
+    first = await version_repo.create_version(state.name, "hash-1", "states/hash-1", "op-1")
+    await version_repo.create_version(
+        state.name, "hash-2", "states/hash-2", "op-2", expected_latest_version_id=first.id
     )
 
-    lock_result = await repo.lock(state_name, lock_data)
-    assert lock_result is True
+    result = await version_repo.create_version(
+        state.name, "hash-3", "states/hash-3", "op-3", expected_latest_version_id=first.id
+    )
 
-    state = await repo.get_by_name(state_name)
+    assert result is None
+    latest = await version_repo.get_latest_version("expected-version-state")
+    assert latest.state_hash == "hash-2"
+    assert len(await version_repo.get_versions_by_state_id(state.id)) == 2
+    assert await StateBlobRepository(db_session).get_by_hash("hash-3") is None
 
-    assert state.lock_id == lock_data.Id
-    assert state.locked_by == lock_data.who
-    assert state.locked_at is not None
 
-    unlock_result = await repo.unlock(state_name, lock_data.Id)
+@pytest.mark.asyncio
+async def test_create_version_creates_state_and_reuses_blob(db_session):
+    version_repo = StateVersionRepository(db_session)
+    blob_repo = StateBlobRepository(db_session)
 
-    assert unlock_result is True
+    first = await version_repo.create_version(
+        "created-by-version", "shared-hash", "blobs/sha256/shared-hash", "op-1", "gzip", size=10
+    )
+    second = await version_repo.create_version(
+        "created-by-version", "shared-hash", "blobs/sha256/other", "op-2", "identity", size=10
+    )
 
-    state = await repo.get_by_name(state_name)
+    state = await StateRepository(db_session).get_by_name("created-by-version")
+    await db_session.refresh(state)
+    assert state.latest_version_id == second.id
+    assert first.state_id == second.state_id == state.id
+    assert (second.storage_path, second.codec) == ("blobs/sha256/shared-hash", "gzip")
+    assert (await blob_repo.get_by_hash("shared-hash")).ref_count == 2
 
-    assert state.lock_id is None
-    assert state.locked_by is None
-    assert state.locked_at is None
+
+@pytest.mark.asyncio
+async def test_get_latest_version_unknown_state(db_session):
+    version_repo = StateVersionRepository(db_session)
+
+    assert await version_repo.get_latest_version("unknown-state") is None
 
 
 @pytest.mark.asyncio
-async def test_create_state_on_lock(db_session):
-    repo = StateRepository(db_session)
-    state_name = "new-test-state"
-
-    lock_data = LockRequestSchema(
-        ID="new-state-lock-id",
-        Path="test/path",
-        Operation="test",
-        Info="Test lock",
-        Who="test-user",
-        Version="1.0",
-        created=datetime.now(),
+async def test_get_latest_versions(db_session):
+    version_repo = StateVersionRepository(db_session)
+    plain = await version_repo.create_version(
+        "bulk-plain", "bulk-1", "blobs/bulk-1", "op-1", size=10
+    )
+    snapshot = await version_repo.create_version(
+        "bulk-delta", "bulk-2", "blobs/bulk-2", "op-2", size=20
+    )
+    delta = await version_repo.create_version(
+        "bulk-delta", "bulk-3", "deltas/bulk-3", "op-3", base_version_id=snapshot.id
     )
 
-    lock_result = await repo.lock(state_name, lock_data)
+    result = await version_repo.get_latest_versions(["bulk-plain", "bulk-delta", "bulk-unknown"])
 
-    assert lock_result is True
+    assert result == {
+        "bulk-plain": LatestStateVersionSchema(version=plain, size=10),
+        "bulk-delta": LatestStateVersionSchema(version=delta, base_version=snapshot, size=20),
+    }
 
-    state = await repo.get_by_name(state_name)
 
-    assert state is not None
-    assert state.name == state_name
-    assert state.lock_id == lock_data.Id
-    assert state.locked_by == lock_data.who
+@pytest.mark.asyncio
+async def test_get_latest_snapshot(db_session):
+    repo = StateRepository(db_session)
+    version_repo = StateVersionRepository(db_session)
+    state_name = "snapshot-state"
+
+    assert await version_repo.get_latest_snapshot(state_name) == (None, 0)
+
+    state = await repo.save_state(state_name)
+    snapshot = await version_repo.create_version(state.name, "hash-1", "blobs/hash-1", "op-1")
+    for index in range(2, 4):
+        await version_repo.create_version(
+            state.name,
+            f"hash-{index}",
+            f"deltas/hash-{index}",
+            f"op-{index}",
+            base_version_id=snapshot.id,
+        )
+
+    result, versions_since = await version_repo.get_latest_snapshot(state_name)
+
+    assert result.id == snapshot.id
+    assert versions_since == 2
+
+
+@pytest.mark.asyncio
+async def test_get_versions_keyset_pagination(db_session):
+    repo = StateRepository(db_session)
+    version_repo = StateVersionRepository(db_session)
+
+    state = await repo.save_state("paginated-state")
+    created = [
+        await version_repo.create_version(state.name, f"hash-{i}", f"states/hash-{i}", f"op-{i}")
+        for i in range(5)
+    ]
+    ids_newest_first = [version.id for version in reversed(created)]
+
+    first_page = await version_repo.get_versions_by_state_id(state.id, limit=2)
+    assert [version.id for version in first_page] == ids_newest_first[:2]
+
+    older_page = await version_repo.get_versions_by_state_id(
+        state.id, limit=2, before_id=first_page[-1].id
+    )
+    assert [version.id for version in older_page] == ids_newest_first[2:4]
+
+    newer_page = await version_repo.get_versions_by_state_id(
+        state.id, limit=2, after_id=older_page[-1].id
+    )
+    assert [version.id for version in newer_page] == ids_newest_first[1:3]
@@ -1,6 +1,7 @@
 from unittest.mock import AsyncMock, patch
 
 import pytest
+from botocore.exceptions import ClientError
 
 from src.repos.storage import MinioStorageRepository
 
@@ -20,14 +21,7 @@ def mock_s3_client():
 @pytest.fixture
 def storage_repo(mock_s3_client):
     repo = MinioStorageRepository()
-    with patch.object(
-        repo,
-        "_get_client",
-        return_value=AsyncMock(
-            __aenter__=AsyncMock(return_value=mock_s3_client),
-            __aexit__=AsyncMock(),
-        ),
-    ):
+    with patch.object(repo, "_get_client", return_value=mock_s3_client):
         yield repo
 
 
@@ -41,6 +35,21 @@ async def test_get(storage_repo, mock_s3_client):
     )
 
 
+@pytest.mark.asyncio
+async def test_get_stream(storage_repo, mock_s3_client):
+    async def iter_chunks(chunk_size):
+        yield b'{"version": '
+        yield b"4}"
+
+    mock_s3_client.get_object.return_value["Body"].iter_chunks = iter_chunks
+    mock_s3_client.get_object.return_value["ContentLength"] = 14
+
+    stream = await storage_repo.get_stream("test-path", chunk_size=16)
+
+    assert stream.content_length == 14
+    assert b"".join([chunk async for chunk in stream.chunks]) == b'{"version": 4}'
+
+
 @pytest.mark.asyncio
 async def test_put(storage_repo, mock_s3_client):
     test_data = b'{"version": 4}'
@@ -59,3 +68,116 @@ async def test_ensure_bucket_exists(storage_repo, mock_s3_client):
     await storage_repo.ensure_bucket_exists()
 
     mock_s3_client.head_bucket.assert_called_once_with(Bucket=storage_repo.bucket_name)
+
+
+@pytest.mark.asyncio
+async def test_ensure_bucket_exists_is_checked_once(storage_repo, mock_s3_client):
+    await storage_repo.ensure_bucket_exists()
+    await storage_repo.ensure_bucket_exists()
+
+    mock_s3_client.head_bucket.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_ping_checks_bucket_every_time(storage_repo, mock_s3_client):
+    await storage_repo.ensure_bucket_exists()
+    await storage_repo.ping()
+    await storage_repo.ping()
+
+    assert mock_s3_client.head_bucket.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_put_recreates_missing_bucket(storage_repo, mock_s3_client):
+    await storage_repo.ensure_bucket_exists()
+    mock_s3_client.head_bucket.side_effect = ClientError({"Error": {"Code": "404"}}, "HeadBucket")
+    mock_s3_client.put_object.side_effect = [
+        ClientError({"Error": {"Code": "NoSuchBucket"}}, "PutObject"),
+        None,
+    ]
+
+    await storage_repo.put("test-path", b'{"version": 4}')
+
+    mock_s3_client.create_bucket.assert_called_once_with(Bucket=storage_repo.bucket_name)
+    assert mock_s3_client.put_object.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_client_is_reused_between_operations(mock_s3_client):
+    repo = MinioStorageRepository()
+    client_context = AsyncMock(
+        __aenter__=AsyncMock(return_value=mock_s3_client),
+        __aexit__=AsyncMock(return_value=None),
+    )
+
+    with patch.object(repo.session, "create_client", return_value=client_context) as create:
+        await repo.get("test-path")
+        await repo.put("test-path", b'{"version": 4}')
+        await repo.delete("test-path")
+
+        create.assert_called_once()
+
+        await repo.close()
+
+        client_context.__aexit__.assert_awaited_once()
+        assert repo._client is None
+
+
+async def _chunks(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.mark.asyncio
+async def test_put_stream_small_body_uses_single_put(storage_repo, mock_s3_client):
+    await storage_repo.put_stream("test-path", _chunks(b'{"version"', b": 4}"))
+
+    mock_s3_client.create_multipart_upload.assert_not_called()
+    mock_s3_client.put_object.assert_called_once_with(
+        Bucket=storage_repo.bucket_name,
+        Key="test-path",
+        Body=b'{"version": 4}',
+        ContentType="application/json",
+    )
+
+
+@pytest.mark.asyncio
+async def test_put_stream_large_body_uses_multipart_upload(storage_repo, mock_s3_client):
+    storage_repo.multipart_part_size = 4
+    mock_s3_client.create_multipart_upload.return_value = {"UploadId": "upload-id"}
+    mock_s3_client.upload_part.side_effect = [{"ETag": "etag-1"}, {"ETag": "etag-2"}]
+
+    await storage_repo.put_stream("test-path", _chunks(b"1234", b"56"))
+
+    mock_s3_client.put_object.assert_not_called()
+    assert [call.kwargs["Body"] for call in mock_s3_client.upload_part.call_args_list] == [
+        b"1234",
+        b"56",
+    ]
+    mock_s3_client.complete_multipart_upload.assert_called_once_with(
+        Bucket=storage_repo.bucket_name,
+        Key="test-path",
+        UploadId="upload-id",
+        MultipartUpload={
+            "Parts": [{"ETag": "etag-1", "PartNumber": 1}, {"ETag": "etag-2", "PartNumber": 2}]
+        },
+    )
+
+
+@pytest.mark.asyncio
+async def test_put_stream_aborts_multipart_upload_on_error(storage_repo, mock_s3_client):
+    storage_repo.multipart_part_size = 4
+    mock_s3_client.create_multipart_upload.return_value = {"UploadId": "upload-id"}
+    mock_s3_client.upload_part.return_value = {"ETag": "etag"}
+
+    async def failing_chunks():
+        yield b"1234"
+        raise ValueError("Invalid JSON in state data")
+
+    with pytest.raises(ValueError):
+        await storage_repo.put_stream("test-path", failing_chunks())
+
+    mock_s3_client.complete_multipart_upload.assert_not_called()
+    mock_s3_client.abort_multipart_upload.assert_called_once_with(
+        Bucket=storage_repo.bucket_name, Key="test-path", UploadId="upload-id"
+    )
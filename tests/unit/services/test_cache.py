@@ -0,0 +1,203 @@
+from datetime import datetime
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.repos.cache import MemoryCacheRepository
+from src.repos.state.schema import StateVersionSchema
+from src.services.cache import (
+    CachedBlob,
+    SharedStateCache,
+    StateCache,
+)
+
+
+def blob(size: int) -> CachedBlob:
+    return CachedBlob(codec="identity", data=b"x" * size)
+
+
+def test_get_counts_hits_and_misses():
+    cache = StateCache(max_size=100, max_entry_size=50)
+    cache.put("hash-1", blob(10))
+
+    assert cache.get("hash-1") == blob(10)
+    assert cache.get("hash-2") is None
+    assert cache.get_stats()["hits"] == 1
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_evicts_least_recently_used_by_size():
+    cache = StateCache(max_size=100, max_entry_size=50)
+    cache.put("hash-1", blob(40))
+    cache.put("hash-2", blob(40))
+    cache.get("hash-1")
+
+    cache.put("hash-3", blob(40))
+
+    assert cache.get("hash-2") is None
+    assert cache.get("hash-1") is not None
+    assert cache.get("hash-3") is not None
+    assert cache.get_stats()["size"] == 80
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_skips_entries_above_size_cap():
+    cache = StateCache(max_size=100, max_entry_size=50)
+
+    cache.put("hash-1", blob(51))
+    cache.put("hash-2", blob(0))
+
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_replacing_entry_keeps_size_consistent():
+    cache = StateCache(max_size=100, max_entry_size=50)
+    cache.put("hash-1", blob(40))
+    cache.put("hash-1", blob(20))
+
+    assert cache.get_stats()["size"] == 20
+    assert cache.get_stats()["entries"] == 1
+
+
+@pytest.fixture
+def shared_cache():
+    return SharedStateCache(MemoryCacheRepository())
+
+
+def state_version(version_id: int) -> StateVersionSchema:
+    return StateVersionSchema(
+        id=version_id,
+        state_hash=f"hash-{version_id}",
+        storage_path=f"blobs/hash-{version_id}",
+        created_at=datetime(2025, 1, 1),
+        operation_id=f"op-{version_id}",
+        state_id=1,
+    )
+
+
+async def update(shared_cache: SharedStateCache, version: StateVersionSchema) -> None:
+    stamp = await shared_cache.begin_update("state")
+    await shared_cache.end_update("state", stamp, version)
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_publishes_latest_version(shared_cache):
+    await update(shared_cache, state_version(1))
+
+    version, stamp = await shared_cache.get_latest_version("state")
+
+    assert version == state_version(1)
+    assert stamp == 2
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_ignores_metadata_with_stale_stamp(shared_cache):
+    _, stamp = await shared_cache.get_latest_version("state")
+    await update(shared_cache, state_version(2))
+
+    # A reader that looked up the database before the write finishes last.
+    await shared_cache.set_latest_version("state", state_version(1), stamp)
+
+    version, stamp = await shared_cache.get_latest_version("state")
+
+    assert version is None
+    assert stamp == 2
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_is_bypassed_while_a_write_is_in_flight(shared_cache):
+    await update(shared_cache, state_version(1))
+    stamp = await shared_cache.begin_update("state")
+
+    assert await shared_cache.get_latest_version("state") == (None, None)
+
+    await shared_cache.end_update("state", stamp, state_version(2))
+
+    assert (await shared_cache.get_latest_version("state"))[0] == state_version(2)
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_overlapping_writers_do_not_publish(shared_cache):
+    first = await shared_cache.begin_update("state")
+    second = await shared_cache.begin_update("state")
+    await shared_cache.end_update("state", second, state_version(2))
+    await shared_cache.end_update("state", first, state_version(1))
+
+    version, stamp = await shared_cache.get_latest_version("state")
+
+    assert version is None
+    assert stamp == 4
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_update_degrades_when_backend_is_down():
+    backend = AsyncMock()
+    backend.incr.side_effect = ConnectionError("cache is down")
+    shared_cache = SharedStateCache(backend)
+
+    stamp = await shared_cache.begin_update("state")
+    await shared_cache.end_update("state", stamp, state_version(1))
+
+    assert stamp is None
+    backend.set.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_invalidates_after_commit_when_begin_fails(shared_cache):
+    await update(shared_cache, state_version(1))
+    backend_incr = shared_cache.backend.incr
+    shared_cache.backend.incr = AsyncMock(side_effect=ConnectionError("cache is down"))
+
+    stamp = await shared_cache.begin_update("state")
+    shared_cache.backend.incr = backend_incr
+    await shared_cache.end_update("state", stamp, state_version(2))
+
+    version, _ = await shared_cache.get_latest_version("state")
+
+    assert version is None
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_is_bypassed_after_failed_update(shared_cache):
+    await update(shared_cache, state_version(1))
+    stamp = await shared_cache.begin_update("state")
+    backend_incr = shared_cache.backend.incr
+    shared_cache.backend.incr = AsyncMock(side_effect=ConnectionError("cache is down"))
+
+    await shared_cache.end_update("state", stamp, state_version(2))
+    shared_cache.backend.incr = backend_incr
+
+    assert await shared_cache.get_latest_version("state") == (None, None)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "entry", [b"not json", b"[]", b'{"stamp": 0}', b'{"stamp": 0, "version": {}}']
+)
+async def test_shared_cache_treats_corrupt_entries_as_misses(shared_cache, entry):
+    await shared_cache.backend.set(shared_cache._key("latest", "state"), entry)
+
+    assert await shared_cache.get_latest_version("state") == (None, 0)
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_blobs(shared_cache):
+    shared_cache.max_blob_size = 10
+    await shared_cache.put_blob("hash-1", CachedBlob(codec="gzip", data=b"data\nline"))
+    await shared_cache.put_blob("hash-2", CachedBlob(codec="gzip", data=b"x" * 11))
+
+    assert await shared_cache.get_blob("hash-1") == CachedBlob(codec="gzip", data=b"data\nline")
+    assert await shared_cache.get_blob("hash-2") is None
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_treats_backend_errors_as_misses():
+    backend = AsyncMock()
+    backend.get_many.side_effect = ConnectionError("cache is down")
+    backend.get.side_effect = ConnectionError("cache is down")
+    backend.incr.side_effect = ConnectionError("cache is down")
+    shared_cache = SharedStateCache(backend)
+
+    assert await shared_cache.get_latest_version("state") == (None, None)
+    assert await shared_cache.get_blob("hash-1") is None
+    backend.set.assert_not_called()
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from src.services.delta import apply_delta, make_delta
+
+
+def make_state(serial: int, resources: int) -> bytes:
+    state = {
+        "version": 4,
+        "serial": serial,
+        "lineage": "test-lineage",
+        "resources": [
+            {"type": "null_resource", "name": f"resource_{index}", "id": str(index)}
+            for index in range(resources)
+        ],
+    }
+    return json.dumps(state, indent=2).encode()
+
+
+@pytest.mark.parametrize(
+    "base, target",
+    [
+        (make_state(1, 50), make_state(2, 50)),
+        (make_state(1, 50), make_state(2, 60)),
+        (make_state(1, 50), make_state(2, 10)),
+        (make_state(1, 0), make_state(2, 50)),
+        (b"", make_state(1, 5)),
+        (make_state(1, 5), b""),
+        (b'{"a": 1}', b'{"a": 1}\n'),
+        ('{"name": "café"}\r\n'.encode(), b'{"name": "\xff"}\r\n'),
+    ],
+)
+def test_apply_delta_reproduces_target(base, target):
+    delta = make_delta(base, target)
+
+    assert apply_delta(base, delta) == target
+
+
+def test_delta_is_smaller_than_target_for_small_changes():
+    base = make_state(1, 500)
+    target = base.replace(b'"resource_250"', b'"resource_renamed"')
+
+    delta = make_delta(base, target)
+
+    assert len(delta) < len(target) // 20
+    assert apply_delta(base, delta) == target
+
+
+@pytest.mark.parametrize(
+    "delta", [b"not json", b"{}", b"[[0, 1000]]", b"[[2, 1]]", b"[[0.5, 1]]", b"[1]"]
+)
+def test_apply_invalid_delta_raises_value_error(delta):
+    with pytest.raises(ValueError):
+        apply_delta(make_state(1, 1), delta)
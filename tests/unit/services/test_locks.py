@@ -0,0 +1,147 @@
+import asyncio
+from unittest.mock import (
+    AsyncMock,
+    MagicMock,
+    patch,
+)
+
+import pytest
+
+from src.controllers.schema import LockRequestSchema
+from src.repos.locks import RowLockRepository
+from src.services.locks import (
+    LockReaper,
+    LockReleaseListener,
+    LockWaitQueue,
+)
+
+
+class FakeLock:
+
+    def __init__(self) -> None:
+        self.holder = "initial-holder"
+        self.attempts = 0
+
+    def try_lock(self, name: str):
+        async def attempt() -> bool:
+            self.attempts += 1
+            if self.holder is None:
+                self.holder = name
+                return True
+            return False
+
+        return attempt
+
+
+async def _wait_until(condition) -> None:
+    while not condition():
+        await asyncio.sleep(0.001)
+
+
+@pytest.mark.asyncio
+async def test_waiters_acquire_in_fifo_order():
+    queue = LockWaitQueue(poll_interval=60)
+    lock = FakeLock()
+    order = []
+
+    async def wait_for_lock(name: str) -> None:
+        assert await queue.acquire("state", lock.try_lock(name), timeout=5)
+        order.append(name)
+
+    tasks = []
+    for name in ("first", "second", "third"):
+        tasks.append(asyncio.create_task(wait_for_lock(name)))
+        await asyncio.sleep(0.001)
+
+    for expected in ("first", "second", "third"):
+        lock.holder = None
+        queue.notify("state")
+        await _wait_until(lambda: expected in order)
+
+    await asyncio.gather(*tasks)
+    assert order == ["first", "second", "third"]
+    # Only the head of the queue retries, once per release.
+    assert lock.attempts == 4
+
+
+@pytest.mark.asyncio
+async def test_timed_out_waiter_hands_over_to_next():
+    queue = LockWaitQueue(poll_interval=60)
+    lock = FakeLock()
+
+    head = asyncio.create_task(queue.acquire("state", lock.try_lock("head"), timeout=0.05))
+    await asyncio.sleep(0.001)
+    follower = asyncio.create_task(queue.acquire("state", lock.try_lock("follower"), timeout=5))
+
+    assert await head is False
+    # The head tried on arrival and at its deadline; the follower was woken to try next.
+    await _wait_until(lambda: lock.attempts == 3)
+    follower.cancel()
+
+
+@pytest.mark.asyncio
+async def test_head_polls_without_notification():
+    queue = LockWaitQueue(poll_interval=0.01)
+    lock = FakeLock()
+
+    waiter = asyncio.create_task(queue.acquire("state", lock.try_lock("waiter"), timeout=5))
+    await asyncio.sleep(0.001)
+    lock.holder = None
+
+    assert await waiter is True
+
+
+@pytest.mark.asyncio
+async def test_listener_wakes_waiters_on_unlock(db_session, test_settings):
+    queue = LockWaitQueue(poll_interval=60)
+    dsn = test_settings.DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://")
+    listener = LockReleaseListener(dsn, queue, retry_interval=1)
+    repo = RowLockRepository(db_session)
+    await repo.lock("notified-state", LockRequestSchema(ID="holder"))
+    lock = FakeLock()
+
+    listener.start()
+    try:
+        waiter = asyncio.create_task(
+            queue.acquire("notified-state", lock.try_lock("waiter"), timeout=5)
+        )
+        await asyncio.sleep(0.2)
+        lock.holder = None
+        await repo.unlock("notified-state", "holder")
+
+        assert await asyncio.wait_for(waiter, 2) is True
+    finally:
+        await listener.stop()
+
+
+@pytest.mark.asyncio
+async def test_reap_repeats_full_batches():
+    release = AsyncMock(side_effect=[["state-1", "state-2"], ["state-3"]])
+    reaper = LockReaper(lease_ttl=60, interval=1, batch_size=2)
+
+    with (
+        patch("src.services.locks.get_session_factory", return_value=MagicMock()),
+        patch("src.repos.locks.RowLockRepository.release_expired_locks", release),
+    ):
+        released = await reaper.reap()
+
+    assert released == 3
+    assert release.await_count == 2
+    release.assert_awaited_with(60, 2)
+
+
+@pytest.mark.asyncio
+async def test_reaper_survives_failures():
+    release = AsyncMock(side_effect=ConnectionError("refused"))
+    reaper = LockReaper(lease_ttl=60, interval=0.01, batch_size=2)
+
+    with (
+        patch("src.services.locks.get_session_factory", return_value=MagicMock()),
+        patch("src.repos.locks.RowLockRepository.release_expired_locks", release),
+    ):
+        reaper.start()
+        while release.await_count < 2:
+            await asyncio.sleep(0.01)
+        await reaper.stop()
+
+    assert reaper._task is None
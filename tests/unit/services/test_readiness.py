@@ -0,0 +1,67 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.services.readiness import ReadinessChecker
+
+
+@pytest.mark.asyncio
+async def test_results_are_cached_for_ttl():
+    probe = AsyncMock()
+    checker = ReadinessChecker({"database": probe}, ttl=60, timeout=1)
+
+    first = await checker.check()
+    second = await checker.check()
+
+    assert first["database"].ok is True
+    assert first["database"].latency_ms >= 0
+    assert second is first
+    probe.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_checks_share_one_probe_run():
+    calls = 0
+
+    async def probe():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+
+    checker = ReadinessChecker({"database": probe}, ttl=60, timeout=1)
+
+    await asyncio.gather(*(checker.check() for _ in range(20)))
+
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_failing_and_slow_probes_are_reported():
+    async def slow_probe():
+        await asyncio.sleep(1)
+
+    checker = ReadinessChecker(
+        {"database": AsyncMock(side_effect=ConnectionError("refused")), "storage": slow_probe},
+        ttl=60,
+        timeout=0.01,
+    )
+
+    results = await checker.check()
+
+    assert results["database"].ok is False
+    assert results["database"].error == "refused"
+    assert results["storage"].ok is False
+    assert "timed out" in results["storage"].error
+
+
+@pytest.mark.asyncio
+async def test_background_refresh():
+    probe = AsyncMock()
+    checker = ReadinessChecker({"database": probe}, ttl=0.02, timeout=1)
+
+    checker.start()
+    await asyncio.sleep(0.05)
+    await checker.stop()
+
+    assert probe.await_count >= 2
@@ -1,10 +1,21 @@
+import asyncio
+import hashlib
 import json
+from datetime import datetime
+from typing import Optional
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
 from src.controllers.schema import LockRequestSchema
-from src.repos.state.schema import StateVersionSchema
+from src.repos.cache import MemoryCacheRepository
+from src.repos.state.schema import (
+    LatestStateVersionSchema,
+    StateBlobSchema,
+    StateVersionSchema,
+)
+from src.repos.storage import get_codec
+from src.services.cache import SharedStateCache, StateCache
 from src.services.state import StateService
 
 
@@ -12,26 +23,80 @@ from src.services.state import StateService
 def mock_state_repo():
     mock_repo = AsyncMock()
     mock_repo.get_by_name.return_value = None
-    mock_repo.save_state.return_value = None
     mock_repo.lock.return_value = True
     mock_repo.unlock.return_value = True
     return mock_repo
 
 
 @pytest.fixture
-def mock_state_version_repo():
+def blobs():
+    return {}
+
+
+@pytest.fixture
+def mock_state_version_repo(blobs):
+    versions = []
+
+    async def create_version(
+        name, state_hash, storage_path, operation_id, codec, size=None, base_version_id=None, **_
+    ):
+        if base_version_id is None:
+            blob = blobs.setdefault(
+                state_hash,
+                StateBlobSchema(
+                    state_hash=state_hash,
+                    storage_path=storage_path,
+                    size=size,
+                    codec=codec,
+                    ref_count=0,
+                    created_at=datetime.now(),
+                ),
+            )
+            blob.ref_count += 1
+            storage_path, codec = blob.storage_path, blob.codec
+        versions.append(
+            StateVersionSchema(
+                id=len(versions) + 1,
+                state_hash=state_hash,
+                storage_path=storage_path,
+                created_at=datetime.now(),
+                operation_id=operation_id,
+                state_id=1,
+                codec=codec,
+                base_version_id=base_version_id,
+            )
+        )
+        return versions[-1]
+
     mock_repo = AsyncMock()
     mock_repo.get_versions_by_state_id.return_value = []
-    mock_repo.create_version.return_value = None
+    mock_repo.get_latest_version.return_value = None
+    mock_repo.create_version.side_effect = create_version
+    return mock_repo
+
+
+@pytest.fixture
+def mock_state_blob_repo(blobs):
+
+    async def get_by_hash(state_hash):
+        return blobs.get(state_hash)
+
+    mock_repo = AsyncMock()
+    mock_repo.get_by_hash.side_effect = get_by_hash
     return mock_repo
 
 
 @pytest.fixture
-def state_service(mock_state_repo, mock_state_version_repo, mock_storage_repository):
+def state_service(
+    mock_state_repo, mock_state_version_repo, mock_state_blob_repo, mock_storage_repository
+):
     """Create a state service with mock repositories for testing."""
     service = StateService(AsyncMock(), mock_storage_repository)
     service.state_repo = mock_state_repo
+    service.lock_repo = mock_state_repo
     service.state_version_repo = mock_state_version_repo
+    service.state_blob_repo = mock_state_blob_repo
+    service.cache = StateCache(max_size=0, max_entry_size=0)
     return service
 
 
@@ -42,10 +107,6 @@ async def test_get_state(
     test_data = json.dumps({"version": 4, "terraform_version": "1.9.0"})
     mock_storage_repository.storage["states/test-state/test-hash"] = test_data.encode()
 
-    mock_state = MagicMock()
-    mock_state.id = 1
-    mock_state_repo.get_by_name.return_value = mock_state
-
     mock_version = StateVersionSchema(
         id=1,
         state_hash="test-hash",
@@ -54,21 +115,26 @@ async def test_get_state(
         operation_id="test-op",
         state_id=1,
     )
-    mock_state_version_repo.get_versions_by_state_id.return_value = [mock_version]
+    mock_state_version_repo.get_latest_version.return_value = mock_version
 
     state_data = await state_service.get_state("test-state")
 
     assert json.loads(state_data) == {"version": 4, "terraform_version": "1.9.0"}
+    mock_state_version_repo.get_latest_version.assert_called_once_with("test-state")
+    mock_state_version_repo.get_versions_by_state_id.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_state_without_versions_returns_initial_state(state_service):
+    state_data = await state_service.get_state("missing-state")
+
+    assert json.loads(state_data)["serial"] == 0
 
 
 @pytest.mark.asyncio
 async def test_save_state(
     state_service, mock_state_repo, mock_state_version_repo, mock_storage_repository
 ):
-    mock_state = MagicMock()
-    mock_state.id = 1
-    mock_state_repo.save_state.return_value = mock_state
-
     state_data = json.dumps({"version": 4, "terraform_version": "1.9.0"}).encode()
 
     await state_service.save_state("test-state", state_data, "test-op-id")
@@ -76,6 +142,39 @@ async def test_save_state(
     mock_state_version_repo.create_version.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_save_state_deduplicates_identical_content(
+    state_service, mock_state_repo, mock_state_version_repo, mock_storage_repository
+):
+    state_data = json.dumps({"version": 4, "terraform_version": "1.9.0"}).encode()
+
+    await state_service.save_state("test-state", state_data, "first-op-id")
+    await state_service.save_state("test-state", state_data, "second-op-id")
+
+    storage_paths = [
+        call.kwargs["storage_path"]
+        for call in mock_state_version_repo.create_version.call_args_list
+    ]
+    assert len(mock_storage_repository.storage) == 1
+    assert storage_paths == list(mock_storage_repository.storage) * 2
+
+
+@pytest.mark.asyncio
+async def test_save_large_state_deduplicates_identical_content(
+    state_service, mock_state_repo, mock_state_version_repo, mock_storage_repository
+):
+    state_service.inline_upload_size = 8
+    state_data = json.dumps({"version": 4, "terraform_version": "1.9.0"}).encode()
+
+    await state_service.save_state("test-state", state_data, "first-op-id")
+    await state_service.save_state("test-state", state_data, "second-op-id")
+
+    assert [
+        state_service.codec.decompress(data) for data in mock_storage_repository.storage.values()
+    ] == [state_data]
+    assert mock_state_version_repo.create_version.call_count == 2
+
+
 @pytest.mark.asyncio
 async def test_lock_state(state_service):
     lock_data = LockRequestSchema(Id="test-lock-id", info="Test lock")
@@ -90,3 +189,354 @@ async def test_unlock_state(state_service):
     result = await state_service.unlock_state("test-state", "test-lock-id")
 
     assert result is True
+
+
+@pytest.mark.asyncio
+async def test_get_state_stream(state_service, mock_state_version_repo, mock_storage_repository):
+    test_data = json.dumps({"version": 4, "terraform_version": "1.9.0"}).encode()
+    mock_storage_repository.storage["states/test-state/test-hash"] = test_data
+    mock_state_version_repo.get_latest_version.return_value = StateVersionSchema(
+        id=1,
+        state_hash="test-hash",
+        storage_path="states/test-state/test-hash",
+        created_at=MagicMock(),
+        operation_id="test-op",
+        state_id=1,
+    )
+    state_service.chunk_size = 8
+
+    stream = await state_service.get_state_stream("test-state")
+    chunks = [chunk async for chunk in stream.chunks]
+
+    assert stream.content_length == len(test_data)
+    assert len(chunks) > 1
+    assert b"".join(chunks) == test_data
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("codec_name", ["identity", "gzip"])
+async def test_get_state_stream_decompresses_stored_state(
+    codec_name, state_service, mock_state_version_repo, mock_storage_repository
+):
+    test_data = json.dumps({"version": 4, "terraform_version": "1.9.0"}).encode()
+    mock_storage_repository.storage["blobs/test-hash"] = get_codec(codec_name).compress(test_data)
+    mock_state_version_repo.get_latest_version.return_value = StateVersionSchema(
+        id=1,
+        state_hash="test-hash",
+        storage_path="blobs/test-hash",
+        created_at=MagicMock(),
+        operation_id="test-op",
+        state_id=1,
+        codec=codec_name,
+    )
+
+    stream = await state_service.get_state_stream("test-state")
+
+    assert stream.content_encoding is None
+    assert b"".join([chunk async for chunk in stream.chunks]) == test_data
+
+
+@pytest.mark.asyncio
+async def test_get_state_stream_passes_gzip_through(
+    state_service, mock_state_version_repo, mock_storage_repository
+):
+    test_data = json.dumps({"version": 4, "terraform_version": "1.9.0"}).encode()
+    compressed = get_codec("gzip").compress(test_data)
+    mock_storage_repository.storage["blobs/test-hash"] = compressed
+    mock_state_version_repo.get_latest_version.return_value = StateVersionSchema(
+        id=1,
+        state_hash="test-hash",
+        storage_path="blobs/test-hash",
+        created_at=MagicMock(),
+        operation_id="test-op",
+        state_id=1,
+        codec="gzip",
+    )
+
+    stream = await state_service.get_state_stream("test-state", accepted_encodings={"gzip"})
+
+    assert stream.content_encoding == "gzip"
+    assert stream.content_length == len(compressed)
+    assert b"".join([chunk async for chunk in stream.chunks]) == compressed
+
+
+@pytest.mark.asyncio
+async def test_save_state_in_delta_mode_reconstructs_versions(
+    state_service, mock_state_repo, mock_state_version_repo, mock_storage_repository
+):
+    versions = []
+
+    async def create_version(
+        name, state_hash, storage_path, operation_id, codec, base_version_id=None, **_
+    ):
+        version = StateVersionSchema(
+            id=len(versions) + 1,
+            state_hash=state_hash,
+            storage_path=storage_path,
+            created_at=datetime.now(),
+            operation_id=operation_id,
+            state_id=1,
+            codec=codec,
+            base_version_id=base_version_id,
+        )
+        versions.append(version)
+        return version
+
+    async def get_latest_snapshot(name):
+        snapshots = [version for version in versions if version.base_version_id is None]
+        if not snapshots:
+            return None, 0
+        return snapshots[-1], len(versions) - snapshots[-1].id
+
+    async def get_version_by_id(state_id, version_id):
+        return versions[version_id - 1]
+
+    mock_state = MagicMock()
+    mock_state.id = 1
+    mock_state_repo.get_by_name.return_value = mock_state
+    mock_state_version_repo.create_version.side_effect = create_version
+    mock_state_version_repo.get_latest_snapshot.side_effect = get_latest_snapshot
+    mock_state_version_repo.get_version_by_id.side_effect = get_version_by_id
+    state_service.delta_enabled = True
+    state_service.snapshot_interval = 3
+
+    resources = [{"type": "null_resource", "name": f"r{index}"} for index in range(100)]
+    states = []
+    for serial in range(5):
+        resources[serial]["name"] = f"changed{serial}"
+        states.append(json.dumps({"serial": serial, "resources": resources}, indent=2).encode())
+        await state_service.save_state("test-state", states[-1], f"op-{serial}")
+
+    assert [version.base_version_id for version in versions] == [None, 1, 1, None, 4]
+    assert versions[1].storage_path.startswith("deltas/")
+    for version, state_data in zip(versions, states):
+        stream = await state_service.get_state_version_stream("test-state", version.id)
+        assert b"".join([chunk async for chunk in stream.chunks]) == state_data
+
+
+@pytest.mark.asyncio
+async def test_get_state_is_served_from_cache(
+    state_service, mock_state_version_repo, mock_storage_repository
+):
+    test_data = json.dumps({"version": 4, "terraform_version": "1.9.0"}).encode()
+    mock_storage_repository.storage["blobs/test-hash"] = get_codec("gzip").compress(test_data)
+    mock_state_version_repo.get_latest_version.return_value = StateVersionSchema(
+        id=1,
+        state_hash="test-hash",
+        storage_path="blobs/test-hash",
+        created_at=MagicMock(),
+        operation_id="test-op",
+        state_id=1,
+        codec="gzip",
+    )
+    state_service.cache = StateCache(max_size=1024, max_entry_size=1024)
+
+    assert await state_service.get_state("test-state") == test_data
+    mock_storage_repository.storage.clear()
+    assert await state_service.get_state("test-state") == test_data
+
+    stream = await state_service.get_state_stream("test-state", accepted_encodings={"gzip"})
+    assert stream.content_encoding == "gzip"
+    assert get_codec("gzip").decompress(b"".join([chunk async for chunk in stream.chunks])) == (
+        test_data
+    )
+    assert state_service.cache.get_stats()["hits"] == 2
+    assert state_service.cache.get_stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_save_state_populates_cache(
+    state_service, mock_state_repo, mock_state_version_repo, mock_storage_repository
+):
+    state_service.cache = StateCache(max_size=1024, max_entry_size=1024)
+    state_data = json.dumps({"version": 4, "terraform_version": "1.9.0"}).encode()
+
+    version = await state_service.save_state("test-state", state_data, "test-op-id")
+
+    mock_state_version_repo.get_latest_version.return_value = version
+    mock_storage_repository.storage.clear()
+    assert await state_service.get_state("test-state") == state_data
+
+
+@pytest.mark.asyncio
+async def test_save_state_writes_through_shared_cache(
+    state_service, mock_state_repo, mock_state_version_repo, mock_storage_repository
+):
+    state_service.shared_cache = SharedStateCache(MemoryCacheRepository())
+    state_data = json.dumps({"version": 4, "terraform_version": "1.9.0"}).encode()
+
+    await state_service.save_state("test-state", state_data, "test-op-id")
+
+    # Another worker: nothing in its own process cache, database and storage not consulted.
+    mock_storage_repository.storage.clear()
+    state_service.cache = StateCache(max_size=0, max_entry_size=0)
+    assert await state_service.get_state("test-state") == state_data
+    mock_state_version_repo.get_latest_version.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_save_state_succeeds_when_shared_cache_is_down(
+    state_service, mock_state_version_repo
+):
+    backend = AsyncMock()
+    backend.incr.side_effect = ConnectionError("cache is down")
+    backend.get_many.side_effect = ConnectionError("cache is down")
+    state_service.shared_cache = SharedStateCache(backend)
+    state_data = json.dumps({"version": 4, "terraform_version": "1.9.0"}).encode()
+
+    version = await state_service.save_state("test-state", state_data, "test-op-id")
+
+    assert version.operation_id == "test-op-id"
+    mock_state_version_repo.create_version.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_save_state_keeps_object_when_version_is_not_recorded(
+    state_service, mock_state_version_repo, mock_storage_repository
+):
+    mock_state_version_repo.create_version.side_effect = None
+    mock_state_version_repo.create_version.return_value = None
+    state_data = json.dumps({"version": 4, "terraform_version": "1.9.0"}).encode()
+
+    result = await state_service.save_state(
+        "test-state", state_data, "op-id", expected_version_id=1
+    )
+
+    assert result is None
+    assert list(mock_storage_repository.storage) == [
+        f"blobs/sha256/{hashlib.sha256(state_data).hexdigest()}"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_failed_save_keeps_object_of_concurrent_save_with_same_content(
+    state_service, mock_state_version_repo, mock_storage_repository
+):
+    state_data = json.dumps({"version": 4, "terraform_version": "1.9.0"}).encode()
+    create_version = mock_state_version_repo.create_version.side_effect
+    # The other save has written the object but not committed its version yet.
+    mock_state_version_repo.create_version.side_effect = RuntimeError("database unavailable")
+
+    with pytest.raises(RuntimeError):
+        await state_service.save_state("test-state", state_data, "failed-op-id")
+
+    mock_state_version_repo.create_version.side_effect = create_version
+    version = await state_service.save_state("test-state", state_data, "other-op-id")
+    mock_state_version_repo.get_latest_version.return_value = version
+
+    assert version.storage_path in mock_storage_repository.storage
+    assert await state_service.get_state("test-state") == state_data
+
+
+@pytest.mark.asyncio
+async def test_save_state_offloads_large_states(
+    state_service, mock_state_version_repo, mock_storage_repository
+):
+    state_service.offload_threshold = 16
+    state_data = json.dumps({"version": 4, "resources": ["a" * 10] * 20}).encode()
+
+    version = await state_service.save_state("test-state", state_data, "op-id")
+    mock_state_version_repo.get_latest_version.return_value = version
+
+    assert version.state_hash == hashlib.sha256(state_data).hexdigest()
+    assert await state_service.get_state("test-state") == state_data
+    with pytest.raises(ValueError, match="Invalid JSON"):
+        await state_service.save_state("test-state", state_data[:-1], "op-id")
+
+
+def latest_version(index: int, size: Optional[int] = None) -> LatestStateVersionSchema:
+    version = StateVersionSchema(
+        id=index,
+        state_hash=f"hash-{index}",
+        storage_path=f"blobs/hash-{index}",
+        created_at=datetime.now(),
+        operation_id="op-id",
+        state_id=index,
+    )
+    return LatestStateVersionSchema(version=version, size=size)
+
+
+@pytest.mark.asyncio
+async def test_read_latest_states_reports_each_state(
+    state_service, mock_state_version_repo, mock_storage_repository
+):
+    state_data = json.dumps({"version": 4, "serial": 1}).encode()
+    stored = await state_service.save_state("stored-state", state_data, "op-id")
+    lost = await state_service.save_state("lost-state", b'{"version": 4}', "op-id")
+    del mock_storage_repository.storage[lost.storage_path]
+    mock_state_version_repo.get_latest_versions.return_value = {
+        "stored-state": LatestStateVersionSchema(version=stored, size=len(state_data)),
+        "lost-state": LatestStateVersionSchema(version=lost),
+    }
+    state_service.cache = StateCache(max_size=1024, max_entry_size=1024)
+    state_service.shared_cache = SharedStateCache(MemoryCacheRepository())
+
+    results = await state_service.read_latest_states(
+        ["stored-state", "lost-state", "unknown-state", "stored-state"]
+    )
+    by_name = {result.name: result async for result in results}
+
+    mock_state_version_repo.get_latest_versions.assert_awaited_once_with(
+        ["stored-state", "lost-state", "unknown-state"]
+    )
+    assert by_name["stored-state"].data == state_data
+    assert by_name["lost-state"].error == "State file not found in storage"
+    assert by_name["unknown-state"].version is None
+    assert by_name["unknown-state"].error is None
+    assert state_service.cache.get_stats()["entries"] == 0
+    assert await state_service.shared_cache.get_blob(stored.state_hash) is None
+
+
+@pytest.mark.asyncio
+async def test_read_latest_states_bounds_concurrent_loads(state_service, mock_state_version_repo):
+    in_flight = peak = 0
+
+    async def load_version_data(version, base_version=None, cache=True):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if version.id == 3:
+            raise ConnectionError("storage unavailable")
+        return b"{}"
+
+    versions = {f"state-{index}": latest_version(index, size=2) for index in range(10)}
+    mock_state_version_repo.get_latest_versions.return_value = versions
+    state_service._load_version_data = load_version_data
+    state_service.bulk_read_concurrency = 3
+
+    results = [result async for result in await state_service.read_latest_states(list(versions))]
+
+    assert peak == 3
+    assert len(results) == 10
+    assert [result.error for result in results if result.error] == ["storage unavailable"]
+
+
+@pytest.mark.asyncio
+async def test_read_latest_states_bounds_buffered_bytes(state_service, mock_state_version_repo):
+    held = []
+
+    async def load_version_data(version, base_version=None, cache=True):
+        held.append(version.id)
+        assert sum(100 if held_id == 0 else 10 for held_id in held) <= 30 or held == [0]
+        await asyncio.sleep(0.001)
+        return b"x" * (100 if version.id == 0 else 10)
+
+    versions = {f"state-{index}": latest_version(index, size=10) for index in range(1, 20)}
+    versions["oversized"] = latest_version(0, size=100)
+    versions["unknown-size"] = latest_version(20)
+    mock_state_version_repo.get_latest_versions.return_value = versions
+    state_service._load_version_data = load_version_data
+    state_service.bulk_read_concurrency = 8
+    state_service.bulk_read_max_buffer_size = 30
+
+    names = []
+    async for result in await state_service.read_latest_states(list(versions)):
+        names.append(result.name)
+        assert result.error is None
+        # A slow client: the state is held until its line has been written.
+        await asyncio.sleep(0.001)
+        held.remove(result.version.id)
+
+    assert sorted(names) == sorted(versions)
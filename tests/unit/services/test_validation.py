@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from src.services.validation import StreamingJSONValidator
+
+STATE_DATA = json.dumps(
+    {
+        "version": 4,
+        "lineage": "test-lineage",
+        "resources": [{"name": 'quoted "}]{[" value', "escaped": "\\\\", "list": [1, 2, {}]}],
+        "check_results": None,
+    }
+).encode()
+
+
+def validate(data: bytes, chunk_size: int) -> StreamingJSONValidator:
+    validator = StreamingJSONValidator()
+    for start in range(0, len(data), chunk_size):
+        validator.feed(data[start : start + chunk_size])
+    validator.close()
+    return validator
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 4096])
+def test_valid_document_in_chunks(chunk_size):
+    validator = validate(STATE_DATA, chunk_size)
+
+    assert validator.size == len(STATE_DATA)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"",
+        b"   ",
+        b"{",
+        b'{"a": 1}}',
+        b'{"a": [1}',
+        b'{"a": "1}',
+        b"[1, 2]",
+        b'"state"',
+        b"{} {}",
+        b"x{}",
+        b"{}x",
+        b"{abc}",
+        b'{"a": nope}',
+        b'{"a" 1 2 ,,, }',
+        b'{"a": 1,}',
+        b'{"a": "line\nbreak"}',
+        b'{"a": "\xff"}',
+    ],
+)
+@pytest.mark.parametrize("chunk_size", [1, 2, 1024])
+def test_invalid_document(data, chunk_size):
+    with pytest.raises(ValueError):
+        validate(data, chunk_size)